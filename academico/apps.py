@@ -1,6 +1,14 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class AcademicoConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'academico'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+
+        if settings.ML_PRECARGAR:
+            from utils.ml_model import precargar
+            precargar()
@@ -0,0 +1,124 @@
+"""
+Cache por usuario de los dashboards y la libreta, con ETag.
+
+La clave de cada respuesta es (endpoint, usuario, parámetros de la consulta,
+fecha de hoy, versión de datos). La versión está en VersionDatos y sube una vez por
+transacción que escribe notas, asistencias, tareas, horarios, inscripciones...,
+así que una escritura invalida todas las respuestas sin tener que buscarlas.
+
+Cada entrada guarda el ETag (hash del contenido) junto con los datos: si el
+cliente manda If-None-Match con ese ETag se responde 304 sin cuerpo, y en
+cualquier caso un acierto no vuelve a consultar notas ni a evaluar el modelo.
+"""
+import hashlib
+import json
+import threading
+from urllib.parse import urlencode
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from rest_framework.response import Response
+
+from .models import VersionDatos
+
+
+class _Pendiente(threading.local):
+    def __init__(self):
+        self.cambio = False
+
+
+_pendiente = _Pendiente()
+
+
+def marcar_cambio():
+    """Sube la versión de datos al confirmarse la transacción actual (una sola vez por transacción)."""
+    _pendiente.cambio = True
+    transaction.on_commit(_incrementar_version)
+
+
+def _incrementar_version():
+    # on_commit se registra una vez por escritura; solo la primera llamada encuentra trabajo.
+    if not _pendiente.cambio:
+        return
+    _pendiente.cambio = False
+    if not VersionDatos.objects.filter(pk=1).update(version=F("version") + 1):
+        VersionDatos.objects.bulk_create([VersionDatos(pk=1, version=1)], ignore_conflicts=True)
+
+
+def version_datos():
+    return VersionDatos.objects.filter(pk=1).values_list("version", flat=True).first() or 0
+
+
+def _etag(datos):
+    contenido = json.dumps(datos, cls=DjangoJSONEncoder, sort_keys=True).encode()
+    return '"%s"' % hashlib.sha1(contenido).hexdigest()
+
+
+def _responder(request, etag, datos):
+    if request.headers.get("If-None-Match") == etag:
+        respuesta = Response(status=304)
+    else:
+        respuesta = Response(datos)
+    respuesta["ETag"] = etag
+    # Contenido por usuario: que ningún proxy lo comparta y el cliente revalide siempre
+    respuesta["Cache-Control"] = "private, no-cache"
+    return respuesta
+
+
+def _buscar(nombre, request):
+    """Devuelve (clave, (etag, datos) guardados o None)."""
+    # Todos los parámetros (gestion_id, trimestre...): cada combinación es otra respuesta
+    parametros = hashlib.sha1(urlencode(sorted(request.query_params.lists()), doseq=True).encode()).hexdigest()
+    clave = "respuesta:{}:{}:{}:{}:{}".format(
+        nombre,
+        request.user.pk,
+        parametros,
+        timezone.localdate().isoformat(),  # clases de hoy, tareas pendientes
+        version_datos(),
+    )
+    return clave, cache.get(clave)
+
+
+def _guardar(clave, request, respuesta):
+    if respuesta.status_code != 200:
+        return respuesta
+    etag = _etag(respuesta.data)
+    cache.set(clave, (etag, respuesta.data), settings.DASHBOARD_CACHE_TTL)
+    return _responder(request, etag, respuesta.data)
+
+
+def cache_por_usuario(nombre):
+    """
+    Decorador para vistas GET por usuario; va debajo de @api_view, @permission_classes y @has_role.
+
+    Sirve también para vistas async: con el mismo `nombre` que la sync comparten las entradas.
+    """
+
+    def decorador(vista):
+        if iscoroutinefunction(vista):
+            @wraps(vista)
+            async def envoltura_async(request, *args, **kwargs):
+                clave, guardada = await sync_to_async(_buscar)(nombre, request)
+                if guardada is not None:
+                    return _responder(request, *guardada)
+                respuesta = await vista(request, *args, **kwargs)
+                return await sync_to_async(_guardar)(clave, request, respuesta)
+
+            return envoltura_async
+
+        @wraps(vista)
+        def envoltura(request, *args, **kwargs):
+            clave, guardada = _buscar(nombre, request)
+            if guardada is not None:
+                return _responder(request, *guardada)
+            return _guardar(clave, request, vista(request, *args, **kwargs))
+
+        return envoltura
+
+    return decorador
@@ -0,0 +1,195 @@
+"""
+Secciones de los dashboards del profesor y del alumno.
+
+Cada sección es independiente de las demás: consulta la base por su cuenta y
+devuelve datos ya serializados. Las vistas sync las llaman una tras otra; las
+async (dashboard_profesor_async, dashboard_estudiante_async) las corren a la
+vez con colegio_backend.asincrono.en_paralelo, así que la latencia pasa a ser
+la de la sección más lenta y no la suma.
+"""
+from collections import defaultdict
+from datetime import date
+
+from django.db.models import Prefetch
+from django.utils import timezone
+
+from asistencia.models import Horario, Periodo
+from asistencia.serializers import HorarioSerializer, optimizar_horarios
+from evaluaciones.models import EntregaTarea, ResultadoExamen
+from evaluaciones.serializers import EntregaTareaSerializer, ResultadoExamenSerializer
+from usuarios.serializers import AlumnoSerializer
+from .models import Inscripcion, NotaMateria
+from .predicciones import obtener_predicciones
+
+DIAS = {
+    "Monday": "Lunes",
+    "Tuesday": "Martes",
+    "Wednesday": "Miercoles",
+    "Thursday": "Jueves",
+    "Friday": "Viernes",
+    "Saturday": "Sabado",
+    "Sunday": "Domingo",
+}
+
+
+def _dia_de_hoy():
+    return DIAS[date.today().strftime("%A")]
+
+
+# ------------------------------- Profesor -------------------------------
+
+
+def horarios_profesor(profesor, gestion, trimestre=None):
+    """Horarios del docente en la gestión (opcional trimestre). Queryset sin evaluar."""
+    horarios = Horario.objects.filter(profesor_materia__profesor=profesor, clase__gestion=gestion)
+    if trimestre:
+        horarios = horarios.filter(clase__gestion__trimestre=trimestre)
+    return horarios
+
+
+def _bajo_rendimiento(prediccion):
+    # Un clasificador con clases de texto no guarda score: decide la categoría
+    if prediccion.score is None:
+        return prediccion.categoria == "bajo"
+    return prediccion.score <= 51
+
+
+def alumnos_bajo_rendimiento(horarios):
+    """Por horario, los alumnos con predicción de rendimiento <= 51."""
+    horarios_list = list(horarios.select_related("clase__curso", "profesor_materia__materia"))
+    notas = list(
+        NotaMateria.objects.filter(horario__in=horarios_list).select_related(
+            "alumno__usuario__datos_personales"
+        )
+    )
+
+    # Predicciones materializadas de todos los alumnos de una vez
+    horarios_por_id = {horario.id: horario for horario in horarios_list}
+    predicciones = obtener_predicciones(
+        [(nota.alumno_id, horarios_por_id[nota.horario_id]) for nota in notas]
+    )
+
+    alumnos_bajo = defaultdict(list)
+    for nota, prediccion in zip(notas, predicciones):
+        if _bajo_rendimiento(prediccion):
+            alumnos_bajo[nota.horario_id].append(
+                {
+                    "alumno": AlumnoSerializer(nota.alumno).data,
+                    "examenes_prom": prediccion.detalles["promedio_examenes"],
+                    "tareas_prom": prediccion.detalles["promedio_tareas"],
+                    "asistencia_pct": round(prediccion.detalles["asistencia_pct"] * 100, 2),
+                    "nota_prom": nota.promedio,
+                    "rendimiento": round(prediccion.score, 2) if prediccion.score is not None else None,
+                }
+            )
+
+    resultados = []
+    for horario in horarios_list:
+        if alumnos_bajo[horario.id]:
+            resultados.append(
+                {
+                    "curso": horario.clase.curso.curso,
+                    "paralelo": horario.clase.paralelo,
+                    "clase_id": horario.clase.id,
+                    "materia": horario.profesor_materia.materia.nombre,
+                    "horario_id": horario.id,
+                    "alumnos_bajo_rendimiento": alumnos_bajo[horario.id],
+                }
+            )
+    return resultados
+
+
+def clases_proximas(horarios):
+    """Periodos de hoy que todavía no empezaron, con su horario."""
+    ahora = timezone.localtime().time()
+    horarios_hoy = optimizar_horarios(
+        horarios.filter(horarios_dias__dia__nombre=_dia_de_hoy()).distinct()
+    ).prefetch_related(
+        Prefetch("periodos", queryset=Periodo.objects.order_by("hora_inicial"))
+    )
+
+    proximas = []
+    for horario in horarios_hoy:
+        for periodo in horario.periodos.all():
+            # Solo periodos futuros o actuales
+            if periodo.hora_inicial >= ahora:
+                clase_data = HorarioSerializer(horario).data
+                clase_data["periodo"] = {
+                    "numero": periodo.numero,
+                    "hora_inicial": periodo.hora_inicial,
+                    "hora_final": periodo.hora_final,
+                }
+                proximas.append(clase_data)
+    return proximas
+
+
+def tareas_por_revisar(profesor):
+    """Las 10 entregas más recientes sin calificar de las tareas del profesor."""
+    entregas = (
+        EntregaTarea.objects.filter(
+            tarea__profesor_materia__profesor=profesor,
+            estado__in=["entregada", "pendiente"],
+        )
+        .select_related("tarea", "alumno")
+        .order_by("-fecha_entrega")[:10]
+    )
+    return EntregaTareaSerializer(entregas, many=True).data
+
+
+# -------------------------------- Alumno --------------------------------
+
+
+def materias_rendimiento(alumno, gestion):
+    """Notas del alumno en la gestión con la predicción de rendimiento de cada materia."""
+    notas = list(
+        NotaMateria.objects.filter(
+            alumno=alumno, horario__in=Horario.objects.filter(clase__gestion=gestion)
+        ).select_related("horario__profesor_materia__materia", "horario__clase")
+    )
+    predicciones = obtener_predicciones([(alumno.id, nota.horario) for nota in notas])
+
+    return [
+        {
+            "materia_id": nota.horario.profesor_materia.materia.id,
+            "materia": nota.horario.profesor_materia.materia.nombre,
+            "clase_id": nota.horario.clase.id,
+            "horario_id": nota.horario.id,
+            "examenes_prom": prediccion.detalles["promedio_examenes"],
+            "tareas_prom": prediccion.detalles["promedio_tareas"],
+            "asistencia_pct": round(prediccion.detalles["asistencia_pct"] * 100, 2),
+            "rendimiento": prediccion.score,
+            "nota_prom": round(nota.promedio, 2),
+        }
+        for nota, prediccion in zip(notas, predicciones)
+    ]
+
+
+def ultimas_tareas(alumno):
+    entregas = (
+        EntregaTarea.objects.filter(alumno=alumno, estado="calificada")
+        .select_related("tarea")
+        .order_by("-fecha_entrega")[:5]
+    )
+    return EntregaTareaSerializer(entregas, many=True).data
+
+
+def ultimos_examenes(alumno):
+    resultados = (
+        ResultadoExamen.objects.filter(alumno=alumno, estado="calificado")
+        .select_related("examen")
+        .order_by("-examen__fecha")[:5]
+    )
+    return ResultadoExamenSerializer(resultados, many=True).data
+
+
+def clases_de_hoy(alumno, gestion):
+    """Horarios con clase hoy de las clases en que el alumno está inscrito en la gestión."""
+    inscripciones_ids = Inscripcion.objects.filter(
+        alumno=alumno, clase__gestion=gestion
+    ).values_list("clase_id", flat=True)
+    horarios_hoy = optimizar_horarios(
+        Horario.objects.filter(
+            clase_id__in=inscripciones_ids, horarios_dias__dia__nombre=_dia_de_hoy()
+        ).distinct()
+    )
+    return HorarioSerializer(horarios_hoy, many=True).data
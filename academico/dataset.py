@@ -0,0 +1,71 @@
+"""
+Dataset de entrenamiento del modelo de rendimiento.
+
+Una fila por NotaMateria con las mismas features que usa la predicción
+(academico.features) y el promedio final como objetivo. Las notas se leen
+por lotes con .iterator() y cada lote se convierte en un DataFrame, así que la
+memoria depende del tamaño del lote y no de cuántas notas haya.
+"""
+from itertools import islice
+
+import pandas as pd
+from django.db.models import Q
+
+from asistencia.models import Horario
+from .features import FEATURES, extraer_features
+from .models import Gestion, NotaMateria
+
+COLUMNAS = ("alumno_id", "clase_id", "materia_id", "gestion_id", *FEATURES, "promedio_final")
+CAMPOS_NOTA = ("nota_ser", "nota_saber", "nota_hacer", "nota_decidir")
+
+
+def gestion_desde(valor):
+    """'2025' o '2025-2' -> (anio, trimestre). Sirve de type= para argparse."""
+    anio, _, trimestre = valor.partition("-")
+    return int(anio), int(trimestre or 1)
+
+
+def _filtro_gestiones(gestion_id=None, desde=None):
+    """Q sobre Gestion. desde es (anio, trimestre): esa gestión y las posteriores."""
+    filtro = Q()
+    if gestion_id is not None:
+        filtro &= Q(pk=gestion_id)
+    if desde is not None:
+        anio, trimestre = desde
+        filtro &= Q(anio__gt=anio) | Q(anio=anio, trimestre__gte=trimestre)
+    return filtro
+
+
+def lotes_dataset(gestion_id=None, desde=None, tamano_lote=5000):
+    """Genera DataFrames de hasta `tamano_lote` filas con las columnas de COLUMNAS."""
+    # Los horarios son pocos comparados con las notas: se cargan una vez y se cruzan en memoria
+    gestiones = Gestion.objects.filter(_filtro_gestiones(gestion_id, desde))
+    horarios = {
+        horario.id: horario
+        for horario in Horario.objects.select_related("clase", "profesor_materia").filter(
+            clase__gestion__in=gestiones
+        )
+    }
+    notas = (
+        NotaMateria.objects.filter(horario__clase__gestion__in=gestiones)
+        .order_by("id")
+        .values_list("alumno_id", "horario_id", *CAMPOS_NOTA)
+        .iterator(chunk_size=tamano_lote)
+    )
+    while lote := list(islice(notas, tamano_lote)):
+        pares = [(alumno_id, horarios[horario_id]) for alumno_id, horario_id, *_ in lote]
+        X = extraer_features(pares)
+        yield pd.DataFrame(
+            {
+                "alumno_id": [alumno_id for alumno_id, _ in pares],
+                "clase_id": [horario.clase_id for _, horario in pares],
+                "materia_id": [horario.profesor_materia.materia_id for _, horario in pares],
+                "gestion_id": [horario.clase.gestion_id for _, horario in pares],
+                **{nombre: X[:, i] for i, nombre in enumerate(FEATURES)},
+                "promedio_final": [
+                    NotaMateria(**dict(zip(CAMPOS_NOTA, notas_fila))).promedio
+                    for _, _, *notas_fila in lote
+                ],
+            },
+            columns=COLUMNAS,
+        )
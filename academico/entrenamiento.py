@@ -0,0 +1,75 @@
+"""
+Entrenamiento del modelo de rendimiento (comando `train_rendimiento`).
+
+Toma el dataset de academico.dataset, evalúa el estimador con validación
+cruzada repartida en todos los núcleos y lo ajusta con todas las filas. La
+metadata que se guarda junto al artefacto permite comparar versiones y
+verificar que el modelo nuevo espera las mismas features.
+"""
+import time
+import uuid
+
+import numpy as np
+import pandas as pd
+import sklearn
+from django.utils import timezone
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.model_selection import KFold, cross_validate
+
+from .dataset import lotes_dataset
+from .features import FEATURES
+
+OBJETIVO = "promedio_final"
+
+
+def cargar_dataset(gestion_id=None, desde=None):
+    """Devuelve (X, y) sin las notas que aún no tienen promedio."""
+    lotes = list(lotes_dataset(gestion_id, desde))
+    if not lotes:
+        return np.empty((0, len(FEATURES))), np.empty(0)
+    dataset = pd.concat(lotes, ignore_index=True).dropna(subset=[OBJETIVO])
+    return dataset[list(FEATURES)].to_numpy(dtype=float), dataset[OBJETIVO].to_numpy(dtype=float)
+
+
+def entrenar(X, y, folds=5, arboles=100, profundidad=None, semilla=0):
+    """Valida y ajusta un RandomForestRegressor. Devuelve (modelo, metadata)."""
+    # Los folds se reparten entre núcleos; el modelo final predice con n_jobs=1
+    # porque se llama desde los workers web, de a pocas filas por petición.
+    modelo = RandomForestRegressor(
+        n_estimators=arboles, max_depth=profundidad, random_state=semilla, n_jobs=1
+    )
+    inicio = time.perf_counter()
+    validacion = cross_validate(
+        modelo,
+        X,
+        y,
+        cv=KFold(n_splits=folds, shuffle=True, random_state=semilla),
+        scoring=("neg_mean_absolute_error", "r2"),
+        n_jobs=-1,
+    )
+    modelo.fit(X, y)
+    segundos = time.perf_counter() - inicio
+
+    mae = -validacion["test_neg_mean_absolute_error"]
+    r2 = validacion["test_r2"]
+    ahora = timezone.now()
+    metadata = {
+        # Ordenable por fecha; el sufijo evita que dos entrenamientos del mismo segundo choquen
+        "version": f"{ahora:%Y%m%d-%H%M%S}-{uuid.uuid4().hex[:6]}",
+        "creado": ahora.isoformat(),
+        "features": list(FEATURES),
+        "objetivo": OBJETIVO,
+        "estimador": type(modelo).__name__,
+        "parametros": {"n_estimators": arboles, "max_depth": profundidad, "random_state": semilla},
+        "sklearn": sklearn.__version__,
+        "filas": int(len(X)),
+        "folds": folds,
+        "metricas": {
+            "mae": float(mae.mean()),
+            "mae_std": float(mae.std()),
+            "r2": float(r2.mean()),
+            "r2_std": float(r2.std()),
+        },
+        "segundos_entrenamiento": round(segundos, 3),
+    }
+    return modelo, metadata
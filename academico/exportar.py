@@ -0,0 +1,92 @@
+"""
+Exportación en streaming de asistencias y calificaciones.
+
+Cada recurso se lee con .values() (filas planas, sin serializers anidados) y
+.iterator(chunk_size=...), que en PostgreSQL usa un cursor del lado del
+servidor: la memoria del proceso no depende de cuántas filas se exporten.
+"""
+import csv
+import json
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+
+from asistencia.models import Asistencia
+from evaluaciones.models import EntregaTarea, ResultadoExamen
+from .models import NotaMateria
+
+# recurso -> (modelo, ruta hasta la clase, columnas)
+RECURSOS = {
+    'asistencias': (
+        Asistencia,
+        'horario__clase',
+        ['id', 'alumno_id', 'horario_id', 'fecha', 'estado'],
+    ),
+    'notas': (
+        NotaMateria,
+        'horario__clase',
+        ['id', 'alumno_id', 'horario_id', 'nota_ser', 'nota_saber', 'nota_hacer', 'nota_decidir'],
+    ),
+    'entregas': (
+        EntregaTarea,
+        'tarea__clase',
+        ['id', 'alumno_id', 'tarea_id', 'fecha_entrega', 'nota', 'estado'],
+    ),
+    'resultados': (
+        ResultadoExamen,
+        'examen__clase',
+        ['id', 'alumno_id', 'examen_id', 'nota', 'estado'],
+    ),
+}
+
+FORMATOS = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+def _ruta_materia(ruta_clase):
+    # horario__clase -> horario__profesor_materia__materia (Tarea y Examen también tienen profesor_materia)
+    return ruta_clase.replace('clase', 'profesor_materia__materia')
+
+
+def filas(recurso, gestion_id=None, clase_id=None, materia_id=None):
+    """Devuelve (columnas, iterador de tuplas) del recurso, filtrado y ordenado por id."""
+    modelo, ruta_clase, campos = RECURSOS[recurso]
+    columnas = campos + ['clase_id', 'gestion_id', 'materia']
+    queryset = modelo.objects.all()
+    if gestion_id is not None:
+        queryset = queryset.filter(**{f'{ruta_clase}__gestion_id': gestion_id})
+    if clase_id is not None:
+        queryset = queryset.filter(**{f'{ruta_clase}_id': clase_id})
+    if materia_id is not None:
+        queryset = queryset.filter(**{f'{_ruta_materia(ruta_clase)}_id': materia_id})
+    queryset = queryset.order_by('id').values_list(
+        *campos,
+        f'{ruta_clase}_id',
+        f'{ruta_clase}__gestion_id',
+        f'{_ruta_materia(ruta_clase)}__nombre',
+    )
+    # La consulta corre mientras se envía la respuesta, ya fuera de la vista: se fija
+    # ahora la base que elige el router (la réplica, si la vista lee de ella)
+    queryset = queryset.using(queryset.db)
+    return columnas, queryset.iterator(chunk_size=settings.EXPORTACION_CHUNK)
+
+
+class _Eco:
+    """Pseudo-archivo para csv.writer: devuelve la línea en lugar de guardarla."""
+
+    def write(self, valor):
+        return valor
+
+
+def como_csv(columnas, iterador):
+    escritor = csv.writer(_Eco())
+    yield escritor.writerow(columnas)
+    for fila in iterador:
+        yield escritor.writerow(fila)
+
+
+def como_ndjson(columnas, iterador):
+    for fila in iterador:
+        yield json.dumps(dict(zip(columnas, fila)), cls=DjangoJSONEncoder) + '\n'
@@ -0,0 +1,66 @@
+"""
+Extracción de features para el modelo de rendimiento.
+
+Calcula la matriz [promedio_examenes, promedio_tareas, asistencia_pct] de un
+conjunto de pares (alumno, horario) con un número constante de consultas
+agrupadas, en lugar de cuatro consultas por par. Los promedios se leen de
+PromedioEvaluaciones y la asistencia de AsistenciaResumen, sin recorrer las
+notas ni los registros diarios. Los pares sin fila de resumen (registros
+anteriores a la tabla, o cargados sin reconstruir_resumen_asistencia) se
+cuentan desde Asistencia con una consulta agrupada más.
+"""
+import numpy as np
+
+from asistencia.models import AsistenciaResumen
+from asistencia.resumen import contar
+from evaluaciones.models import PromedioEvaluaciones
+
+FEATURES = ("promedio_examenes", "promedio_tareas", "asistencia_pct")
+
+
+def extraer_features(pares):
+    """
+    Devuelve un ndarray de forma (len(pares), 3) alineado con `pares`.
+
+    pares: lista de tuplas (alumno_id, horario). Del horario solo se usan
+    id, clase_id y profesor_materia_id, así que no hace falta select_related.
+    """
+    X = np.zeros((len(pares), len(FEATURES)))
+    if not pares:
+        return X
+
+    alumnos_ids = {alumno_id for alumno_id, _ in pares}
+    horarios = {horario.id: horario for _, horario in pares}
+    clases_ids = {horario.clase_id for horario in horarios.values()}
+    asignaciones_ids = {horario.profesor_materia_id for horario in horarios.values()}
+
+    promedios = {
+        (p.alumno_id, p.clase_id, p.profesor_materia_id): p
+        for p in PromedioEvaluaciones.objects.filter(
+            alumno_id__in=alumnos_ids,
+            clase_id__in=clases_ids,
+            profesor_materia_id__in=asignaciones_ids,
+        )
+    }
+
+    asistencias = {
+        (alumno_id, horario_id): (total, presentes)
+        for alumno_id, horario_id, total, presentes in AsistenciaResumen.objects.filter(
+            alumno_id__in=alumnos_ids, horario_id__in=horarios.keys()
+        ).values_list("alumno_id", "horario_id", "total", "presentes")
+    }
+
+    sin_resumen = {(horario.id, alumno_id) for alumno_id, horario in pares} - {
+        (horario_id, alumno_id) for alumno_id, horario_id in asistencias
+    }
+    for (horario_id, alumno_id), fila in contar(sin_resumen).items():
+        asistencias[(alumno_id, horario_id)] = (fila["total"], fila["presentes"])
+
+    for i, (alumno_id, horario) in enumerate(pares):
+        promedio = promedios.get((alumno_id, horario.clase_id, horario.profesor_materia_id))
+        total, presentes = asistencias.get((alumno_id, horario.id), (0, 0))
+        if promedio is not None:
+            X[i, 0] = promedio.promedio_examenes
+            X[i, 1] = promedio.promedio_tareas
+        X[i, 2] = presentes / total if total else 0
+    return X
@@ -0,0 +1,53 @@
+"""
+Resolución de la gestión actual con caché compartida.
+
+La gestión actual es la última por (anio, trimestre). Casi todas las vistas la
+necesitan y cambia pocas veces por año, así que se guarda en la cache de Django
+durante GESTION_ACTUAL_TTL segundos. GestionViewSet la invalida al escribir y,
+como la cache la comparten todos los workers, ninguno sigue usando la anterior.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.exceptions import NotFound
+
+from .models import Gestion
+
+CLAVE = "gestion_actual"
+
+
+def gestion_actual():
+    """La gestión más reciente. Lanza Gestion.DoesNotExist si no hay ninguna."""
+    gestion = cache.get(CLAVE)
+    if gestion is None:
+        gestion = Gestion.objects.latest("anio", "trimestre")
+        cache.set(CLAVE, gestion, settings.GESTION_ACTUAL_TTL)
+    return gestion
+
+
+def invalidar_gestion_actual():
+    cache.delete(CLAVE)
+
+
+def resolver_gestion(gestion_id=None):
+    """
+    La gestión `gestion_id` o, si no se indica, la actual.
+
+    Lanza NotFound (404 en las vistas de DRF) si no existe.
+    """
+    if not gestion_id:
+        try:
+            return gestion_actual()
+        except Gestion.DoesNotExist:
+            raise NotFound("No hay gestiones registradas.")
+
+    try:
+        actual = gestion_actual()
+    except Gestion.DoesNotExist:
+        actual = None
+    if actual is not None and str(actual.pk) == str(gestion_id):
+        return actual
+
+    try:
+        return Gestion.objects.get(pk=gestion_id)
+    except (Gestion.DoesNotExist, ValueError):
+        raise NotFound("Gestión no encontrada.")
@@ -0,0 +1,36 @@
+from django.core.cache import caches
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = (
+        "Muestra aciertos, fallos, escrituras, desalojos y ocupación de la cache compartida "
+        "(backend colegio_backend.cache.SQLiteCache), sumados entre todos los procesos."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--alias", default="default", help="Alias de CACHES")
+        parser.add_argument("--reiniciar", action="store_true", help="Poner los contadores en cero")
+
+    def handle(self, *args, **options):
+        cache = caches[options["alias"]]
+        if not hasattr(cache, "estadisticas"):
+            raise CommandError(f"El backend {type(cache).__name__} no lleva estadísticas.")
+
+        datos = cache.estadisticas()
+        self.stdout.write(
+            f"Aciertos: {datos['aciertos']}  Fallos: {datos['fallos']}  "
+            f"Tasa de aciertos: {datos['tasa_aciertos']:.1%}"
+        )
+        self.stdout.write(f"Escrituras: {datos['escrituras']}  Desalojos: {datos['desalojos']}")
+        self.stdout.write(
+            f"Entradas: {datos['entradas']}/{datos['max_entradas']}  "
+            f"Tamaño: {datos['bytes'] / 1024 / 1024:.1f}/{datos['max_bytes'] / 1024 / 1024:.0f} MB"
+        )
+        if datos["desalojos"] and datos["tasa_aciertos"] < 0.5:
+            self.stdout.write(
+                self.style.WARNING("Hay desalojos con pocos aciertos: conviene subir CACHE_MAX_ENTRADAS o CACHE_MAX_BYTES.")
+            )
+        if options["reiniciar"]:
+            cache.reiniciar_estadisticas()
+            self.stdout.write(self.style.SUCCESS("Contadores reiniciados."))
@@ -0,0 +1,68 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from academico.dataset import gestion_desde, lotes_dataset
+from colegio_backend.routers import en_replica
+
+
+class Command(BaseCommand):
+    help = (
+        "Exporta el dataset de entrenamiento del modelo de rendimiento (una fila por NotaMateria) "
+        "a CSV o Parquet, por lotes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--salida",
+            default="alumnos_rendimiento.csv",
+            help="Archivo de salida; la extensión (.csv o .parquet) define el formato",
+        )
+        parser.add_argument("--gestion", type=int, help="Exportar solo esta gestión (ID)")
+        parser.add_argument(
+            "--desde",
+            "--since",
+            type=gestion_desde,
+            help="Exportar desde esta gestión en adelante: ANIO o ANIO-TRIMESTRE (exportaciones incrementales)",
+        )
+        parser.add_argument("--lote", type=int, default=5000, help="Notas procesadas por lote")
+
+    def handle(self, *args, **options):
+        salida = options["salida"]
+        formato = os.path.splitext(salida)[1].lower()
+        if formato not in (".csv", ".parquet"):
+            raise CommandError("La salida debe terminar en .csv o .parquet.")
+        if formato == ".parquet":
+            try:
+                import pyarrow
+                import pyarrow.parquet
+            except ImportError:
+                raise CommandError("Para exportar a Parquet hay que instalar pyarrow.")
+
+        lotes = lotes_dataset(options["gestion"], options["desde"], tamano_lote=options["lote"])
+
+        inicio = time.perf_counter()
+        filas = 0
+        escritor = None
+        try:
+            with en_replica():  # lectura masiva: va a la réplica si existe
+                for i, df in enumerate(lotes):
+                    if formato == ".csv":
+                        df.to_csv(salida, mode="w" if i == 0 else "a", header=i == 0, index=False)
+                    else:
+                        tabla = pyarrow.Table.from_pandas(df, preserve_index=False)
+                        if escritor is None:
+                            escritor = pyarrow.parquet.ParquetWriter(salida, tabla.schema)
+                        escritor.write_table(tabla)
+                    filas += len(df)
+        finally:
+            if escritor is not None:
+                escritor.close()
+
+        if not filas:
+            self.stdout.write(self.style.WARNING("No hay notas para exportar con esos filtros."))
+            return
+        self.stdout.write(
+            self.style.SUCCESS(f"{filas} filas en {salida} ({time.perf_counter() - inicio:.2f}s)")
+        )
@@ -0,0 +1,70 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from academico.models import Gestion
+from academico.predicciones import recalcular_desactualizadas, recalcular_gestion
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula en bloque las predicciones de rendimiento (PrediccionRendimiento) de una gestión, "
+        "o solo las marcadas como desactualizadas con --pendientes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--gestion", type=int, help="ID de la gestión (por defecto la más reciente)")
+        parser.add_argument("--todas", action="store_true", help="Recalcular todas las gestiones")
+        parser.add_argument(
+            "--pendientes",
+            action="store_true",
+            help="Recalcular solo las predicciones desactualizadas por notas o asistencias nuevas",
+        )
+        parser.add_argument(
+            "--intervalo",
+            type=float,
+            help="Con --pendientes, repetir cada N segundos (worker). Las escrituras que llegan "
+                 "dentro de un mismo intervalo se recalculan una sola vez.",
+        )
+        parser.add_argument("--lote", type=int, default=5000, help="Pares puntuados por lote")
+
+    def handle(self, *args, **options):
+        if options["pendientes"]:
+            return self.recalcular_pendientes(options["lote"], options["intervalo"])
+
+        if options["todas"]:
+            gestiones = list(Gestion.objects.all())
+        elif options["gestion"]:
+            try:
+                gestiones = [Gestion.objects.get(pk=options["gestion"])]
+            except Gestion.DoesNotExist:
+                raise CommandError(f"Gestión {options['gestion']} no encontrada.")
+        else:
+            try:
+                gestiones = [Gestion.objects.latest("anio", "trimestre")]
+            except Gestion.DoesNotExist:
+                raise CommandError("No hay gestiones registradas.")
+
+        for gestion in gestiones:
+            inicio = time.perf_counter()
+            escritas = recalcular_gestion(gestion, tamano_lote=options["lote"])
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Gestión {gestion}: {escritas} predicciones en {time.perf_counter() - inicio:.2f}s"
+                )
+            )
+
+    def recalcular_pendientes(self, lote, intervalo):
+        while True:
+            inicio = time.perf_counter()
+            escritas = recalcular_desactualizadas(tamano_lote=lote)
+            if escritas or not intervalo:
+                self.stdout.write(
+                    self.style.SUCCESS(
+                        f"{escritas} predicciones desactualizadas recalculadas en "
+                        f"{time.perf_counter() - inicio:.2f}s"
+                    )
+                )
+            if not intervalo:
+                return
+            time.sleep(intervalo)
@@ -0,0 +1,105 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from academico.dataset import gestion_desde
+from academico.entrenamiento import cargar_dataset, entrenar
+from colegio_backend.routers import en_replica
+from utils.ml_model import (
+    activar_version,
+    cargar_artefacto,
+    guardar_version,
+    medir_latencia,
+    ruta_modelo,
+    usa_compilado,
+    version_activa,
+)
+from utils.modelo_compilado import ModeloCompilado
+
+FILAS_LATENCIA = 1000
+
+
+class Command(BaseCommand):
+    help = (
+        "Entrena el modelo de rendimiento con los datos de la base, lo guarda como una versión nueva "
+        "del registro (MODELOS_DIR) y la activa si no es más lenta que la activa."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--gestion", type=int, help="Entrenar solo con esta gestión (ID)")
+        parser.add_argument(
+            "--desde",
+            "--since",
+            type=gestion_desde,
+            help="Entrenar con esta gestión y las posteriores: ANIO o ANIO-TRIMESTRE",
+        )
+        parser.add_argument("--folds", type=int, default=5, help="Particiones de la validación cruzada")
+        parser.add_argument("--arboles", type=int, default=100)
+        parser.add_argument("--profundidad", type=int, help="Profundidad máxima de cada árbol")
+        parser.add_argument("--semilla", type=int, default=0)
+        parser.add_argument(
+            "--tolerancia",
+            type=float,
+            default=0.25,
+            help="Cuánto más lenta por fila (0.25 = 25%%) puede ser la versión nueva para activarla",
+        )
+        parser.add_argument("--forzar", action="store_true", help="Activar aunque sea más lenta")
+        parser.add_argument("--no-activar", action="store_true", help="Solo guardar la versión")
+
+    def handle(self, *args, **options):
+        with en_replica():
+            X, y = cargar_dataset(options["gestion"], options["desde"])
+        if len(X) < options["folds"]:
+            raise CommandError(f"Hay {len(X)} notas con promedio; no alcanzan para {options['folds']} folds.")
+
+        modelo, metadata = entrenar(
+            X,
+            y,
+            folds=options["folds"],
+            arboles=options["arboles"],
+            profundidad=options["profundidad"],
+            semilla=options["semilla"],
+        )
+        metricas = metadata["metricas"]
+        self.stdout.write(
+            f"{metadata['filas']} filas, {metadata['folds']} folds: MAE {metricas['mae']:.2f} ± {metricas['mae_std']:.2f}, "
+            f"R² {metricas['r2']:.3f} ± {metricas['r2_std']:.3f} ({metadata['segundos_entrenamiento']:.1f}s)"
+        )
+
+        # La latencia se mide sobre lo que usaría predict_batch con un lote de ese tamaño:
+        # la versión NumPy hasta ML_COMPILADO_MAX_FILAS filas, sklearn con más
+        muestra = X[:FILAS_LATENCIA]
+        compilado = usa_compilado(len(muestra))
+        servido = modelo
+        if compilado:
+            try:
+                servido = ModeloCompilado.desde_modelo(modelo)
+            except ValueError:
+                pass
+        metadata["compilado"] = servido is not modelo
+        metadata["latencia_us_por_fila"] = round(medir_latencia(servido, muestra), 3)
+        activar = not options["no_activar"]
+        anterior = version_activa()
+        if os.path.exists(ruta_modelo()):
+            latencia_activa = medir_latencia(cargar_artefacto(ruta_modelo(compilado)), muestra)
+            metadata["latencia_activa_us_por_fila"] = round(latencia_activa, 3)
+            self.stdout.write(
+                f"Latencia: {metadata['latencia_us_por_fila']:.1f} µs/fila "
+                f"(activa {anterior or 'sin versión'}: {latencia_activa:.1f} µs/fila)"
+            )
+            if metadata["latencia_us_por_fila"] > latencia_activa * (1 + options["tolerancia"]):
+                if options["forzar"]:
+                    self.stdout.write(self.style.WARNING("La versión nueva es más lenta; se activa por --forzar."))
+                else:
+                    activar = False
+                    self.stdout.write(
+                        self.style.WARNING("La versión nueva es más lenta que la activa; no se activa (use --forzar).")
+                    )
+
+        version = guardar_version(modelo, metadata)
+        if activar:
+            activar_version(version)
+            self.stdout.write(self.style.SUCCESS(f"Versión {version} guardada y activada."))
+            self.stdout.write("Las predicciones guardadas son del modelo anterior: recalcular_predicciones --todas.")
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Versión {version} guardada sin activar."))
@@ -113,3 +113,12 @@ class NotaMateria(models.Model):
 
     def __str__(self):
         return f"{self.alumno.usuario.username} - {self.horario.profesor_materia.materia.nombre} ({self.horario.clase})"
+
+
+class VersionDatos(models.Model):
+    """
+    Fila única (pk=1) con un contador que sube en cada transacción que cambia
+    datos visibles en los dashboards. Las respuestas cacheadas se guardan con
+    la versión con la que se calcularon (academico.cache_respuestas).
+    """
+    version = models.PositiveBigIntegerField(default=0)
@@ -0,0 +1,286 @@
+"""
+Predicciones de rendimiento materializadas en usuarios.PrediccionRendimiento.
+
+Los dashboards leen de la tabla y solo puntúan en vivo los pares cuya fila
+falta, está vencida o fue marcada como desactualizada; el recálculo completo
+de una gestión, o solo de las filas desactualizadas, lo hace el comando
+`recalcular_predicciones`.
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+import numpy as np
+from django.conf import settings
+from django.db import router
+from django.db.models import F, Q
+from django.utils import timezone
+
+from asistencia.models import Horario
+from colegio_backend.transacciones import pendiente
+from evaluaciones.models import Examen, Tarea
+from usuarios.models import PrediccionRendimiento
+from utils.ml_model import predecir_categorias
+from .cache_respuestas import marcar_cambio
+from .features import FEATURES, extraer_features
+from .models import Inscripcion
+
+
+def clave_prediccion(alumno_id, horario):
+    """(alumno, materia, gestion) de un par. El horario debe traer profesor_materia y clase."""
+    return (alumno_id, horario.profesor_materia.materia_id, horario.clase.gestion_id)
+
+
+def calcular_predicciones(pares):
+    """Puntúa en vivo una lista de pares (alumno_id, horario). No guarda nada."""
+    X = extraer_features(pares)
+    scores, categorias = predecir_categorias(X)
+    # Un clasificador con clases de texto no da un score numérico
+    numericos = np.asarray(scores).dtype.kind in 'iuf'
+
+    predicciones = []
+    for (alumno_id, horario), fila, score, categoria in zip(pares, X, scores, categorias):
+        alumno_id, materia_id, gestion_id = clave_prediccion(alumno_id, horario)
+        detalles = dict(zip(FEATURES, map(float, fila)))
+        detalles["horario_id"] = horario.id
+        predicciones.append(
+            PrediccionRendimiento(
+                alumno_id=alumno_id,
+                materia_id=materia_id,
+                gestion_id=gestion_id,
+                score=float(score) if numericos else None,
+                categoria=categoria,
+                detalles=detalles,
+            )
+        )
+    return predicciones
+
+
+def guardar_predicciones(predicciones, batch_size=1000):
+    """Upsert en bloque por (alumno, materia, gestion)."""
+    # Postgres no permite tocar dos veces la misma fila en un mismo INSERT ... ON CONFLICT
+    unicas = {(p.alumno_id, p.materia_id, p.gestion_id): p for p in predicciones}
+    PrediccionRendimiento.objects.bulk_create(
+        unicas.values(),
+        batch_size=batch_size,
+        update_conflicts=True,
+        unique_fields=["alumno", "materia", "gestion"],
+        update_fields=["score", "categoria", "detalles", "fecha_prediccion", "desactualizada"],
+    )
+    return len(unicas)
+
+
+def _filtro_claves(claves):
+    """Q que selecciona las filas de las claves (alumno, materia, gestion), agrupadas por materia y gestión."""
+    alumnos_por_grupo = defaultdict(set)
+    for alumno_id, materia_id, gestion_id in claves:
+        alumnos_por_grupo[(materia_id, gestion_id)].add(alumno_id)
+    filtro = Q()
+    for (materia_id, gestion_id), alumnos_ids in alumnos_por_grupo.items():
+        filtro |= Q(materia_id=materia_id, gestion_id=gestion_id, alumno_id__in=alumnos_ids)
+    return filtro
+
+
+def _marcas(claves):
+    """{clave: (id, marcas)} de las filas existentes, leídas de la primaria (no de la réplica)."""
+    if not claves:
+        return {}
+    filas = PrediccionRendimiento.objects.using(router.db_for_write(PrediccionRendimiento))
+    return {
+        (alumno_id, materia_id, gestion_id): (prediccion_id, marcas)
+        for prediccion_id, alumno_id, materia_id, gestion_id, marcas in filas.filter(
+            _filtro_claves(claves)
+        ).values_list("id", "alumno_id", "materia_id", "gestion_id", "marcas")
+    }
+
+
+def calcular_y_guardar(pares):
+    """
+    calcular_predicciones + guardar_predicciones sin perder invalidaciones.
+
+    El upsert deja desactualizada=False. Si una nota o asistencia se confirma
+    entre la lectura de las features y el upsert, su marca sube `marcas` pero
+    el upsert la borraría: las filas cuyo contador cambió se vuelven a marcar.
+    Devuelve (predicciones, filas escritas).
+    """
+    claves = {clave_prediccion(alumno_id, horario) for alumno_id, horario in pares}
+    antes = _marcas(claves)
+    predicciones = calcular_predicciones(pares)
+    escritas = guardar_predicciones(predicciones)
+    # Una fila nueva no tenía marcas que perder: marcar una clave sin fila no hace nada
+    remarcar = [
+        prediccion_id
+        for clave, (prediccion_id, marcas) in _marcas(antes.keys()).items()
+        if marcas != antes[clave][1]
+    ]
+    if remarcar:
+        PrediccionRendimiento.objects.filter(id__in=remarcar).update(desactualizada=True)
+    return predicciones, escritas
+
+
+def obtener_predicciones(pares):
+    """
+    Devuelve una PrediccionRendimiento por par, alineada con `pares`.
+
+    Lee las filas vigentes en una sola consulta; las que faltan, superan
+    PREDICCIONES_VIGENCIA o están desactualizadas se calculan en vivo y se guardan.
+    """
+    claves = [clave_prediccion(alumno_id, horario) for alumno_id, horario in pares]
+    if not claves:
+        return []
+
+    limite = timezone.now() - timedelta(seconds=settings.PREDICCIONES_VIGENCIA)
+    alumnos_ids, materias_ids, gestiones_ids = (set(c) for c in zip(*claves))
+    vigentes = {
+        (p.alumno_id, p.materia_id, p.gestion_id): p
+        for p in PrediccionRendimiento.objects.filter(
+            alumno_id__in=alumnos_ids,
+            materia_id__in=materias_ids,
+            gestion_id__in=gestiones_ids,
+            fecha_prediccion__gte=limite,
+            desactualizada=False,
+        )
+    }
+
+    faltantes = {}
+    for par, clave in zip(pares, claves):
+        if clave not in vigentes:
+            faltantes.setdefault(clave, par)
+    if faltantes:
+        nuevas, _ = calcular_y_guardar(list(faltantes.values()))
+        vigentes.update(zip(faltantes.keys(), nuevas))
+
+    return [vigentes[clave] for clave in claves]
+
+
+def pares_de_gestion(gestion):
+    """Todos los pares (alumno_id, horario) de los alumnos inscritos en la gestión."""
+    horarios_por_clase = defaultdict(list)
+    for horario in (
+        Horario.objects.filter(clase__gestion=gestion)
+        .select_related("profesor_materia", "clase")
+        .order_by("id")
+    ):
+        horarios_por_clase[horario.clase_id].append(horario)
+
+    inscripciones = Inscripcion.objects.filter(clase__gestion=gestion).values_list(
+        "alumno_id", "clase_id"
+    )
+    return [
+        (alumno_id, horario)
+        for alumno_id, clase_id in inscripciones
+        for horario in horarios_por_clase[clase_id]
+    ]
+
+
+def recalcular_gestion(gestion, tamano_lote=5000):
+    """Recalcula y guarda todas las predicciones de una gestión. Devuelve cuántas filas escribió."""
+    pares = pares_de_gestion(gestion)
+    escritas = 0
+    for inicio in range(0, len(pares), tamano_lote):
+        escritas += calcular_y_guardar(pares[inicio:inicio + tamano_lote])[1]
+    return escritas
+
+
+def recalcular_desactualizadas(tamano_lote=5000):
+    """
+    Recalcula las filas marcadas como desactualizadas. Devuelve cuántas escribió.
+
+    Recorre la cola una vez, por id: lo que se marque mientras tanto queda para la
+    siguiente llamada (el comando la repite cada --intervalo segundos).
+    """
+    escritas = 0
+    ultimo_id = 0
+    while True:
+        filas = list(
+            PrediccionRendimiento.objects.filter(desactualizada=True, id__gt=ultimo_id)
+            .order_by("id")
+            .values_list("id", "alumno_id", "materia_id", "gestion_id", "detalles")[:tamano_lote]
+        )
+        if not filas:
+            return escritas
+        ultimo_id = filas[-1][0]
+        horarios = Horario.objects.select_related("profesor_materia", "clase").in_bulk(
+            {(detalles or {}).get("horario_id") for *_, detalles in filas}
+        )
+        pares, huerfanas = [], []
+        for prediccion_id, alumno_id, materia_id, gestion_id, detalles in filas:
+            horario = horarios.get((detalles or {}).get("horario_id"))
+            # Con un horario que ya no es de esa materia y gestión se escribiría otra fila y esta seguiría sucia
+            if horario is None or clave_prediccion(alumno_id, horario) != (alumno_id, materia_id, gestion_id):
+                huerfanas.append(prediccion_id)
+            else:
+                pares.append((alumno_id, horario))
+        # No hay con qué recalcularlas; el dashboard la regenerará si vuelve a pedirla
+        PrediccionRendimiento.objects.filter(id__in=huerfanas).delete()
+        escritas += calcular_y_guardar(pares)[1]
+
+
+# --- Invalidación incremental -------------------------------------------------
+#
+# Las escrituras de notas y asistencias registran (alumno, horario|tarea|examen)
+# en un único _Marcas por transacción (colegio_backend.transacciones). Al
+# confirmarse se resuelven todas a (alumno, materia, gestion) y se marcan con un
+# único UPDATE, de modo que 30 asistencias guardadas en una misma petición dejan
+# una sola fila sucia por alumno. Si la transacción se revierte, sus marcas se descartan.
+
+class _Marcas:
+    def __init__(self):
+        self.horarios = set()
+        self.tareas = set()
+        self.examenes = set()
+
+    def __call__(self):
+        claves = (
+            _resolver(Horario, self.horarios)
+            | _resolver(Tarea, self.tareas)
+            | _resolver(Examen, self.examenes)
+        )
+        marcar_desactualizadas(claves)
+
+
+def _marcar(conjunto, par):
+    with pendiente(_Marcas) as marcas:
+        getattr(marcas, conjunto).add(par)
+    marcar_cambio()
+
+
+def marcar_horario(alumno_id, horario_id):
+    _marcar("horarios", (alumno_id, horario_id))
+
+
+def marcar_tarea(alumno_id, tarea_id):
+    _marcar("tareas", (alumno_id, tarea_id))
+
+
+def marcar_examen(alumno_id, examen_id):
+    _marcar("examenes", (alumno_id, examen_id))
+
+
+def _resolver(modelo, pares):
+    """(alumno, objeto_id) -> {(alumno, materia, gestion)} con una consulta por modelo."""
+    if not pares:
+        return set()
+    claves_objeto = {
+        objeto_id: (materia_id, gestion_id)
+        for objeto_id, materia_id, gestion_id in modelo.objects.filter(
+            id__in={objeto_id for _, objeto_id in pares}
+        ).values_list("id", "profesor_materia__materia_id", "clase__gestion_id")
+    }
+    return {
+        (alumno_id, *claves_objeto[objeto_id])
+        for alumno_id, objeto_id in pares
+        if objeto_id in claves_objeto
+    }
+
+
+def marcar_desactualizadas(claves):
+    """
+    Marca como desactualizadas las predicciones de las claves (alumno, materia, gestion).
+
+    Sube `marcas` aunque la fila ya estuviera marcada: un recálculo en curso lo compara.
+    """
+    if not claves:
+        return 0
+    return PrediccionRendimiento.objects.filter(_filtro_claves(claves)).update(
+        desactualizada=True, marcas=F("marcas") + 1
+    )
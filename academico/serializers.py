@@ -81,6 +81,11 @@ class InscripcionSerializer(serializers.ModelSerializer):
     def get_promedio(self, obj):
         return obj.promedio
 
+
+class NotasInscripcionSerializer(serializers.Serializer):
+    """Una fila de get_notas_by_alumno: {"inscripcion": {...}}."""
+    inscripcion = InscripcionSerializer(source='*', read_only=True)
+
 # NotaMateria
 class NotaMateriaSerializer(serializers.ModelSerializer):
     promedio = serializers.SerializerMethodField(read_only=True)
@@ -0,0 +1,49 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from asistencia.models import Asistencia, Horario, HorarioDia, Periodo
+from asistencia.resumen import marcar_resumen
+from evaluaciones.models import EntregaTarea, Examen, ResultadoExamen, Tarea
+from usuarios.models import Tutoria
+from .cache_respuestas import marcar_cambio
+from .models import AsignacionProfesorMateria, Clase, Gestion, Inscripcion, Materia, NotaMateria
+from .predicciones import marcar_examen, marcar_horario, marcar_tarea
+
+
+@receiver([post_save, post_delete], sender=Asistencia)
+@receiver([post_save, post_delete], sender=NotaMateria)
+def invalidar_por_horario(sender, instance, **kwargs):
+    marcar_horario(instance.alumno_id, instance.horario_id)
+
+
+@receiver([post_save, post_delete], sender=Asistencia)
+def actualizar_resumen_asistencia(sender, instance, **kwargs):
+    # registro.guardar_asistencias escribe con bulk_create y actualiza el resumen por su cuenta
+    marcar_resumen(instance.horario_id, instance.alumno_id)
+
+
+@receiver([post_save, post_delete], sender=EntregaTarea)
+def invalidar_por_tarea(sender, instance, **kwargs):
+    marcar_tarea(instance.alumno_id, instance.tarea_id)
+
+
+@receiver([post_save, post_delete], sender=ResultadoExamen)
+def invalidar_por_examen(sender, instance, **kwargs):
+    marcar_examen(instance.alumno_id, instance.examen_id)
+
+
+# Notas y asistencias suben la versión de datos desde marcar_*; el resto de lo
+# que muestran los dashboards se escribe poco y se vigila aquí.
+@receiver([post_save, post_delete], sender=Tarea)
+@receiver([post_save, post_delete], sender=Examen)
+@receiver([post_save, post_delete], sender=Horario)
+@receiver([post_save, post_delete], sender=HorarioDia)
+@receiver([post_save, post_delete], sender=Periodo)
+@receiver([post_save, post_delete], sender=Inscripcion)
+@receiver([post_save, post_delete], sender=Tutoria)
+@receiver([post_save, post_delete], sender=Gestion)
+@receiver([post_save, post_delete], sender=Clase)
+@receiver([post_save, post_delete], sender=Materia)
+@receiver([post_save, post_delete], sender=AsignacionProfesorMateria)
+def invalidar_respuestas(sender, **kwargs):
+    marcar_cambio()
@@ -1,3 +1,574 @@
-from django.test import TestCase
+import io
+import json
+import os
+import tempfile
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+import pandas as pd
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from asistencia.models import Asistencia, AsistenciaResumen, Horario
+from evaluaciones.models import PromedioEvaluaciones
+from usuarios.models import Alumno, Notificacion, PrediccionRendimiento, Profesor, Usuario
+from utils import ml_model
+from .entrenamiento import entrenar
+from .features import FEATURES, extraer_features
+from .gestiones import gestion_actual
+from . import predicciones
+from .predicciones import marcar_horario, obtener_predicciones
+from .models import AsignacionProfesorMateria, Clase, Curso, Gestion, Inscripcion, Materia, NotaMateria
+
+
+class RegistrarNotasTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = Usuario.objects.create_user('prof', 'clave', correo='prof@colegio.bo')
+        profesor = Profesor.objects.create(usuario=cls.usuario, especialidad='Ciencias')
+        clase = Clase.objects.create(
+            curso=Curso.objects.create(curso=1),
+            gestion=Gestion.objects.create(anio=2025, trimestre=1),
+        )
+        asignacion = AsignacionProfesorMateria.objects.create(
+            profesor=profesor, materia=Materia.objects.create(nombre='Física')
+        )
+        cls.horario = Horario.objects.create(clase=clase, profesor_materia=asignacion)
+        cls.alumnos = []
+        for i in range(30):
+            alumno = Alumno.objects.create(
+                usuario=Usuario.objects.create(username=f'alumno{i}', correo=f'a{i}@colegio.bo')
+            )
+            Inscripcion.objects.create(alumno=alumno, clase=clase)
+            cls.alumnos.append(alumno)
+        cls.no_inscrito = Alumno.objects.create(
+            usuario=Usuario.objects.create(username='otro', correo='otro@colegio.bo')
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.usuario)
+
+    def registrar(self, calificaciones):
+        return self.client.post(
+            reverse('registrar-notas', args=[self.horario.id]),
+            {'calificaciones': calificaciones},
+            format='json',
+        )
+
+    def test_resultados_por_fila(self):
+        primero, segundo = self.alumnos[:2]
+        NotaMateria.objects.create(alumno=primero, horario=self.horario, nota_saber=10)
+        Usuario.objects.filter(alumno=segundo).update(fb_token='token-segundo')
+
+        respuesta = self.registrar([
+            {'alumno': primero.id, 'nota_saber': 80, 'nota_hacer': 70},
+            {'alumno': segundo.id, 'nota_saber': '90.5', 'nota_hacer': 90, 'nota_ser': 100, 'nota_decidir': 100},
+        ])
+
+        self.assertEqual(respuesta.status_code, 200)
+        resultados = {r['alumno']: r for r in respuesta.data['resultados']}
+        self.assertFalse(resultados[primero.id]['created'])
+        self.assertTrue(resultados[segundo.id]['created'])
+        self.assertEqual(resultados[primero.id]['promedio'], 75.0)
+        self.assertEqual(resultados[segundo.id]['nota_saber'], '90.50')
+        nota = NotaMateria.objects.get(alumno=primero, horario=self.horario)
+        self.assertEqual((nota.nota_saber, nota.nota_hacer, nota.nota_ser), (80, 70, None))
+        # La notificación queda en el outbox; no se envía durante la petición
+        self.assertEqual(Notificacion.objects.get().tokens, ['token-segundo'])
+
+    def test_payload_invalido_no_escribe_nada(self):
+        respuesta = self.registrar([
+            {'alumno': self.alumnos[0].id, 'nota_saber': 80},
+            {'alumno': self.alumnos[1].id, 'nota_saber': 101},
+            {'alumno': self.no_inscrito.id, 'nota_saber': 50},
+        ])
+
+        self.assertEqual(respuesta.status_code, 400)
+        self.assertEqual(
+            [e['alumno'] for e in respuesta.data['errores']], [self.alumnos[1].id, self.no_inscrito.id]
+        )
+        self.assertFalse(NotaMateria.objects.exists())
+
+    def test_consultas_no_dependen_del_tamano(self):
+        def consultas(alumnos):
+            calificaciones = [{'alumno': a.id, 'nota_saber': 60, 'nota_hacer': 70} for a in alumnos]
+            with CaptureQueriesContext(connection) as capturadas:
+                self.assertEqual(self.registrar(calificaciones).status_code, 200)
+            return len(capturadas)
+
+        self.assertEqual(consultas(self.alumnos[:3]), consultas(self.alumnos[3:]))
+
+    def test_alumnos_del_horario_por_cursor(self):
+        respuesta = self.client.get(reverse('alumnos-by-horario', args=[self.horario.id]), {'page_size': 20})
+        ids = []
+        while True:
+            self.assertLessEqual(len(respuesta.data['results']), 20)
+            ids += [a['id'] for a in respuesta.data['results']]
+            if not respuesta.data['next']:
+                break
+            respuesta = self.client.get(respuesta.data['next'])
+        self.assertCountEqual(ids, [a.id for a in self.alumnos])
+
+
+class ExtraerFeaturesTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        profesor = Profesor.objects.create(
+            usuario=Usuario.objects.create(username='prof', correo='prof@colegio.bo'), especialidad='Ciencias'
+        )
+        cls.clase = Clase.objects.create(
+            curso=Curso.objects.create(curso=1),
+            gestion=Gestion.objects.create(anio=2025, trimestre=1),
+        )
+        cls.fisica, cls.quimica = (
+            Horario.objects.create(
+                clase=cls.clase,
+                profesor_materia=AsignacionProfesorMateria.objects.create(
+                    profesor=profesor, materia=Materia.objects.create(nombre=nombre)
+                ),
+            )
+            for nombre in ('Física', 'Química')
+        )
+        cls.alumnos = [
+            Alumno.objects.create(usuario=Usuario.objects.create(username=f'alumno{i}', correo=f'a{i}@colegio.bo'))
+            for i in range(3)
+        ]
+        completo, solo_notas, solo_asistencia = cls.alumnos
+        # Registros sin fila de resumen: se cuentan desde Asistencia
+        for dia, estado in enumerate(['Presente', 'Presente', 'Ausente', 'Justificado'], start=1):
+            Asistencia.objects.create(horario=cls.quimica, alumno=solo_notas, fecha=f'2025-03-{dia:02}', estado=estado)
+        PromedioEvaluaciones.objects.create(
+            alumno=completo, clase=cls.clase, profesor_materia=cls.fisica.profesor_materia,
+            examenes_suma=140, examenes_cantidad=2, tareas_suma=90, tareas_cantidad=1,
+        )
+        PromedioEvaluaciones.objects.create(
+            alumno=solo_notas, clase=cls.clase, profesor_materia=cls.fisica.profesor_materia,
+            examenes_suma=0, examenes_cantidad=0, tareas_suma=165, tareas_cantidad=3,
+        )
+        AsistenciaResumen.objects.create(horario=cls.fisica, alumno=completo, total=4, presentes=3, ausentes=1)
+        AsistenciaResumen.objects.create(horario=cls.fisica, alumno=solo_asistencia, total=5, presentes=1, ausentes=4)
+
+    def test_valores_calculados_a_mano(self):
+        completo, solo_notas, solo_asistencia = self.alumnos
+        pares = [
+            (completo.id, self.fisica),
+            (solo_notas.id, self.fisica),
+            (solo_asistencia.id, self.fisica),
+            (solo_notas.id, self.quimica),  # asistencias sin resumen
+            (completo.id, self.quimica),  # sin filas de promedios ni de asistencia
+        ]
+        with self.assertNumQueries(3):
+            X = extraer_features(pares)
+        np.testing.assert_allclose(X, [
+            [70, 90, 0.75],
+            [0, 55, 0],
+            [0, 0, 0.2],
+            [0, 0, 0.5],
+            [0, 0, 0],
+        ])
+
+    def test_con_resumen_no_cuenta_asistencias(self):
+        with self.assertNumQueries(2):
+            extraer_features([(self.alumnos[0].id, self.fisica)])
+
+    def test_sin_pares(self):
+        with self.assertNumQueries(0):
+            self.assertEqual(extraer_features([]).shape, (0, len(FEATURES)))
+
+
+def _puntajes(X):
+    return np.full(len(X), 60.0), ['regular'] * len(X)
+
+
+class PrediccionesMaterializadasTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        profesor = Profesor.objects.create(
+            usuario=Usuario.objects.create(username='prof', correo='prof@colegio.bo'), especialidad='Ciencias'
+        )
+        cls.gestion = Gestion.objects.create(anio=2025, trimestre=1)
+        clase = Clase.objects.create(curso=Curso.objects.create(curso=1), gestion=cls.gestion)
+        otra_clase = Clase.objects.create(
+            curso=Curso.objects.create(curso=2), gestion=Gestion.objects.create(anio=2024, trimestre=3)
+        )
+        cls.horarios = [
+            Horario.objects.create(
+                clase=clase,
+                profesor_materia=AsignacionProfesorMateria.objects.create(
+                    profesor=profesor, materia=Materia.objects.create(nombre=nombre)
+                ),
+            )
+            for nombre in ('Física', 'Química')
+        ]
+        cls.alumnos = []
+        for i in range(4):
+            alumno = Alumno.objects.create(
+                usuario=Usuario.objects.create(username=f'alumno{i}', correo=f'a{i}@colegio.bo')
+            )
+            # El último está inscrito en otra gestión
+            Inscripcion.objects.create(alumno=alumno, clase=clase if i < 3 else otra_clase)
+            cls.alumnos.append(alumno)
+        cls.pares = [(alumno.id, horario) for alumno in cls.alumnos[:3] for horario in cls.horarios]
+
+    def setUp(self):
+        self.predecir = self.enterContext(
+            mock.patch('academico.predicciones.predecir_categorias', side_effect=_puntajes)
+        )
+
+    def test_vigentes_sin_llamar_al_modelo(self):
+        primeras = obtener_predicciones(self.pares)
+        self.assertEqual(self.predecir.call_count, 1)
+        with self.assertNumQueries(1):
+            segundas = obtener_predicciones(self.pares)
+        self.assertEqual(self.predecir.call_count, 1)
+        self.assertEqual([p.pk for p in segundas], [p.pk for p in primeras])
+
+    @override_settings(PREDICCIONES_VIGENCIA=60)
+    def test_vencidas_se_recalculan(self):
+        obtener_predicciones(self.pares)
+        vencida = PrediccionRendimiento.objects.filter(alumno=self.alumnos[0]).first()
+        hace_un_rato = vencida.fecha_prediccion - timedelta(seconds=61)
+        PrediccionRendimiento.objects.filter(pk=vencida.pk).update(fecha_prediccion=hace_un_rato)
+        obtener_predicciones(self.pares)
+        self.assertEqual(self.predecir.call_count, 2)
+        self.assertEqual(len(self.predecir.call_args.args[0]), 1)
+        self.assertGreater(PrediccionRendimiento.objects.get(pk=vencida.pk).fecha_prediccion, hace_un_rato)
+
+    def test_recalcular_gestion_escribe_cada_par_inscrito(self):
+        self.assertEqual(predicciones.recalcular_gestion(self.gestion, tamano_lote=4), 6)
+        esperadas = {
+            (alumno_id, horario.profesor_materia.materia_id, self.gestion.id) for alumno_id, horario in self.pares
+        }
+        guardadas = PrediccionRendimiento.objects.values_list('alumno_id', 'materia_id', 'gestion_id')
+        self.assertEqual(set(guardadas), esperadas)
+
+    def test_comando_recalcular_predicciones(self):
+        salida = io.StringIO()
+        call_command('recalcular_predicciones', gestion=self.gestion.id, lote=4, stdout=salida)
+        self.assertIn('6 predicciones', salida.getvalue())
+        self.assertEqual(PrediccionRendimiento.objects.filter(gestion=self.gestion).count(), 6)
+        self.assertFalse(PrediccionRendimiento.objects.filter(alumno=self.alumnos[3]).exists())
+
+    def test_clases_de_texto_sin_score(self):
+        self.predecir.side_effect = lambda X: (np.array(['bueno'] * len(X)), ['bueno'] * len(X))
+        calculadas = predicciones.calcular_predicciones(self.pares[:1])
+        self.assertEqual((calculadas[0].score, calculadas[0].categoria), (None, 'bueno'))
+
+
+class InvalidacionPrediccionesTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        profesor = Profesor.objects.create(
+            usuario=Usuario.objects.create(username='prof', correo='prof@colegio.bo'), especialidad='Ciencias'
+        )
+        clase = Clase.objects.create(
+            curso=Curso.objects.create(curso=1),
+            gestion=Gestion.objects.create(anio=2025, trimestre=1),
+        )
+        cls.fisica, cls.quimica = (
+            Horario.objects.create(
+                clase=clase,
+                profesor_materia=AsignacionProfesorMateria.objects.create(
+                    profesor=profesor, materia=Materia.objects.create(nombre=nombre)
+                ),
+            )
+            for nombre in ('Física', 'Química')
+        )
+        cls.alumnos = []
+        for i in range(3):
+            alumno = Alumno.objects.create(
+                usuario=Usuario.objects.create(username=f'alumno{i}', correo=f'a{i}@colegio.bo')
+            )
+            Inscripcion.objects.create(alumno=alumno, clase=clase)
+            cls.alumnos.append(alumno)
+
+    def setUp(self):
+        self.enterContext(mock.patch('academico.predicciones.predecir_categorias', side_effect=_puntajes))
+        obtener_predicciones([(alumno.id, self.fisica) for alumno in self.alumnos])
+
+    def sucias(self):
+        return set(PrediccionRendimiento.objects.filter(desactualizada=True).values_list('alumno_id', flat=True))
+
+    def test_una_marca_por_transaccion(self):
+        with CaptureQueriesContext(connection) as consultas:
+            with self.captureOnCommitCallbacks(execute=True) as callbacks, transaction.atomic():
+                for alumno in self.alumnos:
+                    marcar_horario(alumno.id, self.fisica.id)
+                    marcar_horario(alumno.id, self.fisica.id)
+        self.assertEqual(sum(getattr(c, 'clase', None) is predicciones._Marcas for c in callbacks), 1)
+        actualizaciones = [q for q in consultas if q['sql'].startswith('UPDATE "usuarios_prediccionrendimiento"')]
+        self.assertEqual(len(actualizaciones), 1)
+        self.assertEqual(self.sucias(), {alumno.id for alumno in self.alumnos})
+
+    def test_rollback_descarta_las_marcas(self):
+        primero, segundo = self.alumnos[:2]
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    marcar_horario(primero.id, self.fisica.id)
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+            with transaction.atomic():
+                marcar_horario(segundo.id, self.fisica.id)
+        self.assertEqual(self.sucias(), {segundo.id})
+
+    def test_marca_durante_el_recalculo_no_se_pierde(self):
+        alumno = self.alumnos[0]
+        clave = predicciones.clave_prediccion(alumno.id, self.fisica)
+        predicciones.marcar_desactualizadas({clave})
+        extraer = predicciones.extraer_features
+
+        def extraer_y_registrar_nota(pares):
+            X = extraer(pares)
+            predicciones.marcar_desactualizadas({clave})  # se confirma una nota después de leer las features
+            return X
+
+        with mock.patch('academico.predicciones.extraer_features', side_effect=extraer_y_registrar_nota):
+            self.assertEqual(predicciones.recalcular_desactualizadas(), 1)
+        self.assertEqual(self.sucias(), {alumno.id})
+        # Sin marcas nuevas, el siguiente recálculo la deja al día
+        self.assertEqual(predicciones.recalcular_desactualizadas(), 1)
+        self.assertEqual(self.sucias(), set())
+
+    def test_horario_de_otra_materia_no_deja_el_recalculo_girando(self):
+        fila = PrediccionRendimiento.objects.get(alumno=self.alumnos[0])
+        fila.detalles['horario_id'] = self.quimica.id
+        PrediccionRendimiento.objects.filter(pk=fila.pk).update(detalles=fila.detalles, desactualizada=True)
+        self.assertEqual(predicciones.recalcular_desactualizadas(), 0)
+        self.assertFalse(PrediccionRendimiento.objects.filter(pk=fila.pk).exists())
+
+
+class ExportarTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = Usuario.objects.create(username='admin', correo='admin@colegio.bo', is_staff=True)
+        profesor = Profesor.objects.create(
+            usuario=Usuario.objects.create(username='prof', correo='prof@colegio.bo'), especialidad='Ciencias'
+        )
+        clase = Clase.objects.create(
+            curso=Curso.objects.create(curso=1),
+            gestion=Gestion.objects.create(anio=2025, trimestre=1),
+        )
+        cls.fisica, quimica = Materia.objects.create(nombre='Física'), Materia.objects.create(nombre='Química')
+        horarios = [
+            Horario.objects.create(
+                clase=clase,
+                profesor_materia=AsignacionProfesorMateria.objects.create(profesor=profesor, materia=materia),
+            )
+            for materia in (cls.fisica, quimica)
+        ]
+        for i in range(5):
+            alumno = Alumno.objects.create(
+                usuario=Usuario.objects.create(username=f'alumno{i}', correo=f'a{i}@colegio.bo')
+            )
+            for horario in horarios:
+                NotaMateria.objects.create(alumno=alumno, horario=horario, nota_saber=50 + i)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def descargar(self, recurso, **params):
+        respuesta = self.client.get(reverse('exportar', args=[recurso]), params)
+        self.assertEqual(respuesta.status_code, 200)
+        return b''.join(respuesta.streaming_content).decode()
+
+    def test_csv_filtrado_por_materia(self):
+        lineas = self.descargar('notas', materia_id=self.fisica.id).splitlines()
+        self.assertEqual(lineas[0].split(',')[:3], ['id', 'alumno_id', 'horario_id'])
+        self.assertEqual(len(lineas), 6)
+        self.assertTrue(all(linea.endswith(',Física') for linea in lineas[1:]))
+
+    def test_ndjson(self):
+        filas = [json.loads(linea) for linea in self.descargar('notas', formato='ndjson').splitlines()]
+        self.assertEqual(len(filas), 10)
+        self.assertEqual(filas[0]['nota_saber'], '50.00')
+
+    def test_parametros_invalidos(self):
+        self.assertEqual(self.client.get(reverse('exportar', args=['usuarios'])).status_code, 404)
+        self.assertEqual(self.client.get(reverse('exportar', args=['notas']), {'formato': 'xml'}).status_code, 400)
+        self.assertEqual(self.client.get(reverse('exportar', args=['notas']), {'clase_id': 'x'}).status_code, 400)
+
+    def test_exportar_dataset_por_lotes(self):
+        with tempfile.TemporaryDirectory() as directorio:
+            salida = os.path.join(directorio, 'dataset.csv')
+            call_command('exportar_dataset', salida=salida, lote=3, stdout=io.StringIO())
+            dataset = pd.read_csv(salida)
+        self.assertEqual(len(dataset), 10)
+        self.assertEqual(sorted(dataset.promedio_final.unique()), [50, 51, 52, 53, 54])
+        self.assertEqual(set(dataset.materia_id), {m.id for m in Materia.objects.all()})
+
+    def test_train_rendimiento_registra_y_activa(self):
+        self.addCleanup(ml_model.olvidar_modelos)
+        with tempfile.TemporaryDirectory() as directorio, override_settings(MODELOS_DIR=directorio):
+            call_command('train_rendimiento', folds=2, arboles=5, stdout=io.StringIO())
+            version = ml_model.version_activa()
+            metadata = ml_model.leer_metadata(version)
+            self.assertEqual(metadata['features'], list(FEATURES))
+            self.assertEqual(metadata['filas'], 10)
+            self.assertIn('latencia_us_por_fila', metadata)
+            self.assertEqual(len(ml_model.predict_batch([[50, 50, 1]])), 1)
+
+    def test_versiones_del_mismo_segundo_no_chocan(self):
+        X, y = np.random.default_rng(0).uniform(0, 100, (10, 3)), np.arange(10.0)
+        with mock.patch('academico.entrenamiento.timezone.now', return_value=timezone.now()):
+            versiones = {entrenar(X, y, folds=2, arboles=2)[1]['version'] for _ in range(2)}
+        self.assertEqual(len(versiones), 2)
+
+
+class GestionActualTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = Usuario.objects.create(username='admin', correo='admin@colegio.bo', is_staff=True)
+        cls.anterior = Gestion.objects.create(anio=2025, trimestre=1)
+        cls.actual = Gestion.objects.create(anio=2025, trimestre=2)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def test_segunda_llamada_sin_consultas(self):
+        self.assertEqual(gestion_actual(), self.actual)
+        with self.assertNumQueries(0):
+            self.assertEqual(gestion_actual(), self.actual)
+
+    def test_escrituras_por_la_api_invalidan(self):
+        gestion_actual()
+        respuesta = self.client.post(reverse('gestion-list'), {'anio': 2025, 'trimestre': 3})
+        self.assertEqual(respuesta.status_code, 201)
+        self.assertEqual(gestion_actual().trimestre, 3)
+
+        url = reverse('gestion-detail', args=[respuesta.data['id']])
+        self.assertEqual(self.client.patch(url, {'anio': 2024}).status_code, 200)
+        self.assertEqual(gestion_actual(), self.actual)
+
+        self.assertEqual(self.client.delete(reverse('gestion-detail', args=[self.actual.id])).status_code, 204)
+        self.assertEqual(gestion_actual(), self.anterior)
+
+
+class CacheRespuestasTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        profesor = Profesor.objects.create(
+            usuario=Usuario.objects.create(username='prof', correo='prof@colegio.bo'), especialidad='Ciencias'
+        )
+        cls.profesor = Usuario.objects.get(pk=profesor.usuario_id)
+        clase = Clase.objects.create(
+            curso=Curso.objects.create(curso=1),
+            gestion=Gestion.objects.create(anio=2025, trimestre=1),
+        )
+        cls.horario = Horario.objects.create(
+            clase=clase,
+            profesor_materia=AsignacionProfesorMateria.objects.create(
+                profesor=profesor, materia=Materia.objects.create(nombre='Física')
+            ),
+        )
+        cls.usuario = Usuario.objects.create(username='alumno', correo='alumno@colegio.bo')
+        cls.alumno = Alumno.objects.create(usuario=cls.usuario)
+        cls.usuario.refresh_from_db()
+        Inscripcion.objects.create(alumno=cls.alumno, clase=clase)
+        cls.nota = NotaMateria.objects.create(alumno=cls.alumno, horario=cls.horario, nota_saber=60)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.usuario)
+
+    def test_etag_y_304(self):
+        url = reverse('mi-libreta')
+        primera = self.client.get(url)
+        self.assertEqual(primera.status_code, 200)
+        with CaptureQueriesContext(connection) as consultas:
+            segunda = self.client.get(url, HTTP_IF_NONE_MATCH=primera['ETag'])
+        self.assertEqual(segunda.status_code, 304)
+        self.assertEqual(len(consultas), 1)  # solo la versión de datos
+
+        with self.captureOnCommitCallbacks(execute=True):
+            NotaMateria.objects.filter(pk=self.nota.pk).update(nota_saber=90)
+            marcar_horario(self.alumno.id, self.horario.id)
+        tercera = self.client.get(url, HTTP_IF_NONE_MATCH=primera['ETag'])
+        self.assertEqual(tercera.status_code, 200)
+        self.assertNotEqual(tercera['ETag'], primera['ETag'])
+        self.assertEqual(tercera.data[0]['nota_saber'], '90.00')
+
+    def test_acierto_no_evalua_el_modelo(self):
+        url = reverse('dashboard-alumno')
+        with mock.patch('academico.predicciones.predecir_categorias', return_value=(np.array([60.0]), ['regular'])), \
+                mock.patch('academico.dashboards.obtener_predicciones', wraps=obtener_predicciones) as obtener:
+            self.assertEqual(self.client.get(url).status_code, 200)
+            self.assertEqual(self.client.get(url).status_code, 200)
+        self.assertEqual(obtener.call_count, 1)
+
+    def test_cada_parametro_es_otra_respuesta(self):
+        self.client.force_authenticate(self.profesor)
+        url = reverse('dashboard-profesor')
+        with mock.patch('academico.predicciones.predecir_categorias', return_value=(np.array([40.0]), ['bajo'])):
+            primer_trimestre = self.client.get(url, {'trimestre': 1})
+            segundo_trimestre = self.client.get(url, {'trimestre': 2})
+        self.assertEqual(len(primer_trimestre.data['resultados']), 1)
+        self.assertEqual(segundo_trimestre.data['resultados'], [])
+        self.assertNotEqual(primer_trimestre['ETag'], segundo_trimestre['ETag'])
+
+    def test_por_usuario(self):
+        url = reverse('mi-libreta')
+        self.client.get(url)
+        otro = Alumno.objects.create(usuario=Usuario.objects.create(username='otro', correo='otro@colegio.bo'))
+        self.client.force_authenticate(Usuario.objects.get(pk=otro.usuario_id))
+        self.assertEqual(self.client.get(url).data, [])
+
+
+class DashboardAsyncTests(TransactionTestCase):
+    # TransactionTestCase: las secciones corren en otros hilos, con otras conexiones, y tienen que ver los datos
+    def setUp(self):
+        cache.clear()
+        profesor = Profesor.objects.create(
+            usuario=Usuario.objects.create(username='prof', correo='prof@colegio.bo'), especialidad='Ciencias'
+        )
+        clase = Clase.objects.create(
+            curso=Curso.objects.create(curso=1),
+            gestion=Gestion.objects.create(anio=2025, trimestre=1),
+        )
+        horario = Horario.objects.create(
+            clase=clase,
+            profesor_materia=AsignacionProfesorMateria.objects.create(
+                profesor=profesor, materia=Materia.objects.create(nombre='Física')
+            ),
+        )
+        alumno = Alumno.objects.create(usuario=Usuario.objects.create(username='alumno', correo='alumno@colegio.bo'))
+        Inscripcion.objects.create(alumno=alumno, clase=clase)
+        NotaMateria.objects.create(alumno=alumno, horario=horario, nota_saber=40)
+        self.profesor = Usuario.objects.get(pk=profesor.usuario_id)
+        self.alumno = Usuario.objects.get(pk=alumno.usuario_id)
+        self.enterContext(mock.patch('academico.predicciones.predecir_categorias', return_value=(np.array([40.0]), ['bajo'])))
+
+    def cabeceras(self, usuario):
+        return {'Authorization': f'Bearer {AccessToken.for_user(usuario)}'}
+
+    async def test_misma_respuesta_que_la_sync(self):
+        for usuario, nombre in ((self.profesor, 'dashboard-profesor'), (self.alumno, 'dashboard-alumno')):
+            asincrona = await self.async_client.get(reverse(f'{nombre}-async'), headers=self.cabeceras(usuario))
+            self.assertEqual(asincrona.status_code, 200)
+            await cache.aclear()
+            sincrona = await self.async_client.get(reverse(nombre), headers=self.cabeceras(usuario))
+            self.assertEqual(asincrona.content, sincrona.content)
+            self.assertEqual(asincrona['ETag'], sincrona['ETag'])
+
+        datos = json.loads(asincrona.content)
+        self.assertEqual(datos['materias_bajo_rendimiento'][0]['rendimiento'], 40.0)
+
+    async def test_autenticacion_y_rol(self):
+        url = reverse('dashboard-profesor-async')
+        self.assertEqual((await self.async_client.get(url)).status_code, 401)
+        self.assertEqual((await self.async_client.get(url, headers=self.cabeceras(self.alumno))).status_code, 403)
+        self.assertEqual((await self.async_client.post(url, headers=self.cabeceras(self.profesor))).status_code, 405)
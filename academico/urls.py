@@ -16,10 +16,13 @@ from .views import (
     mi_libreta,
     mis_horarios,
     dashboard_estudiante,
+    dashboard_estudiante_async,
     dashboard_profesor,
+    dashboard_profesor_async,
     dashboard_tutor,
     alumnos_by_horario,
     notas_by_horario,
+    exportar,
     CursoViewSet,
     GestionViewSet,
     ClaseViewSet,
@@ -51,11 +54,14 @@ urlpatterns = [
     path('mi-libreta/', mi_libreta, name='mi-libreta'),
     path('mis-horarios/', mis_horarios, name='mis-horarios'),
     path('dashboard-alumno/', dashboard_estudiante, name='dashboard-alumno'),
+    path('dashboard-alumno/async/', dashboard_estudiante_async, name='dashboard-alumno-async'),
     path('dashboard-profesor/', dashboard_profesor, name='dashboard-profesor'),
+    path('dashboard-profesor/async/', dashboard_profesor_async, name='dashboard-profesor-async'),
     path('dashboard-tutor/', dashboard_tutor, name='dashboard-tutor'),
     path('perfil-alumno/<int:alumno_id>/', perfil_alumno, name='perfil-alumno'),
     path('alumnos-by-horario/<int:horario_id>/', alumnos_by_horario, name='alumnos-by-horario'),
     path('notas-by-horario/<int:horario_id>/', notas_by_horario, name='notas-by-horario'),
     path('registrar-notas/<int:horario_id>/', registrar_notas, name='registrar-notas'),
+    path('exportar/<str:recurso>/', exportar, name='exportar'),
     path('', include(router.urls)),
 ]
\ No newline at end of file
@@ -4,7 +4,7 @@ from rest_framework.response import Response
 from rest_framework import viewsets
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
-from usuarios.notif import enviar_notificaciones_fb
+from usuarios.notificaciones import encolar_notificacion
 from usuarios.permissions import has_role
 from .models import (
     AsignacionProfesorMateria,
@@ -24,17 +24,28 @@ from .serializers import (
     AsignacionProfesorMateriaSerializer,
     MateriaSerializer,
     NotaMateriaSerializer,
+    NotasInscripcionSerializer,
 )
 from usuarios.serializers import AlumnoSerializer
 from usuarios.models import Alumno, Profesor, Tutoria
-from asistencia.models import Horario, Dia, Asistencia
-from asistencia.serializers import HorarioSerializer
+from asistencia.models import Horario, Dia, HorarioDia
+from asistencia.serializers import HorarioSerializer, optimizar_horarios
 from evaluaciones.models import Tarea, Examen, EntregaTarea, ResultadoExamen
-from django.db.models import Avg, Q
-from utils.ml_model import get_ml_model
-import numpy as np
-from datetime import date, time
-from django.utils import timezone
+from django.db.models import Prefetch, Q
+from .cache_respuestas import cache_por_usuario
+from colegio_backend.asincrono import api_view_async, en_paralelo
+from colegio_backend.pagination import paginar
+from colegio_backend.routers import lectura_en_replica
+from . import dashboards
+from .exportar import FORMATOS, RECURSOS, como_csv, como_ndjson, filas
+from .gestiones import invalidar_gestion_actual, resolver_gestion
+from .predicciones import marcar_horario, obtener_predicciones
+from asgiref.sync import sync_to_async
+from collections import defaultdict
+from functools import partial
+from django.http import StreamingHttpResponse
+from django.db.transaction import atomic as transaction_atomic
+from decimal import Decimal, InvalidOperation
 
 
 class CursoViewSet(viewsets.ModelViewSet):
@@ -50,11 +61,25 @@ class GestionViewSet(viewsets.ModelViewSet):
     queryset = Gestion.objects.all()
     serializer_class = GestionSerializer
 
+    def perform_create(self, serializer):
+        super().perform_create(serializer)
+        invalidar_gestion_actual()
+
+    def perform_update(self, serializer):
+        super().perform_update(serializer)
+        invalidar_gestion_actual()
+
+    def perform_destroy(self, instance):
+        super().perform_destroy(instance)
+        invalidar_gestion_actual()
+
 
 class ClaseViewSet(viewsets.ModelViewSet):
     """CRUD de clases."""
 
-    queryset = Clase.objects.all()
+    queryset = Clase.objects.select_related('curso', 'gestion').prefetch_related(
+        Prefetch('horarios', queryset=optimizar_horarios(Horario.objects.all()))
+    )
     serializer_class = ClaseSerializer
 
 
@@ -71,10 +96,19 @@ class AsignacionProfesorMateriaViewSet(viewsets.ModelViewSet):
     queryset = AsignacionProfesorMateria.objects.all()
     serializer_class = AsignacionProfesorMateriaSerializer
 
+def _con_clase(inscripciones):
+    """Precarga alumno y clase (con sus horarios) para InscripcionSerializer."""
+    return inscripciones.select_related(
+        'alumno__usuario__datos_personales', 'clase__curso', 'clase__gestion'
+    ).prefetch_related(
+        Prefetch('clase__horarios', queryset=optimizar_horarios(Horario.objects.all()))
+    )
+
+
 class InscripcionViewSet(viewsets.ModelViewSet):
     """Operaciones sobre inscripciones."""
 
-    queryset = Inscripcion.objects.all()
+    queryset = _con_clase(Inscripcion.objects.all())
     serializer_class = InscripcionSerializer
 
 
@@ -92,7 +126,7 @@ def get_my_alumnos(request):
     profesor = usuario.profesor
 
     # Obtener la gestión actual
-    gestion_actual = Gestion.objects.latest("anio", "trimestre")
+    gestion_actual = resolver_gestion()
 
     # Obtener clases del profesor en la gestión actual
     asignaciones = AsignacionProfesorMateria.objects.filter(profesor=profesor)
@@ -101,12 +135,8 @@ def get_my_alumnos(request):
     ).distinct()
 
     # Obtener alumnos inscritos a esas clases
-    inscripciones = Inscripcion.objects.filter(clase__in=clases).select_related(
-        "alumno", "clase__curso", "clase__gestion"
-    )
-
-    serializer = InscripcionSerializer(inscripciones, many=True)
-    return Response(serializer.data)
+    inscripciones = Inscripcion.objects.filter(clase__in=clases)
+    return paginar(request, _con_clase(inscripciones), InscripcionSerializer)
 
 
 @swagger_auto_schema(
@@ -137,11 +167,10 @@ def get_alumnos_by_horario(request, horario_id):
     clase = asignacion.horarios.get(id=horario_id).clase
 
     # Obtener alumnos inscritos a esa clase
-    inscripciones = Inscripcion.objects.filter(clase=clase).select_related("alumno")
-    alumnos = [inscripcion.alumno for inscripcion in inscripciones]
-
-    serializer = AlumnoSerializer(alumnos, many=True)
-    return Response(serializer.data)
+    alumnos = Alumno.objects.filter(inscripciones__clase=clase).distinct().select_related(
+        "usuario__datos_personales"
+    )
+    return paginar(request, alumnos, AlumnoSerializer)
 
 
 @swagger_auto_schema(
@@ -192,18 +221,8 @@ def get_notas_by_alumno(request, alumno_id):
     except Alumno.DoesNotExist:
         return Response({"detail": "Alumno no encontrado."}, status=404)
 
-    inscripciones = Inscripcion.objects.filter(alumno=alumno).select_related("clase")
-
-    notas = []
-    for inscripcion in inscripciones:
-        inscripcion_serializer = InscripcionSerializer(inscripcion)
-        notas.append(
-            {
-                "inscripcion": inscripcion_serializer.data,
-            }
-        )
-
-    return Response(notas)
+    inscripciones = Inscripcion.objects.filter(alumno=alumno)
+    return paginar(request, _con_clase(inscripciones), NotasInscripcionSerializer)
 
 
 @swagger_auto_schema(
@@ -258,11 +277,8 @@ def registrar_nota(request, inscripcion_id):
 def mis_notas(request):
     """Mostrar la libreta de calificaciones del alumno autenticado."""
     alumno = request.user.alumno
-    inscripciones = Inscripcion.objects.filter(alumno=alumno).select_related(
-        "clase__curso", "clase__gestion"
-    )
-    serializer = InscripcionSerializer(inscripciones, many=True)
-    return Response(serializer.data)
+    inscripciones = Inscripcion.objects.filter(alumno=alumno)
+    return paginar(request, _con_clase(inscripciones), InscripcionSerializer)
 
 
 @swagger_auto_schema(
@@ -275,7 +291,7 @@ def mis_notas(request):
 def mis_clases(request):
     """Devuelve las clases asignadas al profesor autenticado."""
     # 1. Obtener la gestión actual
-    gestion_actual = Gestion.objects.latest("anio", "trimestre")
+    gestion_actual = resolver_gestion()
 
     # 2. Obtener el profesor logueado (esto asume que cada usuario-profesor es único)
     try:
@@ -291,9 +307,17 @@ def mis_clases(request):
     )
 
     # 4. Obtener las clases únicas
-    clases = Clase.objects.filter(
-        id__in=horarios.values_list("clase_id", flat=True)
-    ).distinct()
+    clases = (
+        Clase.objects.filter(id__in=horarios.values_list("clase_id", flat=True))
+        .distinct()
+        .select_related("curso", "gestion")
+        .prefetch_related(
+            Prefetch(
+                "horarios__horarios_dias",
+                queryset=HorarioDia.objects.select_related("dia"),
+            )
+        )
+    )
 
     serializer = ClasesSerializer(clases, many=True)
     return Response(serializer.data)
@@ -425,13 +449,7 @@ def alumnos_de_materia(request):
         return Response({"detail": "materia_id es requerido."}, status=400)
 
     # Gestion: la indicada o la última
-    if gestion_id:
-        try:
-            gestion = Gestion.objects.get(pk=gestion_id)
-        except Gestion.DoesNotExist:
-            return Response({"detail": "Gestión no encontrada."}, status=404)
-    else:
-        gestion = Gestion.objects.latest("anio", "trimestre")
+    gestion = resolver_gestion(gestion_id)
 
     # Relación profesor-materia
     try:
@@ -502,13 +520,7 @@ def mis_notas_materia(request):
         return Response({"detail": "El parámetro materia_id es requerido."}, status=400)
 
     # Selecciona la gestión indicada o la más reciente
-    if gestion_id:
-        try:
-            gestion = Gestion.objects.get(pk=gestion_id)
-        except Gestion.DoesNotExist:
-            return Response({"detail": "Gestión no encontrada."}, status=404)
-    else:
-        gestion = Gestion.objects.latest("anio", "trimestre")
+    gestion = resolver_gestion(gestion_id)
 
     # Busca los horarios de esa materia en esa gestión
     horarios = Horario.objects.filter(
@@ -517,8 +529,7 @@ def mis_notas_materia(request):
 
     # Busca la(s) nota(s) del alumno para esa materia y gestión
     notas = NotaMateria.objects.filter(alumno=alumno, horario__in=horarios)
-    serializer = NotaMateriaSerializer(notas, many=True)
-    return Response(serializer.data)
+    return paginar(request, notas, NotaMateriaSerializer)
 
 
 @swagger_auto_schema(
@@ -537,19 +548,15 @@ def mis_notas_materia(request):
 )
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
+@lectura_en_replica
+@cache_por_usuario("mi-libreta")
 def mi_libreta(request):
     """Libreta de calificaciones completa del alumno autenticado."""
     alumno = request.user.alumno  # Asume que el usuario es un alumno
     gestion_id = request.GET.get("gestion_id")
 
     # Selecciona la gestión indicada o la más reciente
-    if gestion_id:
-        try:
-            gestion = Gestion.objects.get(pk=gestion_id)
-        except Gestion.DoesNotExist:
-            return Response({"detail": "Gestión no encontrada."}, status=404)
-    else:
-        gestion = Gestion.objects.latest("anio", "trimestre")
+    gestion = resolver_gestion(gestion_id)
 
     # Busca todos los horarios donde el alumno tiene notas en esa gestión
     horarios = Horario.objects.filter(clase__gestion=gestion)
@@ -571,158 +578,55 @@ def mi_libreta(request):
 def mis_horarios(request):
     """Devuelve los horarios asignados al profesor autenticado."""
     profesor = request.user.profesor
-    horarios = Horario.objects.filter(profesor_materia__profesor=profesor)
-    serializer = HorarioSerializer(horarios, many=True)
-    return Response(serializer.data)
+    horarios = optimizar_horarios(
+        Horario.objects.filter(profesor_materia__profesor=profesor)
+    )
+    return paginar(request, horarios, HorarioSerializer)
 
 
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
 @has_role("profesor")
+@lectura_en_replica
+@cache_por_usuario("dashboard-profesor")
 def dashboard_profesor(request):
-    user = request.user
-    profesor = user.profesor
-
-    gestion_id = request.GET.get("gestion_id")
-    trimestre = request.GET.get("trimestre")
-    ml_model = get_ml_model()
-
-    # Determinar gestión
-    if gestion_id:
-        gestion = Gestion.objects.get(pk=gestion_id)
-    else:
-        gestion = Gestion.objects.latest("anio", "trimestre")
+    profesor = request.user.profesor
+    gestion = resolver_gestion(request.GET.get("gestion_id"))
+    horarios = dashboards.horarios_profesor(profesor, gestion, request.GET.get("trimestre"))
 
-    # Filtrar horarios del docente en esa gestión (opcional trimestre)
-    horarios = Horario.objects.filter(
-        profesor_materia__profesor=profesor, clase__gestion=gestion
+    return Response(
+        {
+            "resultados": dashboards.alumnos_bajo_rendimiento(horarios),
+            "clases_proximas": dashboards.clases_proximas(horarios),
+            "tareas_pendientes": dashboards.tareas_por_revisar(profesor),
+        }
     )
-    if trimestre:
-        horarios = horarios.filter(clase__gestion__trimestre=trimestre)
-
-    resultados = []
-    for horario in horarios.select_related("clase", "profesor_materia__materia"):
-        notas_qs = NotaMateria.objects.filter(horario=horario)
-        alumnos = notas_qs.values_list("alumno", flat=True)[0:1]
-        alumnos_bajo = []
-        for alumno_id in alumnos:
-            # Extrae features para el modelo ML
-            ex_prom = (
-                ResultadoExamen.objects.filter(
-                    alumno_id=alumno_id,
-                    examen__clase=horario.clase,
-                    examen__profesor_materia=horario.profesor_materia,
-                ).aggregate(avg=Avg("nota"))["avg"]
-                or 0
-            )
 
-            ta_prom = (
-                EntregaTarea.objects.filter(
-                    alumno_id=alumno_id,
-                    tarea__clase=horario.clase,
-                    tarea__profesor_materia=horario.profesor_materia,
-                ).aggregate(avg=Avg("nota"))["avg"]
-                or 0
-            )
 
-            asis_total = Asistencia.objects.filter(
-                horario=horario, alumno_id=alumno_id
-            ).count()
-            asis_present = Asistencia.objects.filter(
-                horario=horario, alumno_id=alumno_id, estado="Presente"
-            ).count()
-            asis_pct = asis_present / asis_total if asis_total else 0
-
-            X = np.array([[ex_prom, ta_prom, asis_pct]])
-            pred = ml_model.predict(X)[0]  # 0: baj
-
-            if pred <= 51:
-                nota = NotaMateria.objects.get(horario=horario, alumno_id=alumno_id)
-                alumno_obj = NotaMateria.objects.get(
-                    horario=horario, alumno_id=alumno_id
-                ).alumno
-                alumno_data = AlumnoSerializer(alumno_obj).data
-                alumnos_bajo.append(
-                    {
-                        "alumno": alumno_data,
-                        "examenes_prom": ex_prom,
-                        "tareas_prom": ta_prom,
-                        "asistencia_pct": round(asis_pct * 100, 2),
-                        "nota_prom": nota.promedio,
-                        "rendimiento": round(pred, 2),
-                    }
-                )
-                print(nota.promedio)
-        if alumnos_bajo:
-            resultados.append(
-                {
-                    "curso": horario.clase.curso.curso,
-                    "paralelo": horario.clase.paralelo,
-                    "clase_id": horario.clase.id,
-                    "materia": horario.profesor_materia.materia.nombre,
-                    "horario_id": horario.id,
-                    "alumnos_bajo_rendimiento": alumnos_bajo,
-                }
-            )
-
-    # ------------- Próximas clases del profesor (hoy/futuras) ---------------
-    # 1. Día de hoy
-    hoy = date.today()
-    ahora = timezone.localtime().time() if hasattr(timezone, "localtime") else time()
-    nombre_dia = hoy.strftime("%A")
-    nombre_dia_es = {
-        "Monday": "Lunes",
-        "Tuesday": "Martes",
-        "Wednesday": "Miercoles",
-        "Thursday": "Jueves",
-        "Friday": "Viernes",
-        "Saturday": "Sabado",
-        "Sunday": "Domingo",
-    }[nombre_dia]
-
-    # Horarios donde tiene clase hoy o en adelante (opcional: solo clases futuras de hoy)
-    horarios_hoy = (
-        horarios.filter(horarios_dias__dia__nombre=nombre_dia_es)
-        .distinct()
-        .select_related("clase", "profesor_materia")
-    )
-
-    # Traer los periodos (horas) de esas clases y filtrar por hora futura
-    from asistencia.serializers import HorarioSerializer
-
-    clases_proximas = []
-    for horario in horarios_hoy:
-        periodos = list(horario.periodos.order_by("hora_inicial"))
-        for periodo in periodos:
-            # Solo periodos futuros o actuales
-            if periodo.hora_inicial >= ahora:
-                clase_data = HorarioSerializer(horario).data
-                clase_data["periodo"] = {
-                    "numero": periodo.numero,
-                    "hora_inicial": periodo.hora_inicial,
-                    "hora_final": periodo.hora_final,
-                }
-                clases_proximas.append(clase_data)
+def _contexto_profesor(request):
+    profesor = request.user.profesor
+    gestion = resolver_gestion(request.GET.get("gestion_id"))
+    return profesor, dashboards.horarios_profesor(profesor, gestion, request.GET.get("trimestre"))
 
-    # ------------- Tareas pendientes por revisar (no calificadas) ---------------
-    from evaluaciones.serializers import EntregaTareaSerializer
 
-    tareas_pendientes = (
-        EntregaTarea.objects.filter(
-            tarea__profesor_materia__profesor=profesor,
-            estado__in=["entregada", "pendiente"],
-        )
-        .select_related("tarea", "alumno")
-        .order_by("-fecha_entrega")[:10]
+@api_view_async
+@permission_classes([IsAuthenticated])
+@has_role("profesor")
+@lectura_en_replica
+@cache_por_usuario("dashboard-profesor")
+async def dashboard_profesor_async(request):
+    """dashboard_profesor con sus tres secciones en paralelo (servir con ASGI)."""
+    profesor, horarios = await sync_to_async(_contexto_profesor)(request)
+    resultados, proximas, pendientes = await en_paralelo(
+        partial(dashboards.alumnos_bajo_rendimiento, horarios),
+        partial(dashboards.clases_proximas, horarios),
+        partial(dashboards.tareas_por_revisar, profesor),
     )
-
-    tareas_serializer = EntregaTareaSerializer(tareas_pendientes, many=True)
-
     return Response(
         {
             "resultados": resultados,
-            "clases_proximas": clases_proximas,
-            "tareas_pendientes": tareas_serializer.data,
+            "clases_proximas": proximas,
+            "tareas_pendientes": pendientes,
         }
     )
 
@@ -730,128 +634,46 @@ def dashboard_profesor(request):
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
 @has_role("alumno")
+@lectura_en_replica
+@cache_por_usuario("dashboard-alumno")
 def dashboard_estudiante(request):
-    user = request.user
-    alumno = user.alumno
-    ml_model = (
-        get_ml_model()
-    )  # Debes tener una función que te de el modelo ML ya cargado
-    ultima_gestion = Gestion.objects.latest("anio", "trimestre")
-
-    # -------- 1. Materias de bajo rendimiento ----------
-    horarios_ultima_gestion = Horario.objects.filter(clase__gestion=ultima_gestion)
-    notas_qs = NotaMateria.objects.filter(
-        alumno=alumno, horario__in=horarios_ultima_gestion
-    )
-    print(notas_qs)
-    materias_bajo = []
-    for nota in notas_qs.select_related(
-        "horario__profesor_materia__materia", "horario__clase"
-    ):
-        horario = nota.horario
-        ex_prom = (
-            ResultadoExamen.objects.filter(
-                alumno=alumno,
-                examen__clase=horario.clase,
-                examen__profesor_materia=horario.profesor_materia,
-            ).aggregate(avg=Avg("nota"))["avg"]
-            or 0
-        )
-        ta_prom = (
-            EntregaTarea.objects.filter(
-                alumno=alumno,
-                tarea__clase=horario.clase,
-                tarea__profesor_materia=horario.profesor_materia,
-            ).aggregate(avg=Avg("nota"))["avg"]
-            or 0
-        )
-        asis_total = Asistencia.objects.filter(horario=horario, alumno=alumno).count()
-        asis_present = Asistencia.objects.filter(
-            horario=horario, alumno=alumno, estado="Presente"
-        ).count()
-        asis_pct = asis_present / asis_total if asis_total else 0
-        
-        print("Hola")
-        # --- Predecir con ML ---
-        X = np.array([[ex_prom, ta_prom, asis_pct]])
-        pred = ml_model.predict(X)[0]  # 0: bajo, 1: regular, 2: bueno
-
-        if True:
-            nota = NotaMateria.objects.get(horario=horario, alumno=alumno)
-            materias_bajo.append(
-                {
-                    "materia_id": nota.horario.profesor_materia.materia.id,
-                    "materia": nota.horario.profesor_materia.materia.nombre,
-                    "clase_id": nota.horario.clase.id,
-                    "horario_id": nota.horario.id,
-                    "examenes_prom": ex_prom,
-                    "tareas_prom": ta_prom,
-                    "asistencia_pct": round(asis_pct * 100, 2),
-                    "rendimiento": pred,
-                    "nota_prom": round(nota.promedio, 2),
-                }
-            )
-
-    # -------- 2. Últimas tareas y exámenes corregidos ----------
-    ultimas_tareas = (
-        EntregaTarea.objects.filter(alumno=alumno, estado="calificada")
-        .select_related("tarea")
-        .order_by("-fecha_entrega")[:5]
-    )
+    alumno = request.user.alumno
+    gestion = resolver_gestion()
 
-    ultimos_examenes = (
-        ResultadoExamen.objects.filter(alumno=alumno, estado="calificado")
-        .select_related("examen")
-        .order_by("-examen__fecha")[:5]
+    return Response(
+        {
+            "materias_bajo_rendimiento": dashboards.materias_rendimiento(alumno, gestion),
+            "ultimas_tareas": dashboards.ultimas_tareas(alumno),
+            "ultimos_examenes": dashboards.ultimos_examenes(alumno),
+            "clases_hoy": dashboards.clases_de_hoy(alumno, gestion),
+        }
     )
 
-    from evaluaciones.serializers import (
-        EntregaTareaSerializer,
-        ResultadoExamenSerializer,
-    )
 
-    tareas_serializer = EntregaTareaSerializer(ultimas_tareas, many=True)
-    examenes_serializer = ResultadoExamenSerializer(ultimos_examenes, many=True)
-
-    # -------- 3. Clases de hoy (por horario) ----------
-    # 1. Buscar día de hoy
-    dia_hoy = date.today()
-    nombre_dia = dia_hoy.strftime("%A")
-    nombre_dia_es = {
-        "Monday": "Lunes",
-        "Tuesday": "Martes",
-        "Wednesday": "Miercoles",
-        "Thursday": "Jueves",
-        "Friday": "Viernes",
-        "Saturday": "Sabado",
-        "Sunday": "Domingo",
-    }[nombre_dia]
-
-    # 3. Inscripciones del alumno SOLO en la última gestión
-    inscripciones_ids = Inscripcion.objects.filter(
-        alumno=alumno, clase__gestion=ultima_gestion
-    ).values_list("clase_id", flat=True)
-
-    # 4. Horarios donde hay clase hoy y pertenecen a la gestión actual
-    horarios_hoy = (
-        Horario.objects.filter(
-            clase_id__in=inscripciones_ids, horarios_dias__dia__nombre=nombre_dia_es
-        )
-        .distinct()
-        .select_related("clase", "profesor_materia")
-    )
-
-    # 5. Serializa y responde
-    from asistencia.serializers import HorarioSerializer
+def _contexto_alumno(request):
+    return request.user.alumno, resolver_gestion()
 
-    horarios_hoy_serializer = HorarioSerializer(horarios_hoy, many=True)
 
+@api_view_async
+@permission_classes([IsAuthenticated])
+@has_role("alumno")
+@lectura_en_replica
+@cache_por_usuario("dashboard-alumno")
+async def dashboard_estudiante_async(request):
+    """dashboard_estudiante con sus cuatro secciones en paralelo (servir con ASGI)."""
+    alumno, gestion = await sync_to_async(_contexto_alumno)(request)
+    materias, tareas, examenes, clases = await en_paralelo(
+        partial(dashboards.materias_rendimiento, alumno, gestion),
+        partial(dashboards.ultimas_tareas, alumno),
+        partial(dashboards.ultimos_examenes, alumno),
+        partial(dashboards.clases_de_hoy, alumno, gestion),
+    )
     return Response(
         {
-            "materias_bajo_rendimiento": materias_bajo,
-            "ultimas_tareas": tareas_serializer.data,
-            "ultimos_examenes": examenes_serializer.data,
-            "clases_hoy": horarios_hoy_serializer.data,
+            "materias_bajo_rendimiento": materias,
+            "ultimas_tareas": tareas,
+            "ultimos_examenes": examenes,
+            "clases_hoy": clases,
         }
     )
 
@@ -859,10 +681,11 @@ def dashboard_estudiante(request):
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
 @has_role("tutor")
+@lectura_en_replica
+@cache_por_usuario("dashboard-tutor")
 def dashboard_tutor(request):
     user = request.user
     tutor = user.tutor
-    ml_model = get_ml_model()
 
     from usuarios.serializers import AlumnoSerializer
     from evaluaciones.serializers import (
@@ -871,58 +694,41 @@ def dashboard_tutor(request):
     )
 
     dashboard = []
-    alumnos_ids = Tutoria.objects.filter(tutor=tutor).values_list("alumno", flat=True)
-    for alumno_id in alumnos_ids:
-        alumno = Alumno.objects.get(id=alumno_id)
-        alumno_info = AlumnoSerializer(alumno).data
+    alumnos_ids = list(
+        Tutoria.objects.filter(tutor=tutor).values_list("alumno", flat=True)
+    )
+    alumnos = Alumno.objects.select_related("usuario__datos_personales").in_bulk(
+        alumnos_ids
+    )
 
-        # --- Materias en riesgo (ML) ---
-        notas_qs = NotaMateria.objects.filter(alumno=alumno)
-        materias_riesgo = []
-        for nota in notas_qs.select_related(
+    # --- Materias en riesgo (ML), calculadas para todos los alumnos a la vez ---
+    notas = list(
+        NotaMateria.objects.filter(alumno_id__in=alumnos_ids).select_related(
             "horario__profesor_materia__materia", "horario__clase"
-        ):
-            horario = nota.horario
-            ex_prom = (
-                ResultadoExamen.objects.filter(
-                    alumno=alumno,
-                    examen__clase=horario.clase,
-                    examen__profesor_materia=horario.profesor_materia,
-                ).aggregate(avg=Avg("nota"))["avg"]
-                or 0
-            )
-            ta_prom = (
-                EntregaTarea.objects.filter(
-                    alumno=alumno,
-                    tarea__clase=horario.clase,
-                    tarea__profesor_materia=horario.profesor_materia,
-                ).aggregate(avg=Avg("nota"))["avg"]
-                or 0
+        )
+    )
+    predicciones = obtener_predicciones([(nota.alumno_id, nota.horario) for nota in notas])
+
+    materias_riesgo_por_alumno = defaultdict(list)
+    for nota, prediccion in zip(notas, predicciones):
+        if prediccion.categoria in ["bajo", "regular"]:
+            materias_riesgo_por_alumno[nota.alumno_id].append(
+                {
+                    "materia_id": nota.horario.profesor_materia.materia.id,
+                    "materia": nota.horario.profesor_materia.materia.nombre,
+                    "clase_id": nota.horario.clase.id,
+                    "horario_id": nota.horario.id,
+                    "examenes_prom": prediccion.detalles["promedio_examenes"],
+                    "tareas_prom": prediccion.detalles["promedio_tareas"],
+                    "asistencia_pct": round(prediccion.detalles["asistencia_pct"] * 100, 2),
+                    "prediccion": prediccion.categoria,
+                }
             )
-            asis_total = Asistencia.objects.filter(
-                horario=horario, alumno=alumno
-            ).count()
-            asis_present = Asistencia.objects.filter(
-                horario=horario, alumno=alumno, estado="Presente"
-            ).count()
-            asis_pct = asis_present / asis_total if asis_total else 0
-
-            X = np.array([[ex_prom, ta_prom, asis_pct]])
-            pred = ml_model.predict(X)[0]  # 0: bajo, 1: regular, 2: bueno
-
-            if pred in [0, 1]:
-                materias_riesgo.append(
-                    {
-                        "materia_id": nota.horario.profesor_materia.materia.id,
-                        "materia": nota.horario.profesor_materia.materia.nombre,
-                        "clase_id": nota.horario.clase.id,
-                        "horario_id": nota.horario.id,
-                        "examenes_prom": ex_prom,
-                        "tareas_prom": ta_prom,
-                        "asistencia_pct": round(asis_pct * 100, 2),
-                        "prediccion": "bajo" if pred == 0 else "regular",
-                    }
-                )
+
+    for alumno_id in alumnos_ids:
+        alumno = alumnos[alumno_id]
+        alumno_info = AlumnoSerializer(alumno).data
+        materias_riesgo = materias_riesgo_por_alumno[alumno_id]
 
         # --- Últimas notas (tareas y exámenes calificados) ---
         ultimas_tareas = (
@@ -966,6 +772,7 @@ def dashboard_tutor(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@lectura_en_replica
 def perfil_alumno(request, alumno_id):
     # 1. Obtén el alumno y serialízalo
     try:
@@ -976,67 +783,46 @@ def perfil_alumno(request, alumno_id):
     alumno_data = AlumnoSerializer(alumno).data
 
     # 2. Determinar la gestión más reciente
-    try:
-        ultima_gestion = Gestion.objects.latest("anio", "trimestre")
-    except Gestion.DoesNotExist:
-        return Response({"detail": "No hay gestiones registradas."}, status=404)
+    ultima_gestion = resolver_gestion()
 
     # 3. Materias inscritas del alumno en la última gestión
     inscripciones = Inscripcion.objects.filter(alumno=alumno, clase__gestion=ultima_gestion)
     clases_ids = inscripciones.values_list("clase_id", flat=True)
-    horarios = Horario.objects.filter(clase_id__in=clases_ids)
+    horarios = list(
+        Horario.objects.filter(clase_id__in=clases_ids)
+        .select_related("profesor_materia__materia", "clase")
+        .order_by("id")
+    )
 
-    # 4. Busca todas las notas por materia y calcula la predicción en el momento
-    ml_model = get_ml_model()  # Debes tener tu función de ML
+    horarios_por_materia = defaultdict(list)
+    for horario in horarios:
+        horarios_por_materia[horario.profesor_materia.materia].append(horario)
+    materias = sorted(horarios_por_materia, key=lambda materia: materia.id)
 
-    notas = []
-    materias_ids = set(horarios.values_list("profesor_materia__materia_id", flat=True))
-    materias = Materia.objects.filter(id__in=materias_ids)
-
-    for materia in materias:
-        # Filtrar horarios de esa materia
-        horarios_materia = horarios.filter(profesor_materia__materia=materia)
-        notas_materia = NotaMateria.objects.filter(alumno=alumno, horario__in=horarios_materia)
-        promedios = [n.promedio for n in notas_materia if n.promedio is not None]
-        promedio = round(sum(promedios) / len(promedios), 2) if promedios else None
+    notas_por_horario = defaultdict(list)
+    for nota in NotaMateria.objects.filter(alumno=alumno, horario__in=horarios):
+        notas_por_horario[nota.horario_id].append(nota)
 
-        # --- Calcular predicción ---
-        prediccion = None
-        # Puedes usar el promedio de la materia para el feature vector, o tomar cada horario individual
-        # Aquí usamos el primer horario de la materia como ejemplo
-        if horarios_materia.exists():
-            horario = horarios_materia.first()
-            ex_prom = (
-                ResultadoExamen.objects.filter(
-                    alumno=alumno,
-                    examen__clase=horario.clase,
-                    examen__profesor_materia=horario.profesor_materia,
-                ).aggregate(avg=Avg("nota"))["avg"]
-                or 0
-            )
-            ta_prom = (
-                EntregaTarea.objects.filter(
-                    alumno=alumno,
-                    tarea__clase=horario.clase,
-                    tarea__profesor_materia=horario.profesor_materia,
-                ).aggregate(avg=Avg("nota"))["avg"]
-                or 0
-            )
-            asis_total = Asistencia.objects.filter(horario=horario, alumno=alumno).count()
-            asis_present = Asistencia.objects.filter(
-                horario=horario, alumno=alumno, estado="Presente"
-            ).count()
-            asis_pct = asis_present / asis_total if asis_total else 0
+    # 4. Predicción de cada materia (materializada, o en vivo si está vencida).
+    # Se usa el primer horario de cada materia para el feature vector.
+    predicciones = obtener_predicciones(
+        [(alumno.id, horarios_por_materia[materia][0]) for materia in materias]
+    )
 
-            # --- Predecir con ML ---
-            X = np.array([[ex_prom, ta_prom, asis_pct]])
-            pred = ml_model.predict(X)[0]  # 0: bajo, 1: regular, 2: bueno (o usa tu modelo de nota)
-            prediccion = pred
+    notas = []
+    for materia, prediccion in zip(materias, predicciones):
+        promedios = [
+            n.promedio
+            for horario in horarios_por_materia[materia]
+            for n in notas_por_horario[horario.id]
+            if n.promedio is not None
+        ]
+        promedio = round(sum(promedios) / len(promedios), 2) if promedios else None
 
         notas.append({
             "materia": materia.nombre,
             "promedio": promedio,
-            "prediccion": prediccion,  # Puede ser clase, score, etc.
+            "prediccion": prediccion.score,  # Puede ser clase, score, etc.
         })
 
     return Response({
@@ -1055,8 +841,10 @@ def alumnos_by_horario(request, horario_id):
     except Horario.DoesNotExist:
         return Response({"detail": "Horario no encontrado."}, status=404)
 
-    alumnos = Alumno.objects.filter(inscripciones__clase=horario.clase).distinct()
-    return Response(AlumnoSerializer(alumnos, many=True).data)
+    alumnos = Alumno.objects.filter(inscripciones__clase=horario.clase).distinct().select_related(
+        "usuario__datos_personales"
+    )
+    return paginar(request, alumnos, AlumnoSerializer)
 
 
 @api_view(['GET'])
@@ -1066,11 +854,40 @@ def notas_by_horario(request, horario_id):
     Devuelve todas las notas (NotaMateria) de los alumnos en este horario.
     """
     notas = NotaMateria.objects.filter(horario_id=horario_id)
-    return Response(NotaMateriaSerializer(notas, many=True).data)
+    return paginar(request, notas, NotaMateriaSerializer)
+
+
+CAMPOS_NOTA = ('nota_ser', 'nota_saber', 'nota_hacer', 'nota_decidir')
+
+
+def _validar_calificacion(nota_data, inscritos):
+    """Devuelve (alumno_id, {campo: Decimal | None}, error) de una fila de calificaciones."""
+    try:
+        alumno_id = int(nota_data.get('alumno'))
+    except (TypeError, ValueError):
+        return None, None, 'Alumno inválido'
+    if alumno_id not in inscritos:
+        return alumno_id, None, 'El alumno no está inscrito en la clase'
+
+    valores = {}
+    for campo in CAMPOS_NOTA:
+        valor = nota_data.get(campo)
+        if valor is None or valor == '':
+            valores[campo] = None
+            continue
+        try:
+            valor = Decimal(str(valor))
+        except InvalidOperation:
+            return alumno_id, None, f'{campo} no es un número'
+        if not valor.is_finite() or not 0 <= valor <= 100:
+            return alumno_id, None, f'{campo} debe estar entre 0 y 100'
+        valores[campo] = valor.quantize(Decimal('0.01'))
+    return alumno_id, valores, None
 
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
+@transaction_atomic
 def registrar_notas(request, horario_id):
     """
     Registra o actualiza las notas de los alumnos de un horario.
@@ -1085,29 +902,99 @@ def registrar_notas(request, horario_id):
     clase = horario.clase
     materia = horario.profesor_materia.materia.nombre
 
-    # Alumnos inscritos en la clase de ese horario
-    alumnos = Alumno.objects.filter(inscripciones__clase=clase).distinct()
-    tokens = [alumno.usuario.fb_token for alumno in alumnos if alumno.usuario.fb_token]
-
-    # Registrar/actualizar notas
+    # Validar todo el payload antes de escribir: solo alumnos inscritos y notas de 0 a 100
+    inscritos = set(Inscripcion.objects.filter(clase=clase).values_list('alumno_id', flat=True))
+    notas, errores = {}, []
     for nota_data in calificaciones:
-        NotaMateria.objects.update_or_create(
-            alumno_id=nota_data['alumno'],
-            horario=horario,
-            defaults={
-                'nota_ser': nota_data.get('nota_ser'),
-                'nota_saber': nota_data.get('nota_saber'),
-                'nota_hacer': nota_data.get('nota_hacer'),
-                'nota_decidir': nota_data.get('nota_decidir'),
-            }
+        alumno_id, valores, error = _validar_calificacion(nota_data, inscritos)
+        if error:
+            errores.append({'alumno': nota_data.get('alumno'), 'error': error})
+        else:
+            # Un alumno repetido se queda con su última fila
+            notas[alumno_id] = NotaMateria(alumno_id=alumno_id, horario=horario, **valores)
+    if errores:
+        return Response(
+            {'success': False, 'message': 'Hay calificaciones inválidas', 'errores': errores},
+            status=400,
         )
 
-    # Notificar por Firebase (si hay tokens)
-    if tokens:
-        enviar_notificaciones_fb(
-            tokens, 
-            "Calificaciones actualizadas", 
-            f"Tus calificaciones de {materia} han sido actualizadas."
-        )
+    existentes = set(
+        NotaMateria.objects.filter(horario=horario, alumno_id__in=notas).values_list('alumno_id', flat=True)
+    )
+    NotaMateria.objects.bulk_create(
+        notas.values(),
+        update_conflicts=True,
+        unique_fields=['alumno', 'horario'],
+        update_fields=list(CAMPOS_NOTA),
+    )
+    # bulk_create no dispara las señales que marcan las predicciones
+    for alumno_id in notas:
+        marcar_horario(alumno_id, horario.id)
+
+    resultados = [
+        {**NotaMateriaSerializer(nota).data, 'created': alumno_id not in existentes}
+        for alumno_id, nota in notas.items()
+    ]
+
+    # Notificar por Firebase: se encola en la misma transacción y la envía `enviar_notificaciones`
+    tokens = (
+        Alumno.objects.filter(id__in=notas, usuario__fb_token__isnull=False)
+        .exclude(usuario__fb_token='')
+        .values_list('usuario__fb_token', flat=True)
+    )
+    encolar_notificacion(
+        tokens,
+        "Calificaciones actualizadas",
+        f"Tus calificaciones de {materia} han sido actualizadas."
+    )
+
+    return Response({
+        'success': True,
+        'message': 'Calificaciones guardadas correctamente',
+        'resultados': resultados,
+    })
 
-    return Response({'success': True, 'message': 'Calificaciones guardadas correctamente'})
\ No newline at end of file
+
+@swagger_auto_schema(
+    method="get",
+    manual_parameters=[
+        openapi.Parameter(
+            "formato",
+            openapi.IN_QUERY,
+            description="csv (por defecto) o ndjson",
+            type=openapi.TYPE_STRING,
+        ),
+        openapi.Parameter("gestion_id", openapi.IN_QUERY, type=openapi.TYPE_INTEGER),
+        openapi.Parameter("clase_id", openapi.IN_QUERY, type=openapi.TYPE_INTEGER),
+        openapi.Parameter("materia_id", openapi.IN_QUERY, type=openapi.TYPE_INTEGER),
+    ],
+    operation_summary="Exportar asistencias, notas, entregas o resultados",
+)
+@api_view(["GET"])
+@permission_classes([IsAuthenticated, IsAdminUser])
+@lectura_en_replica
+def exportar(request, recurso):
+    """
+    Descarga completa de un recurso (asistencias, notas, entregas o resultados) en streaming.
+    GET /academico/exportar/asistencias/?formato=ndjson&gestion_id=1&materia_id=2
+    """
+    if recurso not in RECURSOS:
+        return Response({"detail": "Recurso no encontrado."}, status=404)
+    formato = request.query_params.get("formato", "csv")
+    if formato not in FORMATOS:
+        return Response({"detail": "Formato inválido. Use csv o ndjson."}, status=400)
+
+    filtros = {}
+    for parametro in ("gestion_id", "clase_id", "materia_id"):
+        valor = request.query_params.get(parametro)
+        if valor is None:
+            continue
+        if not valor.isdigit():
+            return Response({"detail": f"{parametro} inválido."}, status=400)
+        filtros[parametro] = int(valor)
+
+    columnas, iterador = filas(recurso, **filtros)
+    generador = como_csv if formato == "csv" else como_ndjson
+    respuesta = StreamingHttpResponse(generador(columnas, iterador), content_type=FORMATOS[formato])
+    respuesta["Content-Disposition"] = f'attachment; filename="{recurso}.{formato}"'
+    return respuesta
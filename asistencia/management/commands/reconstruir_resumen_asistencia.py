@@ -0,0 +1,20 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from asistencia.resumen import reconstruir_resumen
+
+
+class Command(BaseCommand):
+    help = "Reconstruye AsistenciaResumen a partir de los registros de Asistencia."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--horario", type=int, action="append", dest="horarios", help="Solo este horario (repetible)")
+        parser.add_argument("--lote", type=int, default=5000, help="Filas escritas por lote")
+
+    def handle(self, *args, **options):
+        inicio = time.perf_counter()
+        escritos = reconstruir_resumen(options["horarios"], tamano_lote=options["lote"])
+        self.stdout.write(
+            self.style.SUCCESS(f"{escritos} resúmenes de asistencia en {time.perf_counter() - inicio:.2f}s")
+        )
@@ -73,7 +73,30 @@ class Asistencia(models.Model):
 
     class Meta:
         unique_together = ('horario', 'alumno', 'fecha')
+        indexes = [
+            # Historial y conteos por alumno (el unique ya cubre las búsquedas que empiezan por horario)
+            models.Index(fields=['alumno', 'horario', 'estado'], name='asist_alumno_horario_idx'),
+        ]
 
     def __str__(self):
         return f'Asistencia: {self.alumno.usuario.username} - {self.horario} - {self.fecha} - {self.estado}'
-    
\ No newline at end of file
+
+
+class AsistenciaResumen(models.Model):
+    """Conteos de asistencia por (horario, alumno), mantenidos por los endpoints de registro."""
+    horario = models.ForeignKey(Horario, on_delete=models.CASCADE, related_name='resumenes_asistencia')
+    alumno = models.ForeignKey('usuarios.Alumno', on_delete=models.CASCADE, related_name='resumenes_asistencia')
+    total = models.PositiveIntegerField(default=0)
+    presentes = models.PositiveIntegerField(default=0)
+    ausentes = models.PositiveIntegerField(default=0)
+    justificados = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('horario', 'alumno')
+
+    @property
+    def porcentaje(self):
+        return self.presentes / self.total if self.total else 0
+
+    def __str__(self):
+        return f'Resumen: {self.alumno.usuario.username} - {self.horario_id} - {self.presentes}/{self.total}'
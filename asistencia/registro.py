@@ -0,0 +1,47 @@
+"""
+Escritura en bloque de asistencias.
+
+Los endpoints de registro validan el payload y llaman a guardar_asistencias()
+con todas las filas de la petición: una consulta para saber cuáles ya
+existían y un único INSERT ... ON CONFLICT para escribirlas.
+"""
+from academico.predicciones import marcar_horario
+from .models import Asistencia
+from .resumen import actualizar_resumen
+
+ESTADOS = {estado for estado, _ in Asistencia._meta.get_field('estado').choices}
+
+
+def guardar_asistencias(filas, batch_size=1000):
+    """
+    Upsert de {(horario_id, alumno_id, fecha): estado}. Devuelve las claves que ya existían.
+
+    bulk_create no dispara señales, así que aquí mismo se actualiza
+    AsistenciaResumen y se marcan las predicciones afectadas.
+    """
+    if not filas:
+        return set()
+
+    horarios_ids, alumnos_ids, fechas = (set(c) for c in zip(*filas))
+    existentes = set(
+        Asistencia.objects.filter(
+            horario_id__in=horarios_ids, alumno_id__in=alumnos_ids, fecha__in=fechas
+        ).values_list('horario_id', 'alumno_id', 'fecha')
+    ) & filas.keys()
+
+    Asistencia.objects.bulk_create(
+        [
+            Asistencia(horario_id=horario_id, alumno_id=alumno_id, fecha=fecha, estado=estado)
+            for (horario_id, alumno_id, fecha), estado in filas.items()
+        ],
+        batch_size=batch_size,
+        update_conflicts=True,
+        unique_fields=['horario', 'alumno', 'fecha'],
+        update_fields=['estado'],
+    )
+
+    pares = {(horario_id, alumno_id) for horario_id, alumno_id, _ in filas}
+    actualizar_resumen(pares)
+    for horario_id, alumno_id in pares:
+        marcar_horario(alumno_id, horario_id)
+    return existentes
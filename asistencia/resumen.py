@@ -0,0 +1,119 @@
+"""
+Mantenimiento de AsistenciaResumen.
+
+Los endpoints de registro, que escriben con bulk_create y no disparan señales,
+llaman a actualizar_resumen() con los pares que tocaron. Cualquier otra
+escritura de Asistencia (admin, .save(), borrados en cascada) llega por las
+señales de academico/signals.py a marcar_resumen(), que recalcula sus pares
+una vez al confirmarse la transacción. reconstruir_resumen() rehace la tabla
+completa (o la de unos horarios) a partir de Asistencia, por ejemplo tras una
+carga masiva.
+"""
+from django.db import transaction
+from django.db.models import Count, Q
+
+from colegio_backend.transacciones import pendiente
+from .models import Asistencia, AsistenciaResumen
+
+CAMPOS_CONTEO = ['total', 'presentes', 'ausentes', 'justificados']
+
+
+def _conteos(queryset):
+    return (
+        queryset.values('horario_id', 'alumno_id')
+        .annotate(
+            total=Count('id'),
+            presentes=Count('id', filter=Q(estado='Presente')),
+            ausentes=Count('id', filter=Q(estado='Ausente')),
+            justificados=Count('id', filter=Q(estado='Justificado')),
+        )
+        .order_by()
+    )
+
+
+def _guardar(resumenes, batch_size=1000):
+    AsistenciaResumen.objects.bulk_create(
+        resumenes,
+        batch_size=batch_size,
+        update_conflicts=True,
+        unique_fields=['horario', 'alumno'],
+        update_fields=CAMPOS_CONTEO,
+    )
+
+
+def contar(pares):
+    """
+    Conteos de los pares (horario_id, alumno_id) desde Asistencia, con una
+    consulta agrupada: {par: fila}. Los pares sin registros no aparecen.
+    """
+    pares = set(pares)
+    if not pares:
+        return {}
+    conteos = _conteos(
+        Asistencia.objects.filter(
+            horario_id__in={horario_id for horario_id, _ in pares},
+            alumno_id__in={alumno_id for _, alumno_id in pares},
+        )
+    )
+    return {
+        (fila['horario_id'], fila['alumno_id']): fila
+        for fila in conteos
+        if (fila['horario_id'], fila['alumno_id']) in pares
+    }
+
+
+def actualizar_resumen(pares):
+    """Recalcula el resumen de los pares (horario_id, alumno_id) con una consulta agrupada."""
+    pares = set(pares)
+    if not pares:
+        return
+    conteos = contar(pares)
+    # Sin registros (p. ej. borrados en cascada con su horario o alumno) la fila sobra
+    vacios = Q()
+    for horario_id, alumno_id in pares - conteos.keys():
+        vacios |= Q(horario_id=horario_id, alumno_id=alumno_id)
+    if vacios:
+        AsistenciaResumen.objects.filter(vacios).delete()
+    _guardar([
+        AsistenciaResumen(
+            horario_id=horario_id,
+            alumno_id=alumno_id,
+            **{campo: fila[campo] for campo in CAMPOS_CONTEO},
+        )
+        for (horario_id, alumno_id), fila in conteos.items()
+    ])
+
+
+class _Pendientes:
+    def __init__(self):
+        self.pares = set()
+
+    def __call__(self):
+        actualizar_resumen(self.pares)
+
+
+def marcar_resumen(horario_id, alumno_id):
+    """Recalcula el resumen del par al confirmarse la transacción, una sola vez aunque cambien varios registros."""
+    with pendiente(_Pendientes) as pendientes:
+        pendientes.pares.add((horario_id, alumno_id))
+
+
+@transaction.atomic
+def reconstruir_resumen(horarios_ids=None, tamano_lote=5000):
+    """Rehace los resúmenes desde Asistencia. Devuelve cuántos pares escribió."""
+    asistencias = Asistencia.objects.all()
+    resumenes = AsistenciaResumen.objects.all()
+    if horarios_ids is not None:
+        asistencias = asistencias.filter(horario_id__in=horarios_ids)
+        resumenes = resumenes.filter(horario_id__in=horarios_ids)
+    resumenes.delete()
+
+    escritos, lote = 0, []
+    for fila in _conteos(asistencias).iterator(chunk_size=tamano_lote):
+        lote.append(AsistenciaResumen(**fila))
+        if len(lote) >= tamano_lote:
+            _guardar(lote)
+            escritos += len(lote)
+            lote = []
+    _guardar(lote)
+    return escritos + len(lote)
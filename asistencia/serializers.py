@@ -1,6 +1,36 @@
+from django.db.models import Prefetch
 from rest_framework import serializers
 
-from .models import Dia, Horario, Periodo, Asistencia, HorarioDia
+from .models import Dia, Horario, Periodo, Asistencia, HorarioDia, AsistenciaResumen
+
+
+def optimizar_horarios(queryset):
+    """
+    Carga por adelantado todo lo que recorre HorarioSerializer: clase con curso,
+    gestión y sus horarios con días, y profesor_materia con materia y usuario.
+
+    Serializar N horarios cuesta así un número fijo de consultas. Para horarios
+    anidados en otro modelo se usa como Prefetch('horario', queryset=optimizar_horarios(...)).
+    """
+    dias = HorarioDia.objects.select_related('dia')
+    return queryset.select_related(
+        'clase__curso',
+        'clase__gestion',
+        'profesor_materia__materia',
+        'profesor_materia__profesor__usuario__datos_personales',
+    ).prefetch_related(
+        Prefetch('horarios_dias', queryset=dias),
+        Prefetch('clase__horarios__horarios_dias', queryset=dias),
+    )
+
+
+def _nombres_dias(horario):
+    # Con optimizar_horarios los días ya están en caché; sin él, una sola consulta con el día
+    if 'horarios_dias' in getattr(horario, '_prefetched_objects_cache', {}):
+        horarios_dias = horario.horarios_dias.all()
+    else:
+        horarios_dias = horario.horarios_dias.select_related('dia')
+    return [hd.dia.nombre for hd in horarios_dias]
 
 # Serializer básico para Dia
 class DiaSerializer(serializers.ModelSerializer):
@@ -26,7 +56,7 @@ class HorarioSerializer(serializers.ModelSerializer):
         fields = ['id', 'clase', 'profesor_materia', 'dias']
 
     def get_dias(self, obj):
-        return [hd.dia.nombre for hd in obj.horarios_dias.select_related('dia').all()]
+        return _nombres_dias(obj)
     def get_profesor_materia(self, obj):
         from academico.serializers import AsignacionProfesorMateriaSerializer
         return AsignacionProfesorMateriaSerializer(obj.profesor_materia).data
@@ -42,7 +72,7 @@ class HorarioMiniSerializer(serializers.ModelSerializer):
         fields = ['id', 'clase', 'profesor_materia', 'dias']
 
     def get_dias(self, obj):
-        return [hd.dia.nombre for hd in obj.horarios_dias.select_related('dia').all()]
+        return _nombres_dias(obj)
 
 
 # Serializer para Periodo
@@ -69,3 +99,22 @@ class AsistenciaSerializer(serializers.ModelSerializer):
             'username': obj.alumno.usuario.username,
             'correo': obj.alumno.usuario.correo
         }
+
+
+# Serializer para AsistenciaResumen
+class AsistenciaResumenSerializer(serializers.ModelSerializer):
+    alumno = serializers.SerializerMethodField()
+    porcentaje = serializers.SerializerMethodField()
+
+    class Meta:
+        model = AsistenciaResumen
+        fields = ['id', 'horario', 'alumno', 'total', 'presentes', 'ausentes', 'justificados', 'porcentaje']
+
+    def get_alumno(self, obj):
+        return {
+            'id': obj.alumno.id,
+            'username': obj.alumno.usuario.username,
+        }
+
+    def get_porcentaje(self, obj):
+        return round(obj.porcentaje * 100, 2)
@@ -1,3 +1,229 @@
+from datetime import date, timedelta
+
+from django.db import connection, transaction
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from academico.models import AsignacionProfesorMateria, Clase, Curso, Gestion, Materia
+from usuarios.models import Alumno, Profesor, Usuario
+from .models import Asistencia, AsistenciaResumen, Dia, Horario, HorarioDia
+from .resumen import actualizar_resumen, reconstruir_resumen
+
+
+class HorarioSerializerConsultasTests(TestCase):
+    """Serializar horarios debe costar las mismas consultas con 2 o con 8 horarios."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = Usuario.objects.create_user('prof', 'clave', correo='prof@colegio.bo')
+        cls.profesor = Profesor.objects.create(usuario=cls.usuario, especialidad='Ciencias')
+        usuario_alumno = Usuario.objects.create_user('alumno', 'clave', correo='alumno@colegio.bo')
+        cls.alumno = Alumno.objects.create(usuario=usuario_alumno)
+        cls.clase = Clase.objects.create(
+            curso=Curso.objects.create(curso=1),
+            gestion=Gestion.objects.create(anio=2025, trimestre=1),
+        )
+        cls.dias = [Dia.objects.create(nombre=nombre) for nombre in ('Lunes', 'Miercoles', 'Viernes')]
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.usuario)
+
+    def crear_horarios(self, cantidad):
+        for i in range(Horario.objects.count(), cantidad):
+            asignacion = AsignacionProfesorMateria.objects.create(
+                profesor=self.profesor, materia=Materia.objects.create(nombre=f'Materia {i}')
+            )
+            horario = Horario.objects.create(clase=self.clase, profesor_materia=asignacion)
+            for dia in self.dias[: 1 + i % 3]:
+                HorarioDia.objects.create(horario=horario, dia=dia)
+            for dias_atras in range(2):
+                Asistencia.objects.create(
+                    horario=horario,
+                    alumno=self.alumno,
+                    fecha=date(2025, 3, 1) - timedelta(days=dias_atras),
+                    estado='Presente',
+                )
+
+    def contar_consultas(self, url, cantidad):
+        self.crear_horarios(cantidad)
+        with CaptureQueriesContext(connection) as consultas:
+            respuesta = self.client.get(url)
+        self.assertEqual(respuesta.status_code, 200)
+        return len(consultas)
+
+    def assertConsultasConstantes(self, url):
+        con_pocos = self.contar_consultas(url, 2)
+        con_muchos = self.contar_consultas(url, 8)
+        self.assertEqual(con_pocos, con_muchos)
+
+    def test_mis_horarios(self):
+        self.assertConsultasConstantes(reverse('mis-horarios'))
+
+    def test_horario_viewset(self):
+        self.assertConsultasConstantes(reverse('horario-list'))
+
+    def test_listar_asistencias(self):
+        # Todas las asistencias del alumno en un mismo horario
+        self.crear_horarios(8)
+        horario = Horario.objects.order_by('id').first()
+        url = reverse('listar-asistencias-alumno-horario')
+        params = {'alumno_id': self.alumno.id, 'horario_id': horario.id}
+        with CaptureQueriesContext(connection) as consultas:
+            respuesta = self.client.get(url, params)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(len(respuesta.data['results']), 2)
+        self.assertEqual(respuesta.data['results'][0]['horario']['dias'], ['Lunes'])
+        self.assertLessEqual(len(consultas), 8)
+
+    def test_listar_asistencias_por_cursor(self):
+        self.crear_horarios(1)
+        horario = Horario.objects.get()
+        for dias_atras in range(2, 5):
+            Asistencia.objects.create(
+                horario=horario, alumno=self.alumno, fecha=date(2025, 3, 1) - timedelta(days=dias_atras)
+            )
+        url = reverse('listar-asistencias-alumno-horario')
+        respuesta = self.client.get(url, {'alumno_id': self.alumno.id, 'horario_id': horario.id, 'page_size': 2})
+        fechas = []
+        while True:
+            self.assertLessEqual(len(respuesta.data['results']), 2)
+            fechas += [a['fecha'] for a in respuesta.data['results']]
+            if not respuesta.data['next']:
+                break
+            respuesta = self.client.get(respuesta.data['next'])
+        self.assertEqual(fechas, sorted(fechas))
+        self.assertEqual(len(fechas), 5)
+
+    def test_dias_se_leen_de_la_cache(self):
+        self.crear_horarios(3)
+        respuesta = self.client.get(reverse('mis-horarios'))
+        dias = {h['id']: h['dias'] for h in respuesta.data['results']}
+        for horario in Horario.objects.prefetch_related('horarios_dias__dia'):
+            self.assertCountEqual(dias[horario.id], [hd.dia.nombre for hd in horario.horarios_dias.all()])
+
+
+class RegistrarAsistenciasTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        usuario = Usuario.objects.create_user('prof', 'clave', correo='prof@colegio.bo')
+        cls.usuario = usuario
+        profesor = Profesor.objects.create(usuario=usuario, especialidad='Ciencias')
+        clase = Clase.objects.create(
+            curso=Curso.objects.create(curso=1),
+            gestion=Gestion.objects.create(anio=2025, trimestre=1),
+        )
+        asignacion = AsignacionProfesorMateria.objects.create(
+            profesor=profesor, materia=Materia.objects.create(nombre='Física')
+        )
+        cls.horario = Horario.objects.create(clase=clase, profesor_materia=asignacion)
+        cls.alumnos = [
+            Alumno.objects.create(
+                usuario=Usuario.objects.create(username=f'alumno{i}', correo=f'a{i}@colegio.bo')
+            )
+            for i in range(30)
+        ]
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.usuario)
+
+    def registrar(self, payload):
+        return self.client.post(reverse('registrar-asistencias-multiples'), payload, format='json')
+
+    def test_created_por_fila_y_resumen(self):
+        primero, segundo = self.alumnos[:2]
+        self.registrar([{'alumno_id': primero.id, 'horario_id': self.horario.id, 'estado': 'Presente'}])
+
+        respuesta = self.registrar([
+            {'alumno_id': primero.id, 'horario_id': self.horario.id, 'estado': 'Ausente'},
+            {'alumno_id': segundo.id, 'horario_id': self.horario.id, 'estado': 'Presente'},
+            {'alumno_id': segundo.id, 'horario_id': self.horario.id, 'estado': 'Justificado'},
+            {'alumno_id': 999999, 'horario_id': self.horario.id, 'estado': 'Presente'},
+            {'alumno_id': segundo.id, 'horario_id': self.horario.id, 'estado': 'Tarde'},
+        ])
+
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual([r['created'] for r in respuesta.data['registros']], [False, True, False])
+        self.assertEqual(
+            [e['error'] for e in respuesta.data['errores']], ['Estado inválido', 'Alumno o Horario no existe']
+        )
+        estados = dict(Asistencia.objects.values_list('alumno_id', 'estado'))
+        self.assertEqual(estados, {primero.id: 'Ausente', segundo.id: 'Justificado'})
+        resumen = AsistenciaResumen.objects.get(horario=self.horario, alumno=segundo)
+        self.assertEqual((resumen.total, resumen.justificados), (1, 1))
+
+    def test_consultas_no_dependen_del_tamano(self):
+        def consultas(alumnos):
+            payload = [
+                {'alumno_id': a.id, 'horario_id': self.horario.id, 'estado': 'Presente'} for a in alumnos
+            ]
+            with CaptureQueriesContext(connection) as capturadas:
+                self.assertEqual(self.registrar(payload).status_code, 200)
+            return len(capturadas)
+
+        self.assertEqual(consultas(self.alumnos[:3]), consultas(self.alumnos[3:]))
+
+
+class ResumenAsistenciaTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        profesor = Profesor.objects.create(
+            usuario=Usuario.objects.create(username='prof', correo='prof@colegio.bo'), especialidad='Ciencias'
+        )
+        clase = Clase.objects.create(
+            curso=Curso.objects.create(curso=1),
+            gestion=Gestion.objects.create(anio=2025, trimestre=1),
+        )
+        cls.horario = Horario.objects.create(
+            clase=clase,
+            profesor_materia=AsignacionProfesorMateria.objects.create(
+                profesor=profesor, materia=Materia.objects.create(nombre='Física')
+            ),
+        )
+        cls.alumno = Alumno.objects.create(usuario=Usuario.objects.create(username='alumno', correo='a@colegio.bo'))
+        # bulk_create, sin señales: que ninguna prueba arranque con un resumen pendiente
+        Asistencia.objects.bulk_create([
+            Asistencia(horario=cls.horario, alumno=cls.alumno, fecha=date(2025, 3, dia), estado=estado)
+            for dia, estado in enumerate(['Presente', 'Presente', 'Ausente', 'Justificado'], start=1)
+        ])
+
+    def conteos(self):
+        resumen = AsistenciaResumen.objects.get(horario=self.horario, alumno=self.alumno)
+        return resumen.total, resumen.presentes, resumen.ausentes, resumen.justificados
+
+    def test_reconstruir_desde_asistencia(self):
+        self.assertEqual(reconstruir_resumen(), 1)
+        self.assertEqual(self.conteos(), (4, 2, 1, 1))
+
+    def test_actualizar_tras_cambios_y_borrados(self):
+        par = (self.horario.id, self.alumno.id)
+        actualizar_resumen([par])
+        Asistencia.objects.filter(estado='Ausente').update(estado='Presente')
+        actualizar_resumen([par])
+        self.assertEqual(self.conteos(), (4, 3, 0, 1))
+        # Sin registros la fila sobra: no quedan conteos viejos
+        Asistencia.objects.all().delete()
+        actualizar_resumen([par])
+        self.assertFalse(AsistenciaResumen.objects.exists())
+
+    def test_escrituras_por_el_orm(self):
+        reconstruir_resumen()
+        asistencia = Asistencia.objects.get(estado='Ausente')
+        with self.captureOnCommitCallbacks(execute=True), transaction.atomic():
+            asistencia.estado = 'Presente'
+            asistencia.save()
+            Asistencia.objects.create(horario=self.horario, alumno=self.alumno, fecha=date(2025, 3, 5))
+        self.assertEqual(self.conteos(), (5, 4, 0, 1))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Asistencia.objects.get(estado='Justificado').delete()
+        self.assertEqual(self.conteos(), (4, 4, 0, 0))
 
-# Create your tests here.
+    def test_borrado_en_cascada(self):
+        reconstruir_resumen()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.horario.delete()
+        self.assertFalse(AsistenciaResumen.objects.exists())
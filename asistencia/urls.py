@@ -1,5 +1,5 @@
 from django.urls import path
-from .views import registrar_asistencia, listar_asistencias_alumno_horario, registrar_asistencias_multiples, get_horario, HorarioViewSet, registrar_horario
+from .views import registrar_asistencia, listar_asistencias_alumno_horario, registrar_asistencias_multiples, get_horario, HorarioViewSet, registrar_horario, resumen_asistencia
 from rest_framework.routers import DefaultRouter
 from django.conf.urls import include
 
@@ -13,5 +13,6 @@ urlpatterns = [
     path('horario/', get_horario, name='get-horario-default'), 
     path('horario/<int:horario_id>/', get_horario, name='get-horario'),
     path('registrar-horario/', registrar_horario, name='registrar-horario'),
+    path('resumen/<int:horario_id>/', resumen_asistencia, name='resumen-asistencia'),
     path('', include(router.urls)),
 ]
@@ -2,21 +2,39 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from django.utils import timezone
+from django.db.transaction import atomic as transaction_atomic
 from usuarios.permissions import has_role
-from .models import Horario, Asistencia, Dia, HorarioDia
+from .models import Horario, Asistencia, Dia, HorarioDia, AsistenciaResumen
+from .registro import ESTADOS, guardar_asistencias
 from usuarios.models import Alumno
-from .serializers import AsistenciaSerializer, HorarioSerializer
+from .serializers import (
+    AsistenciaSerializer,
+    HorarioSerializer,
+    AsistenciaResumenSerializer,
+    optimizar_horarios,
+)
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 from datetime import date
+from django.db.models import Prefetch
 from rest_framework import viewsets
 from academico.models import Clase, AsignacionProfesorMateria
+from colegio_backend.pagination import paginar
+from colegio_backend.routers import lectura_en_replica
 
 
 class HorarioViewSet(viewsets.ModelViewSet):
-    queryset = Horario.objects.all()
+    queryset = optimizar_horarios(Horario.objects.all())
     serializer_class = HorarioSerializer
 
+
+def _con_horario(asistencias):
+    """Precarga alumno y horario (con todo lo que anida HorarioSerializer) para AsistenciaSerializer."""
+    return asistencias.select_related('alumno__usuario').prefetch_related(
+        Prefetch('horario', queryset=optimizar_horarios(Horario.objects.all()))
+    )
+
+
 @swagger_auto_schema(
     method='post',
     request_body=openapi.Schema(
@@ -32,6 +50,7 @@ class HorarioViewSet(viewsets.ModelViewSet):
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 @has_role('profesor')
+@transaction_atomic
 def registrar_asistencia(request, horario_id):
     """Registrar asistencia para un horario en una fecha dada."""
     profesor = request.user.profesor
@@ -49,19 +68,30 @@ def registrar_asistencia(request, horario_id):
     else:
         fecha = timezone.now().date()
 
-    registros = request.data.get('asistencias', [])
-    for item in registros:
+    # Si un alumno viene repetido gana la última fila, como con update_or_create en orden
+    filas = {}
+    for item in request.data.get('asistencias', []):
         alumno_id = item.get('alumno')
         estado = item.get('estado', 'Presente')
         if not alumno_id:
             continue
-        Asistencia.objects.update_or_create(
-            horario=horario,
-            alumno_id=alumno_id,
-            fecha=fecha,
-            defaults={'estado': estado},
+        if estado not in ESTADOS:
+            return Response({'detail': f'Estado inválido: {estado}'}, status=400)
+        try:
+            alumno_id = int(alumno_id)
+        except (TypeError, ValueError):
+            return Response({'detail': f'Alumno inválido: {alumno_id}'}, status=400)
+        filas[(horario.id, alumno_id, fecha)] = estado
+
+    alumnos_ids = {alumno_id for _, alumno_id, _ in filas}
+    existentes = set(Alumno.objects.filter(id__in=alumnos_ids).values_list('id', flat=True))
+    if alumnos_ids - existentes:
+        return Response(
+            {'detail': 'Alumnos no encontrados', 'alumnos': sorted(alumnos_ids - existentes)},
+            status=400,
         )
 
+    guardar_asistencias(filas)
     return Response({'detail': 'Asistencia registrada'})
 
 
@@ -77,8 +107,7 @@ def get_asistencias(request, horario_id):
         return Response({'detail': 'Horario no encontrado'}, status=404)
 
     asistencias = Asistencia.objects.filter(horario=horario)
-    serializer = AsistenciaSerializer(asistencias, many=True)
-    return Response(serializer.data)
+    return paginar(request, _con_horario(asistencias), AsistenciaSerializer)
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
@@ -91,8 +120,7 @@ def get_asistencias_by_alumno(request, alumno_id):
         return Response({'detail': 'Alumno no encontrado'}, status=404)
 
     asistencias = Asistencia.objects.filter(alumno=alumno)
-    serializer = AsistenciaSerializer(asistencias, many=True)
-    return Response(serializer.data)
+    return paginar(request, _con_horario(asistencias), AsistenciaSerializer)
 
 
 @api_view(['GET'])
@@ -108,13 +136,33 @@ def listar_asistencias_alumno_horario(request):
     if not alumno_id or not horario_id:
         return Response({'detail': 'Debe especificar alumno_id y horario_id.'}, status=400)
 
-    asistencias = Asistencia.objects.filter(alumno_id=alumno_id, horario_id=horario_id).order_by('fecha')
-    serializer = AsistenciaSerializer(asistencias, many=True)
+    # (horario, alumno, fecha) es único, así que la fecha sirve de cursor
+    asistencias = Asistencia.objects.filter(alumno_id=alumno_id, horario_id=horario_id)
+    return paginar(request, _con_horario(asistencias), AsistenciaSerializer, ordering='fecha')
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@has_role('profesor')
+@lectura_en_replica
+def resumen_asistencia(request, horario_id):
+    """Conteos y porcentaje de asistencia de cada alumno de un horario del profesor."""
+    profesor = request.user.profesor
+    if not Horario.objects.filter(id=horario_id, profesor_materia__profesor=profesor).exists():
+        return Response({'detail': 'Horario no encontrado'}, status=404)
+
+    resumenes = (
+        AsistenciaResumen.objects.filter(horario_id=horario_id)
+        .select_related('alumno__usuario')
+        .order_by('alumno_id')
+    )
+    serializer = AsistenciaResumenSerializer(resumenes, many=True)
     return Response(serializer.data)
 
 
 @api_view(["POST"])
 @permission_classes([IsAuthenticated])
+@transaction_atomic
 def registrar_asistencias_multiples(request):
     """
     Recibe una lista de asistencias para alumnos a un horario en la fecha de hoy.
@@ -134,36 +182,49 @@ def registrar_asistencias_multiples(request):
     registros = []
     errores = []
 
+    completas = []
     for entry in datos:
         alumno_id = entry.get("alumno_id")
         horario_id = entry.get("horario_id")
         estado = entry.get("estado")
         if not (alumno_id and horario_id and estado):
             errores.append({"alumno_id": alumno_id, "horario_id": horario_id, "error": "Datos incompletos"})
-            continue
+        elif estado not in ESTADOS:
+            errores.append({"alumno_id": alumno_id, "horario_id": horario_id, "error": "Estado inválido"})
+        elif not (str(alumno_id).isdigit() and str(horario_id).isdigit()):
+            errores.append({"alumno_id": alumno_id, "horario_id": horario_id, "error": "Alumno o Horario no existe"})
+        else:
+            completas.append((int(alumno_id), int(horario_id), estado))
 
-        try:
-            alumno = Alumno.objects.get(id=alumno_id)
-            horario = Horario.objects.get(id=horario_id)
-        except (Alumno.DoesNotExist, Horario.DoesNotExist):
+    # Validar todos los ids con dos consultas en lugar de dos por fila
+    alumnos_validos = set(
+        Alumno.objects.filter(id__in={a for a, _, _ in completas}).values_list("id", flat=True)
+    )
+    horarios_validos = set(
+        Horario.objects.filter(id__in={h for _, h, _ in completas}).values_list("id", flat=True)
+    )
+
+    filas = {}
+    for alumno_id, horario_id, estado in completas:
+        if alumno_id not in alumnos_validos or horario_id not in horarios_validos:
             errores.append({"alumno_id": alumno_id, "horario_id": horario_id, "error": "Alumno o Horario no existe"})
             continue
-
-        # Crea o actualiza (si ya existe ese registro para ese día)
-        asistencia, created = Asistencia.objects.update_or_create(
-            alumno=alumno,
-            horario=horario,
-            fecha=hoy,
-            defaults={"estado": estado}
-        )
+        filas[(horario_id, alumno_id, hoy)] = estado
         registros.append({
             "alumno_id": alumno_id,
             "horario_id": horario_id,
             "estado": estado,
             "fecha": str(hoy),
-            "created": created
         })
-    
+
+    # Crea o actualiza (si ya existe ese registro para ese día). Una fila repetida en el
+    # payload cuenta como creada solo la primera vez, igual que al guardarlas de a una.
+    ya_existian = guardar_asistencias(filas)
+    for registro in registros:
+        clave = (registro["horario_id"], registro["alumno_id"], hoy)
+        registro["created"] = clave not in ya_existian
+        ya_existian.add(clave)
+
     return Response({
         "registros": registros,
         "errores": errores
@@ -180,7 +241,7 @@ def get_horario(request, horario_id=None):
 
     if horario_id is not None:
         try:
-            horario = Horario.objects.get(pk=horario_id)
+            horario = optimizar_horarios(Horario.objects.all()).get(pk=horario_id)
         except Horario.DoesNotExist:
             return Response({"detail": "Horario no encontrado."}, status=404)
     else:
@@ -190,10 +251,8 @@ def get_horario(request, horario_id=None):
         except AttributeError:
             return Response({"detail": "Solo los profesores pueden usar esta función por defecto."}, status=403)
         horario = (
-            Horario.objects
-            .filter(profesor_materia__profesor=profesor)
+            optimizar_horarios(Horario.objects.filter(profesor_materia__profesor=profesor))
             .order_by("-id")
-            .select_related("clase", "profesor_materia")
             .first()
         )
         if not horario:
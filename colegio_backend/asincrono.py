@@ -0,0 +1,66 @@
+"""
+Apoyo para vistas async bajo ASGI (colegio_backend/asgi.py).
+
+DRF no tiene vistas async: api_view_async hace con una vista `async def` lo
+que @api_view(["GET"]) hace con una sync (autenticación, permisos de
+@permission_classes, manejo de excepciones y renderizado), pasando a un hilo
+solo lo que consulta la base.
+
+en_paralelo corre funciones sync que usan el ORM a la vez, en un pool de
+ASYNC_HILOS hilos compartido por todo el proceso: el pool acota cuántas
+consultas de estas vistas hay en curso y, con él, las conexiones que abren.
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from rest_framework.exceptions import MethodNotAllowed
+from rest_framework.views import APIView
+
+_ejecutor = ThreadPoolExecutor(max_workers=settings.ASYNC_HILOS, thread_name_prefix='en-paralelo')
+
+
+def _en_hilo(funcion):
+    # Los hilos del pool no pasan por request_started/request_finished: cada llamada
+    # cierra, como haría una petición, las conexiones vencidas o rotas de su hilo
+    close_old_connections()
+    try:
+        return funcion()
+    finally:
+        close_old_connections()
+
+
+async def en_paralelo(*funciones):
+    """Ejecuta a la vez funciones sin argumentos (functools.partial) y devuelve sus resultados en orden."""
+    return await asyncio.gather(
+        *(sync_to_async(_en_hilo, thread_sensitive=False, executor=_ejecutor)(funcion) for funcion in funciones)
+    )
+
+
+def api_view_async(vista):
+    """@api_view(["GET"]) para vistas async. Va arriba de @permission_classes."""
+
+    class Vista(APIView):
+        permission_classes = getattr(vista, 'permission_classes', APIView.permission_classes)
+
+    @wraps(vista)
+    async def envoltura(request, *args, **kwargs):
+        api = Vista()
+        api.args, api.kwargs = args, kwargs
+        request = api.request = api.initialize_request(request, *args, **kwargs)
+        api.headers = api.default_response_headers
+        try:
+            if request.method != 'GET':
+                raise MethodNotAllowed(request.method)
+            # Autenticar (JWT) consulta el usuario: va al hilo de la petición, como el resto del ORM sync
+            await sync_to_async(api.initial)(request, *args, **kwargs)
+            respuesta = await vista(request, *args, **kwargs)
+        except Exception as exc:
+            respuesta = api.handle_exception(exc)
+        return api.finalize_response(request, respuesta, *args, **kwargs)
+
+    envoltura.csrf_exempt = True
+    return envoltura
@@ -0,0 +1,273 @@
+"""
+Backend de cache de Django sobre un archivo SQLite local.
+
+Todos los workers de un mismo host abren el mismo archivo, así que un valor
+guardado por uno lo leen los demás (a diferencia de LocMemCache, que es por
+proceso), sin depender de un servicio aparte. SQLite en modo WAL admite
+lecturas concurrentes con una escritura a la vez.
+
+Límites (OPTIONS): MAX_ENTRIES (el de Django) y MAX_BYTES. Al superarlos se
+borran primero las vencidas y después las menos usadas recientemente (LRU),
+hasta bajar a MAX_ENTRIES/MAX_BYTES * (1 - 1/CULL_FREQUENCY). Las entradas y
+bytes totales los mantienen triggers en la tabla `totales`, así que revisar
+los límites en cada escritura no recorre la cache.
+
+Los aciertos, fallos, escrituras y desalojos se cuentan en memoria y se suman
+a la tabla de estadísticas cada segundo (y al salir), así que estadisticas() muestra los
+totales de todos los procesos (comando `estadisticas_cache`).
+"""
+import atexit
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+CONTADORES = ("aciertos", "fallos", "escrituras", "desalojos")
+
+# Un acceso solo se anota para el LRU si el anterior fue hace más de esto (segundos),
+# para que leer no implique escribir en cada get.
+RESOLUCION_LRU = 1.0
+INTERVALO_CONTADORES = 1.0
+
+# Contadores del proceso por archivo. Django crea una instancia del backend por hilo:
+# se comparten entre todas y un único atexit vuelca lo que quede al salir.
+_contadores = defaultdict(lambda: dict.fromkeys(CONTADORES, 0))
+_ultimo_volcado = defaultdict(time.monotonic)
+_contadores_lock = threading.Lock()
+
+ESQUEMA = """
+-- valor va al final: contar bytes o leer expira no recorre las páginas del blob
+CREATE TABLE IF NOT EXISTS cache (
+    clave TEXT PRIMARY KEY,
+    expira REAL,
+    acceso REAL NOT NULL,
+    bytes INTEGER NOT NULL,
+    valor BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS cache_acceso ON cache (acceso);
+CREATE TABLE IF NOT EXISTS estadisticas (nombre TEXT PRIMARY KEY, valor INTEGER NOT NULL);
+
+-- Entradas y bytes totales, al día en la misma sentencia que escribe: podar no cuenta la tabla
+CREATE TABLE IF NOT EXISTS totales (id INTEGER PRIMARY KEY CHECK (id = 1), entradas INTEGER NOT NULL, bytes INTEGER NOT NULL);
+CREATE TRIGGER IF NOT EXISTS cache_insertar AFTER INSERT ON cache BEGIN
+    UPDATE totales SET entradas = entradas + 1, bytes = bytes + new.bytes;
+END;
+CREATE TRIGGER IF NOT EXISTS cache_borrar AFTER DELETE ON cache BEGIN
+    UPDATE totales SET entradas = entradas - 1, bytes = bytes - old.bytes;
+END;
+CREATE TRIGGER IF NOT EXISTS cache_actualizar AFTER UPDATE OF bytes ON cache BEGIN
+    UPDATE totales SET bytes = bytes - old.bytes + new.bytes;
+END;
+"""
+
+
+def _volcar(ruta, conexion=None):
+    """Suma a la tabla de estadísticas lo que este proceso contó para `ruta`."""
+    with _contadores_lock:
+        pendientes = {nombre: valor for nombre, valor in _contadores[ruta].items() if valor}
+        _contadores[ruta] = dict.fromkeys(CONTADORES, 0)
+        _ultimo_volcado[ruta] = time.monotonic()
+    if not pendientes:
+        return
+    try:
+        conexion = conexion or sqlite3.connect(ruta, timeout=5, isolation_level=None)
+        conexion.executemany(
+            "INSERT INTO estadisticas (nombre, valor) VALUES (?, ?) "
+            "ON CONFLICT (nombre) DO UPDATE SET valor = valor + excluded.valor",
+            pendientes.items(),
+        )
+    except sqlite3.Error:
+        pass  # los contadores son orientativos; no deben romper una petición
+
+
+@atexit.register
+def _volcar_todo():
+    for ruta in list(_contadores):
+        _volcar(ruta)
+
+
+def _olvidar_contadores():
+    # Un proceso hijo no vuelve a volcar lo que contó el padre antes del fork
+    _contadores.clear()
+
+
+os.register_at_fork(after_in_child=_olvidar_contadores)
+
+
+class SQLiteCache(BaseCache):
+    def __init__(self, location, params):
+        super().__init__(params)
+        self._ruta = location
+        opciones = params.get("OPTIONS", {})
+        self._max_bytes = int(opciones.get("MAX_BYTES", 64 * 1024 * 1024))
+        self._local = threading.local()
+
+    # --- conexión --------------------------------------------------------
+
+    def _conexion(self):
+        # Una conexión por hilo y por proceso: las conexiones SQLite no sobreviven a un fork
+        conexion = getattr(self._local, "conexion", None)
+        if conexion is not None and self._local.pid == os.getpid():
+            return conexion
+        directorio = os.path.dirname(self._ruta)
+        if directorio:
+            os.makedirs(directorio, exist_ok=True)
+        conexion = sqlite3.connect(self._ruta, timeout=5, isolation_level=None, check_same_thread=False)
+        conexion.execute("PRAGMA journal_mode=WAL")
+        conexion.execute("PRAGMA synchronous=NORMAL")
+        conexion.executescript(ESQUEMA)
+        if conexion.execute("SELECT 1 FROM totales").fetchone() is None:
+            # Archivo nuevo, o de antes de la tabla de totales: se cuenta una sola vez
+            conexion.execute("BEGIN IMMEDIATE")
+            conexion.execute(
+                "INSERT OR IGNORE INTO totales (id, entradas, bytes) "
+                "SELECT 1, COUNT(*), COALESCE(SUM(bytes), 0) FROM cache"
+            )
+            conexion.execute("COMMIT")
+        self._local.conexion, self._local.pid = conexion, os.getpid()
+        return conexion
+
+    def _totales(self, conexion):
+        return conexion.execute("SELECT entradas, bytes FROM totales").fetchone()
+
+    # --- contadores ------------------------------------------------------
+
+    def _contar(self, nombre, cantidad=1):
+        with _contadores_lock:
+            _contadores[self._ruta][nombre] += cantidad
+            vencido = time.monotonic() - _ultimo_volcado[self._ruta] >= INTERVALO_CONTADORES
+        if vencido:
+            _volcar(self._ruta, self._conexion())
+
+    def estadisticas(self):
+        """Totales de todos los procesos más el tamaño actual de la cache."""
+        conexion = self._conexion()
+        _volcar(self._ruta, conexion)
+        datos = dict.fromkeys(CONTADORES, 0)
+        datos.update(conexion.execute("SELECT nombre, valor FROM estadisticas").fetchall())
+        datos["entradas"], datos["bytes"] = self._totales(conexion)
+        datos["max_entradas"], datos["max_bytes"] = self._max_entries, self._max_bytes
+        lecturas = datos["aciertos"] + datos["fallos"]
+        datos["tasa_aciertos"] = datos["aciertos"] / lecturas if lecturas else 0.0
+        return datos
+
+    def reiniciar_estadisticas(self):
+        with _contadores_lock:
+            _contadores[self._ruta] = dict.fromkeys(CONTADORES, 0)
+        self._conexion().execute("DELETE FROM estadisticas")
+
+    # --- API de BaseCache ------------------------------------------------
+
+    def _expira(self, timeout):
+        # Instante absoluto (time.time()) de vencimiento, o None si no vence
+        return self.get_backend_timeout(timeout)
+
+    def get(self, key, default=None, version=None):
+        clave = self.make_and_validate_key(key, version=version)
+        conexion = self._conexion()
+        fila = conexion.execute("SELECT valor, expira, acceso FROM cache WHERE clave = ?", (clave,)).fetchone()
+        ahora = time.time()
+        if fila is None or (fila[1] is not None and fila[1] <= ahora):
+            self._contar("fallos")
+            return default
+        valor, _, acceso = fila
+        if ahora - acceso > RESOLUCION_LRU:
+            conexion.execute("UPDATE cache SET acceso = ? WHERE clave = ?", (ahora, clave))
+        self._contar("aciertos")
+        return pickle.loads(valor)
+
+    def _guardar(self, clave, value, timeout, solo_si_falta):
+        valor = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        ahora = time.time()
+        conexion = self._conexion()
+        if solo_si_falta:
+            # Ocupa el lugar de una entrada vencida, pero no de una vigente
+            cursor = conexion.execute(
+                "INSERT INTO cache (clave, valor, expira, acceso, bytes) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (clave) DO UPDATE SET valor = excluded.valor, expira = excluded.expira, "
+                "acceso = excluded.acceso, bytes = excluded.bytes "
+                "WHERE cache.expira IS NOT NULL AND cache.expira <= ?",
+                (clave, valor, self._expira(timeout), ahora, len(valor), ahora),
+            )
+        else:
+            # ON CONFLICT y no INSERT OR REPLACE: el borrado implícito de REPLACE no dispara los triggers
+            cursor = conexion.execute(
+                "INSERT INTO cache (clave, valor, expira, acceso, bytes) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (clave) DO UPDATE SET valor = excluded.valor, expira = excluded.expira, "
+                "acceso = excluded.acceso, bytes = excluded.bytes",
+                (clave, valor, self._expira(timeout), ahora, len(valor)),
+            )
+        if not cursor.rowcount:
+            return False
+        self._contar("escrituras")
+        self._podar(conexion)
+        return True
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        clave = self.make_and_validate_key(key, version=version)
+        if timeout == 0:  # convención de Django: timeout 0 no guarda nada
+            self.delete(key, version=version)
+            return
+        self._guardar(clave, value, timeout, solo_si_falta=False)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        clave = self.make_and_validate_key(key, version=version)
+        return self._guardar(clave, value, timeout, solo_si_falta=True)
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        clave = self.make_and_validate_key(key, version=version)
+        ahora = time.time()
+        cursor = self._conexion().execute(
+            "UPDATE cache SET expira = ?, acceso = ? WHERE clave = ? AND (expira IS NULL OR expira > ?)",
+            (self._expira(timeout), ahora, clave, ahora),
+        )
+        return bool(cursor.rowcount)
+
+    def delete(self, key, version=None):
+        clave = self.make_and_validate_key(key, version=version)
+        return bool(self._conexion().execute("DELETE FROM cache WHERE clave = ?", (clave,)).rowcount)
+
+    def has_key(self, key, version=None):
+        clave = self.make_and_validate_key(key, version=version)
+        fila = self._conexion().execute(
+            "SELECT 1 FROM cache WHERE clave = ? AND (expira IS NULL OR expira > ?)", (clave, time.time())
+        ).fetchone()
+        return fila is not None
+
+    def clear(self):
+        self._conexion().execute("DELETE FROM cache")
+
+    def close(self, **kwargs):
+        # Django llama a close() al terminar cada petición; la conexión se reutiliza
+        pass
+
+    # --- desalojo --------------------------------------------------------
+
+    def _podar(self, conexion):
+        entradas, total = self._totales(conexion)
+        if entradas <= self._max_entries and total <= self._max_bytes:
+            return
+        borradas = conexion.execute("DELETE FROM cache WHERE expira IS NOT NULL AND expira <= ?", (time.time(),)).rowcount
+        entradas, total = self._totales(conexion)
+
+        fraccion = 1 - 1 / self._cull_frequency if self._cull_frequency else 0
+        sobran_entradas = entradas - int(self._max_entries * fraccion) if entradas > self._max_entries else 0
+        sobran_bytes = total - int(self._max_bytes * fraccion) if total > self._max_bytes else 0
+        if sobran_entradas or sobran_bytes:
+            claves = []
+            liberados = 0
+            cursor = conexion.execute("SELECT clave, bytes FROM cache ORDER BY acceso")
+            for clave, bytes_ in cursor:
+                if len(claves) >= sobran_entradas and liberados >= sobran_bytes:
+                    break
+                claves.append(clave)
+                liberados += bytes_
+            cursor.close()
+            conexion.executemany("DELETE FROM cache WHERE clave = ?", [(clave,) for clave in claves])
+            borradas += len(claves)
+        if borradas:
+            self._contar("desalojos", borradas)
@@ -0,0 +1,31 @@
+"""
+Paginación por cursor (keyset) para todas las listas de la API.
+
+A diferencia de page/offset, cada página filtra por el último valor visto del
+orden (`id` por defecto, que siempre está indexado), así que pedir la página
+1000 cuesta lo mismo que la primera y las filas nuevas no desplazan a las ya
+leídas. La respuesta tiene la forma {"next": url, "previous": url, "results": [...]}.
+"""
+from django.conf import settings
+from rest_framework.pagination import CursorPagination
+
+
+class PaginacionCursor(CursorPagination):
+    ordering = '-id'
+    page_size = settings.PAGINACION_TAMANO
+    page_size_query_param = 'page_size'
+    max_page_size = settings.PAGINACION_TAMANO_MAXIMO
+
+
+def paginar(request, queryset, serializer_class, ordering=None):
+    """
+    Paginación por cursor para vistas de función.
+
+    ordering debe ser un campo (o tupla) único o casi único dentro del queryset
+    e idealmente indexado, p. ej. 'fecha' para las asistencias de un alumno en un horario.
+    """
+    paginador = PaginacionCursor()
+    if ordering:
+        paginador.ordering = ordering
+    pagina = paginador.paginate_queryset(queryset, request)
+    return paginador.get_paginated_response(serializer_class(pagina, many=True).data)
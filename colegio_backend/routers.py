@@ -0,0 +1,114 @@
+"""
+Lecturas pesadas en la réplica de solo lectura.
+
+Con DB_REPLICA_HOST configurado existe el alias 'replica'. Las vistas marcadas
+con @lectura_en_replica (dashboards, perfil del alumno, exportaciones, reportes)
+y el código dentro de `with en_replica():` leen de ella; todo lo demás, y
+cualquier escritura, va a 'default'. Sin réplica todo va a 'default'.
+
+La réplica va unos instantes atrás de la primaria. Para que quien acaba de
+registrar notas o asistencias vea sus cambios, FijarPrimariaMiddleware anota
+en la cache compartida cada escritura exitosa de un usuario, y durante
+DB_REPLICA_FIJAR segundos sus lecturas siguen en la primaria.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.deprecation import MiddlewareMixin
+
+REPLICA = 'replica'
+
+# Un ContextVar y no un threading.local: también aísla las vistas async y las tareas que lanzan
+_en_replica = ContextVar('en_replica', default=False)
+
+METODOS_ESCRITURA = ('POST', 'PUT', 'PATCH', 'DELETE')
+
+
+def replica_disponible():
+    return REPLICA in settings.DATABASES
+
+
+def _clave_fijada(usuario_id):
+    return f'fijar-primaria:{usuario_id}'
+
+
+def fijar_a_primaria(usuario):
+    """Manda las lecturas de `usuario` a la primaria durante DB_REPLICA_FIJAR segundos."""
+    if replica_disponible() and settings.DB_REPLICA_FIJAR > 0:
+        cache.set(_clave_fijada(usuario.pk), True, settings.DB_REPLICA_FIJAR)
+
+
+def fijado_a_primaria(usuario):
+    return bool(usuario and usuario.is_authenticated and cache.get(_clave_fijada(usuario.pk)))
+
+
+@contextmanager
+def en_replica():
+    """Las lecturas dentro del bloque van a la réplica, si existe."""
+    token = _en_replica.set(replica_disponible())
+    try:
+        yield
+    finally:
+        _en_replica.reset(token)
+
+
+def lectura_en_replica(vista):
+    """
+    Decorador de vistas de solo lectura. Va debajo de @permission_classes/@has_role,
+    para que request.user ya esté autenticado al decidir.
+    """
+    if iscoroutinefunction(vista):
+        @wraps(vista)
+        async def envoltura_async(request, *args, **kwargs):
+            if not replica_disponible() or await sync_to_async(fijado_a_primaria)(request.user):
+                return await vista(request, *args, **kwargs)
+            # sync_to_async copia el contexto: las consultas que la vista pase a hilos también van a la réplica
+            with en_replica():
+                return await vista(request, *args, **kwargs)
+
+        return envoltura_async
+
+    @wraps(vista)
+    def envoltura(request, *args, **kwargs):
+        if not replica_disponible() or fijado_a_primaria(request.user):
+            return vista(request, *args, **kwargs)
+        with en_replica():
+            return vista(request, *args, **kwargs)
+
+    return envoltura
+
+
+class RouterReplica:
+    def db_for_read(self, model, **hints):
+        return REPLICA if _en_replica.get() else None
+
+    def db_for_write(self, model, **hints):
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Son la misma base: un objeto leído de la réplica puede relacionarse con uno de la primaria
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # La réplica recibe los cambios de esquema por replicación
+        return db != REPLICA
+
+
+class FijarPrimariaMiddleware(MiddlewareMixin):
+    """Tras una escritura exitosa de un usuario autenticado, fija sus lecturas a la primaria."""
+
+    def process_response(self, request, response):
+        # DRF autentica con JWT dentro de la vista y deja el usuario también en el HttpRequest
+        usuario = getattr(request, 'user', None)
+        if (
+            request.method in METODOS_ESCRITURA
+            and response.status_code < 400
+            and usuario is not None
+            and usuario.is_authenticated
+        ):
+            fijar_a_primaria(usuario)
+        return response
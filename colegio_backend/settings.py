@@ -55,6 +55,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'colegio_backend.routers.FijarPrimariaMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -100,10 +101,52 @@ DATABASES = {
         'PORT': os.environ.get('DB_PORT', '5432'),
         'OPTIONS': {
             'sslmode': os.environ.get('DB_SSLMODE', 'require'),
-        }
+        },
+        # Sin pool: cada worker reutiliza su conexión hasta DB_CONN_MAX_AGE segundos
+        # (0 = una conexión nueva por petición) y la verifica antes de reutilizarla
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 60)),
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
+# Pool de conexiones de psycopg 3 (Django 5.1+), uno por proceso. Evita repetir el handshake TLS
+# en cada petición y reparte entre DB_POOL_MIN y DB_POOL_MAX conexiones los hilos del worker.
+# Requiere psycopg[pool]; ver estado con GET /estado/pool/ y scripts/benchmark_conexiones.py
+
+DB_POOL = os.environ.get('DB_POOL', 'False') == 'True'
+if DB_POOL and DATABASES['default']['ENGINE'] == 'django.db.backends.postgresql':
+    from psycopg_pool import ConnectionPool
+
+    DATABASES['default']['CONN_MAX_AGE'] = 0  # el pool ya mantiene las conexiones; Django exige 0
+    DATABASES['default']['OPTIONS']['pool'] = {
+        'min_size': int(os.environ.get('DB_POOL_MIN', 2)),
+        'max_size': int(os.environ.get('DB_POOL_MAX', 10)),
+        'timeout': float(os.environ.get('DB_POOL_TIMEOUT', 10)),  # espera máxima por una conexión libre
+        'max_idle': float(os.environ.get('DB_POOL_MAX_IDLE', 10 * 60)),
+        'max_lifetime': float(os.environ.get('DB_POOL_MAX_LIFETIME', 60 * 60)),
+        'check': ConnectionPool.check_connection,  # verifica cada conexión al prestarla
+    }
+
+# Réplica de solo lectura (colegio_backend/routers.py). Con DB_REPLICA_HOST, los dashboards, el perfil
+# del alumno, las exportaciones y los reportes leen de ella; sin él todo va a 'default'. Quien escribe
+# (notas, asistencias...) lee de la primaria los DB_REPLICA_FIJAR segundos siguientes, que deben cubrir
+# el retraso de la réplica. La marca se guarda en la cache: con varios hosts, usar CACHE_URL (Redis)
+
+DB_REPLICA_HOST = os.environ.get('DB_REPLICA_HOST')
+if DB_REPLICA_HOST:
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'HOST': DB_REPLICA_HOST,
+        'PORT': os.environ.get('DB_REPLICA_PORT', DATABASES['default']['PORT']),
+        'USER': os.environ.get('DB_REPLICA_USER', DATABASES['default']['USER']),
+        'PASSWORD': os.environ.get('DB_REPLICA_PASSWORD', DATABASES['default']['PASSWORD']),
+        'OPTIONS': {**DATABASES['default']['OPTIONS']},  # con DB_POOL, la réplica tiene su propio pool
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['colegio_backend.routers.RouterReplica']
+DB_REPLICA_FIJAR = int(os.environ.get('DB_REPLICA_FIJAR', 30))
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -152,6 +195,92 @@ REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
         'rest_framework_simplejwt.authentication.JWTAuthentication',
     ),
+    'DEFAULT_PAGINATION_CLASS': 'colegio_backend.pagination.PaginacionCursor',
 }
 
+# Tamaño de página por defecto y máximo que puede pedir el cliente con ?page_size=
+
+PAGINACION_TAMANO = int(os.environ.get('PAGINACION_TAMANO', 50))
+PAGINACION_TAMANO_MAXIMO = int(os.environ.get('PAGINACION_TAMANO_MAXIMO', 500))
+
 AUTH_USER_MODEL = 'usuarios.Usuario'
+
+# Cache compartida (django.core.cache.cache): dashboards, gestión actual, datos de referencia.
+# Por defecto un archivo SQLite que comparten todos los workers del host (colegio_backend/cache.py),
+# con desalojo LRU al superar CACHE_MAX_ENTRADAS o CACHE_MAX_BYTES. Con CACHE_URL=redis://...
+# se usa Redis (requiere el paquete redis) y se comparte también entre hosts.
+
+CACHE_URL = os.environ.get('CACHE_URL')
+if CACHE_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': CACHE_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'colegio_backend.cache.SQLiteCache',
+            'LOCATION': os.environ.get('CACHE_ARCHIVO', str(BASE_DIR / 'cache.sqlite3')),
+            'OPTIONS': {
+                'MAX_ENTRIES': int(os.environ.get('CACHE_MAX_ENTRADAS', 20000)),
+                'MAX_BYTES': int(os.environ.get('CACHE_MAX_BYTES', 256 * 1024 * 1024)),
+            },
+        }
+    }
+
+# Predicciones de rendimiento
+# Antigüedad máxima (segundos) de una fila de PrediccionRendimiento antes de recalcularla en vivo
+
+PREDICCIONES_VIGENCIA = int(os.environ.get('PREDICCIONES_VIGENCIA', 24 * 60 * 60))
+
+# Registro de versiones del modelo de rendimiento (comando `train_rendimiento`, utils/ml_model.py).
+# Cada versión es un subdirectorio con modelo.joblib y metadata.json; activo.json apunta a la que se usa
+
+MODELOS_DIR = os.environ.get('MODELOS_DIR', str(BASE_DIR / 'modelos'))
+
+# Carga del modelo: ML_PRECARGAR lo carga en AcademicoConfig.ready (con gunicorn --preload queda
+# cargado antes del fork); ML_MMAP es el mmap_mode con que se cargan los arrays de la versión NumPy
+# del modelo (compilado/, ver ML_COMPILADO_MAX_FILAS; '' para copiarlos a memoria);
+# cada ML_RECARGA_INTERVALO segundos se revisa si cambió el artefacto para recargarlo sin reiniciar
+
+ML_PRECARGAR = os.environ.get('ML_PRECARGAR', 'False') == 'True'
+ML_MMAP = os.environ.get('ML_MMAP', 'r')
+ML_RECARGA_INTERVALO = float(os.environ.get('ML_RECARGA_INTERVALO', 10))
+
+# Lotes de hasta ML_COMPILADO_MAX_FILAS filas se predicen con la versión NumPy del modelo
+# (utils/modelo_compilado.py), si la versión activa la tiene; los más grandes con sklearn. 0 la desactiva
+
+ML_COMPILADO_MAX_FILAS = int(os.environ.get('ML_COMPILADO_MAX_FILAS', 150))
+
+# Segundos que se guarda en la cache la gestión actual (academico.gestiones)
+
+GESTION_ACTUAL_TTL = int(os.environ.get('GESTION_ACTUAL_TTL', 5 * 60))
+
+# Segundos que se guarda cada respuesta de dashboard/libreta (academico.cache_respuestas). Cualquier
+# escritura de notas, asistencias, horarios... la invalida antes; el TTL acota lo que no se vigila (nombres, modelo)
+
+DASHBOARD_CACHE_TTL = int(os.environ.get('DASHBOARD_CACHE_TTL', 10 * 60))
+
+# Hilos del pool en que las vistas async (dashboard-*-async, colegio_backend/asincrono.py) corren sus
+# secciones en paralelo. Es por proceso y acota las consultas simultáneas, y las conexiones, que abren
+
+ASYNC_HILOS = int(os.environ.get('ASYNC_HILOS', 8))
+
+# Filas que trae cada viaje a la base en las exportaciones en streaming (academico.exportar)
+
+EXPORTACION_CHUNK = int(os.environ.get('EXPORTACION_CHUNK', 2000))
+
+# Notificaciones push (usuarios.notificaciones). El comando `enviar_notificaciones` vacía el outbox;
+# en desarrollo y pruebas se puede usar 'usuarios.notificaciones.BackendLocal'
+
+NOTIFICACIONES_BACKEND = os.environ.get('NOTIFICACIONES_BACKEND', 'usuarios.notif.FirebaseBackend')
+NOTIFICACIONES_MAX_INTENTOS = int(os.environ.get('NOTIFICACIONES_MAX_INTENTOS', 5))
+NOTIFICACIONES_REINTENTO_BASE = int(os.environ.get('NOTIFICACIONES_REINTENTO_BASE', 30))  # segundos, se duplica en cada intento
+# Segundos que una fila queda reservada para el worker que la tomó; si muere sin guardar el resultado, vuelve a la cola
+NOTIFICACIONES_RESERVA = int(os.environ.get('NOTIFICACIONES_RESERVA', 300))
+
+# Cuenta de servicio de Firebase; se lee recién al enviar la primera notificación (usuarios/notif.py)
+
+FIREBASE_CREDENCIALES = os.environ.get('FIREBASE_CREDENCIALES', str(BASE_DIR / 'clave.json'))
@@ -0,0 +1,134 @@
+import os
+import tempfile
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import router
+from django.db.models import QuerySet
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+
+from academico import exportar
+from academico.models import NotaMateria
+from usuarios.models import Usuario
+from .cache import SQLiteCache
+from .routers import FijarPrimariaMiddleware, en_replica, lectura_en_replica
+
+
+class SQLiteCacheTests(TestCase):
+    def nueva(self, **opciones):
+        return SQLiteCache(self.ruta, {'OPTIONS': opciones})
+
+    def setUp(self):
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        self.ruta = os.path.join(directorio.name, 'cache.sqlite3')
+
+    def test_compartida_entre_instancias(self):
+        # Dos instancias sobre el mismo archivo, como dos workers
+        una, otra = self.nueva(), self.nueva()
+        una.set('gestion', {'id': 3})
+        self.assertEqual(otra.get('gestion'), {'id': 3})
+        otra.delete('gestion')
+        self.assertIsNone(una.get('gestion'))
+
+    def test_vencimiento_y_add(self):
+        cache_sqlite = self.nueva()
+        cache_sqlite.set('a', 1, timeout=-1)
+        self.assertIsNone(cache_sqlite.get('a'))
+        self.assertTrue(cache_sqlite.add('a', 2))
+        self.assertFalse(cache_sqlite.add('a', 3))
+        self.assertEqual(cache_sqlite.get('a'), 2)
+
+    def test_lru_por_entradas_y_bytes(self):
+        cache_sqlite = self.nueva(MAX_ENTRIES=4, CULL_FREQUENCY=4)
+        for i in range(4):
+            cache_sqlite.set(f'k{i}', i)
+        with mock.patch('colegio_backend.cache.RESOLUCION_LRU', -1):
+            cache_sqlite.get('k0')  # k0 pasa a ser la más reciente
+        cache_sqlite.set('k4', 4)
+        self.assertEqual(cache_sqlite.get('k0'), 0)
+        self.assertIsNone(cache_sqlite.get('k1'))
+
+        por_tamano = self.nueva(MAX_BYTES=5000)
+        for i in range(10):
+            por_tamano.set(f'b{i}', b'x' * 1000)
+        datos = por_tamano.estadisticas()
+        self.assertLessEqual(datos['bytes'], 5000)
+        self.assertIsNotNone(por_tamano.get('b9'))
+
+    def test_totales_sin_recorrer_la_tabla(self):
+        cache_sqlite = self.nueva(MAX_ENTRIES=1000)
+        cache_sqlite.set_many({f'k{i}': i for i in range(1500)})
+        cache_sqlite.set('k1499', b'x' * 100)  # reemplazo: cambia los bytes, no las entradas
+        cache_sqlite.delete('k1498')
+        conexion = cache_sqlite._conexion()
+        self.assertEqual(
+            cache_sqlite._totales(conexion),
+            conexion.execute('SELECT COUNT(*), SUM(bytes) FROM cache').fetchone(),
+        )
+        self.assertLessEqual(cache_sqlite._totales(conexion)[0], 1000)
+
+        sentencias = []
+        conexion.set_trace_callback(sentencias.append)
+        cache_sqlite.set('otra', 1)
+        conexion.set_trace_callback(None)
+        self.assertFalse([sql for sql in sentencias if 'COUNT(' in sql.upper()])
+
+    def test_instancias_por_hilo_no_acumulan_atexit(self):
+        with mock.patch('atexit.register') as registrar:
+            for _ in range(5):
+                self.nueva().set('a', 1)
+        registrar.assert_not_called()
+
+    def test_contadores_de_todos_los_procesos(self):
+        una, otra = self.nueva(), self.nueva()
+        una.set('a', 1)
+        una.get('a')
+        otra.get('a')
+        otra.get('b')
+        # Cada instancia ve los contadores de las dos
+        for datos in (una.estadisticas(), otra.estadisticas()):
+            self.assertEqual((datos['aciertos'], datos['fallos'], datos['escrituras']), (2, 1, 1))
+
+
+class RouterReplicaTests(TestCase):
+    # Las pruebas no tienen una segunda base: se simula que hay réplica y se mira a qué alias iría cada consulta
+    def setUp(self):
+        cache.clear()
+        self.enterContext(mock.patch('colegio_backend.routers.replica_disponible', return_value=True))
+        self.usuario = Usuario.objects.create(username='prof', correo='prof@colegio.bo')
+        self.fabrica = RequestFactory()
+
+    def alias_de_lectura(self):
+        request = self.fabrica.get('/')
+        request.user = self.usuario
+        return lectura_en_replica(lambda request: router.db_for_read(NotaMateria))(request)
+
+    def escribir(self, status):
+        request = self.fabrica.post('/')
+        request.user = self.usuario
+        FijarPrimariaMiddleware(lambda request: HttpResponse(status=status))(request)
+
+    def test_lecturas_marcadas_van_a_la_replica(self):
+        self.assertEqual(self.alias_de_lectura(), 'replica')
+        self.assertEqual(router.db_for_read(NotaMateria), 'default')
+        with en_replica():
+            self.assertEqual(router.db_for_read(NotaMateria), 'replica')
+            self.assertEqual(router.db_for_write(NotaMateria), 'default')
+
+    def test_escritura_fija_al_usuario_a_la_primaria(self):
+        self.escribir(400)
+        self.assertEqual(self.alias_de_lectura(), 'replica')
+        self.escribir(200)
+        self.assertEqual(self.alias_de_lectura(), 'default')
+        with override_settings(DB_REPLICA_FIJAR=0):
+            cache.clear()
+            self.escribir(200)
+            self.assertEqual(self.alias_de_lectura(), 'replica')
+
+    def test_exportacion_fija_la_base_antes_de_enviar(self):
+        # La consulta corre al enviar la respuesta, cuando la vista ya salió de en_replica()
+        with en_replica(), mock.patch.object(QuerySet, 'iterator', autospec=True) as iterador:
+            exportar.filas('notas')
+        self.assertEqual(iterador.call_args.args[0].db, 'replica')
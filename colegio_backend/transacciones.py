@@ -0,0 +1,63 @@
+"""
+Trabajo acumulado por transacción y aplicado al confirmarse.
+
+Las señales que recalculan algo (predicciones, resúmenes de asistencia) juntan
+en un objeto lo que tocó la transacción y lo aplican una sola vez al
+confirmarse, en lugar de una vez por fila:
+
+    with pendiente(_Marcas) as marcas:
+        marcas.horarios.add((alumno_id, horario_id))
+
+La primera llamada de la transacción crea el objeto y lo registra con
+transaction.on_commit; las siguientes reciben el mismo. Al confirmarse se
+olvida antes de aplicarlo. Si la transacción se revierte, Django descarta el
+callback: como el hilo solo guarda una referencia débil, el objeto desaparece
+con él y la transacción siguiente empieza con uno nuevo. Lo acumulado dentro de
+un savepoint revertido sí se aplica: a lo sumo se recalcula de más. Fuera de un
+bloque atomic (autocommit) la escritura ya está confirmada y se aplica al salir
+del with.
+"""
+import threading
+import weakref
+from contextlib import contextmanager
+
+from django.db import transaction
+
+_locales = threading.local()
+
+
+def _en_curso():
+    # Un dict por hilo, como las conexiones de Django: {clase: weakref a su objeto pendiente}
+    if not hasattr(_locales, 'pendientes'):
+        _locales.pendientes = {}
+    return _locales.pendientes
+
+
+class _Aplicar:
+    def __init__(self, clase, objeto):
+        self.clase = clase
+        self.objeto = objeto
+
+    def __call__(self):
+        referencia = _en_curso().get(self.clase)
+        if referencia is not None and referencia() is self.objeto:
+            del _en_curso()[self.clase]
+        self.objeto()
+
+
+@contextmanager
+def pendiente(clase):
+    """El objeto `clase()` que acumula la transacción en curso; `clase` se instancia sin argumentos y es callable."""
+    if not transaction.get_connection().in_atomic_block:
+        objeto = clase()
+        yield objeto
+        objeto()
+        return
+
+    referencia = _en_curso().get(clase)
+    objeto = referencia() if referencia is not None else None
+    if objeto is None:
+        objeto = clase()
+        _en_curso()[clase] = weakref.ref(objeto)
+        transaction.on_commit(_Aplicar(clase, objeto))
+    yield objeto
@@ -17,6 +17,7 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path, include
 from usuarios.views import RegisterView, LoginView
+from .views import estado_pool
 from drf_yasg.views import get_schema_view
 from drf_yasg import openapi
 from rest_framework import permissions
@@ -39,6 +40,7 @@ urlpatterns = [
     path('academico/', include('academico.urls')),
     path('asistencia/', include('asistencia.urls')),
     path('evaluaciones/', include('evaluaciones.urls')),
+    path('estado/pool/', estado_pool, name='estado-pool'),
     path('swagger/', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
     path('redoc/', schema_view.with_ui('redoc', cache_timeout=0), name='schema-redoc'),
 ]
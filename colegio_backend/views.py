@@ -0,0 +1,25 @@
+import os
+
+from django.db import connections
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
+from rest_framework.response import Response
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated, IsAdminUser])
+def estado_pool(request):
+    """
+    Uso del pool de conexiones de cada base en el proceso que atiende la petición.
+
+    Cada worker tiene su propio pool: pedirlo varias veces muestra workers distintos (ver pid).
+    """
+    bases = {}
+    for alias in connections:
+        conexion = connections[alias]
+        pool = getattr(conexion, 'pool', None)
+        bases[alias] = {
+            'pool': pool.get_stats() if pool is not None else None,
+            'conn_max_age': conexion.settings_dict['CONN_MAX_AGE'],
+        }
+    return Response({'pid': os.getpid(), 'bases': bases})
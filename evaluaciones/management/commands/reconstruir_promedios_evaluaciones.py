@@ -0,0 +1,19 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from evaluaciones.promedios import reconstruir_promedios
+
+
+class Command(BaseCommand):
+    help = "Reconstruye PromedioEvaluaciones a partir de EntregaTarea y ResultadoExamen."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--lote", type=int, default=5000, help="Filas escritas por lote")
+
+    def handle(self, *args, **options):
+        inicio = time.perf_counter()
+        escritos = reconstruir_promedios(tamano_lote=options["lote"])
+        self.stdout.write(
+            self.style.SUCCESS(f"{escritos} promedios de evaluaciones en {time.perf_counter() - inicio:.2f}s")
+        )
@@ -19,6 +19,12 @@ class Tarea(models.Model):
     fecha_entrega = models.DateField()
     fecha_limite = models.DateField()
 
+    class Meta:
+        indexes = [
+            # tareas_profesor_clase: clase + profesor_materia, ordenadas por fecha de entrega
+            models.Index(fields=['clase', 'profesor_materia', '-fecha_entrega'], name='tarea_clase_pm_idx'),
+        ]
+
     def __str__(self):
         return f'Tarea: {self.titulo} - Clase: {self.clase} - Profesor: {self.profesor_materia.profesor.usuario.username}'
     
@@ -38,6 +44,12 @@ class Examen(models.Model):
     descripcion = models.TextField(blank=True, null=True)
     fecha = models.DateField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # examenes_profesor_clase: clase + profesor_materia, ordenados por fecha
+            models.Index(fields=['clase', 'profesor_materia', '-fecha'], name='examen_clase_pm_idx'),
+        ]
+
     def __str__(self):
         return f'Examen: {self.titulo} - Clase: {self.clase} - Profesor: {self.profesor_materia.profesor.usuario.username}'
     
@@ -67,6 +79,18 @@ class EntregaTarea(models.Model):
     )
     observacion = models.TextField(blank=True, null=True)
 
+    class Meta:
+        indexes = [
+            # Últimas tareas calificadas / pendientes de un alumno (dashboards de alumno y tutor)
+            models.Index(fields=['alumno', 'estado', '-fecha_entrega'], name='entrega_alumno_estado_idx'),
+            # Tareas por revisar del profesor: solo las filas sin calificar
+            models.Index(
+                fields=['tarea', '-fecha_entrega'],
+                name='entrega_por_revisar_idx',
+                condition=models.Q(estado__in=['pendiente', 'entregada']),
+            ),
+        ]
+
     def __str__(self):
         return f'Tarea {self.tarea.titulo} - {self.alumno.usuario.username}'
 
@@ -86,5 +110,40 @@ class ResultadoExamen(models.Model):
     )
     observacion = models.TextField(blank=True, null=True)
 
+    class Meta:
+        indexes = [
+            # Últimos exámenes calificados de un alumno
+            models.Index(fields=['alumno', 'estado'], name='resultado_alumno_estado_idx'),
+        ]
+
     def __str__(self):
         return f'Examen {self.examen.titulo} - {self.alumno.usuario.username}'
+
+
+class PromedioEvaluaciones(models.Model):
+    """Suma y cantidad de notas de exámenes y tareas por (alumno, clase, profesor_materia)."""
+    alumno = models.ForeignKey(Alumno, on_delete=models.CASCADE, related_name='promedios_evaluaciones')
+    clase = models.ForeignKey('academico.Clase', on_delete=models.CASCADE, related_name='promedios_evaluaciones')
+    profesor_materia = models.ForeignKey(
+        'academico.AsignacionProfesorMateria',
+        on_delete=models.CASCADE,
+        related_name='promedios_evaluaciones'
+    )
+    examenes_suma = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    examenes_cantidad = models.PositiveIntegerField(default=0)
+    tareas_suma = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    tareas_cantidad = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('alumno', 'clase', 'profesor_materia')
+
+    @property
+    def promedio_examenes(self):
+        return float(self.examenes_suma) / self.examenes_cantidad if self.examenes_cantidad else 0
+
+    @property
+    def promedio_tareas(self):
+        return float(self.tareas_suma) / self.tareas_cantidad if self.tareas_cantidad else 0
+
+    def __str__(self):
+        return f'Promedios: {self.alumno.usuario.username} - Clase {self.clase_id} - {self.profesor_materia_id}'
@@ -0,0 +1,100 @@
+"""
+Mantenimiento de PromedioEvaluaciones.
+
+Las señales de EntregaTarea y ResultadoExamen llaman a actualizar_promedios()
+con las claves (alumno, clase, profesor_materia) afectadas al confirmarse la
+transacción; reconstruir_promedios() rehace la tabla completa, por ejemplo
+tras una carga masiva.
+"""
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+
+from .models import EntregaTarea, PromedioEvaluaciones, ResultadoExamen
+
+CAMPOS = ['examenes_suma', 'examenes_cantidad', 'tareas_suma', 'tareas_cantidad']
+
+
+def _sumas(queryset, relacion):
+    """{(alumno, clase, profesor_materia): (suma, cantidad)} de las notas no nulas."""
+    return {
+        (fila['alumno_id'], fila[f'{relacion}__clase_id'], fila[f'{relacion}__profesor_materia_id']): (
+            fila['suma'] or 0,
+            fila['cantidad'],
+        )
+        for fila in queryset.values('alumno_id', f'{relacion}__clase_id', f'{relacion}__profesor_materia_id')
+        .annotate(suma=Sum('nota'), cantidad=Count('nota'))
+        .order_by()
+    }
+
+
+def _promedios(claves, examenes, tareas):
+    promedios = []
+    for clave in claves:
+        alumno_id, clase_id, profesor_materia_id = clave
+        examenes_suma, examenes_cantidad = examenes.get(clave, (0, 0))
+        tareas_suma, tareas_cantidad = tareas.get(clave, (0, 0))
+        promedios.append(
+            PromedioEvaluaciones(
+                alumno_id=alumno_id,
+                clase_id=clase_id,
+                profesor_materia_id=profesor_materia_id,
+                examenes_suma=examenes_suma,
+                examenes_cantidad=examenes_cantidad,
+                tareas_suma=tareas_suma,
+                tareas_cantidad=tareas_cantidad,
+            )
+        )
+    return promedios
+
+
+def _guardar(promedios, batch_size=1000):
+    PromedioEvaluaciones.objects.bulk_create(
+        promedios,
+        batch_size=batch_size,
+        update_conflicts=True,
+        unique_fields=['alumno', 'clase', 'profesor_materia'],
+        update_fields=CAMPOS,
+    )
+
+
+def actualizar_promedios(claves):
+    """Recalcula las claves (alumno_id, clase_id, profesor_materia_id) con dos consultas agrupadas."""
+    claves = set(claves)
+    if not claves:
+        return
+    alumnos_ids, clases_ids, asignaciones_ids = (set(c) for c in zip(*claves))
+    examenes = _sumas(
+        ResultadoExamen.objects.filter(
+            alumno_id__in=alumnos_ids,
+            examen__clase_id__in=clases_ids,
+            examen__profesor_materia_id__in=asignaciones_ids,
+        ),
+        'examen',
+    )
+    tareas = _sumas(
+        EntregaTarea.objects.filter(
+            alumno_id__in=alumnos_ids,
+            tarea__clase_id__in=clases_ids,
+            tarea__profesor_materia_id__in=asignaciones_ids,
+        ),
+        'tarea',
+    )
+    # Sin tareas ni exámenes (p. ej. borrados en cascada con su profesor_materia) la fila sobra
+    vacias = Q()
+    for clave in claves - examenes.keys() - tareas.keys():
+        alumno_id, clase_id, profesor_materia_id = clave
+        vacias |= Q(alumno_id=alumno_id, clase_id=clase_id, profesor_materia_id=profesor_materia_id)
+    if vacias:
+        PromedioEvaluaciones.objects.filter(vacias).delete()
+    _guardar(_promedios((examenes.keys() | tareas.keys()) & claves, examenes, tareas))
+
+
+@transaction.atomic
+def reconstruir_promedios(tamano_lote=5000):
+    """Rehace PromedioEvaluaciones desde cero. Devuelve cuántas claves escribió."""
+    PromedioEvaluaciones.objects.all().delete()
+    examenes = _sumas(ResultadoExamen.objects.all(), 'examen')
+    tareas = _sumas(EntregaTarea.objects.all(), 'tarea')
+    promedios = _promedios(examenes.keys() | tareas.keys(), examenes, tareas)
+    PromedioEvaluaciones.objects.bulk_create(promedios, batch_size=tamano_lote)
+    return len(promedios)
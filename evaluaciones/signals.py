@@ -0,0 +1,73 @@
+import threading
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import EntregaTarea, Examen, ResultadoExamen, Tarea
+from .promedios import actualizar_promedios
+
+
+# Las notas guardadas en una misma transacción se acumulan por hilo y se
+# recalculan juntas al confirmarse, en lugar de una vez por fila.
+class _Pendientes(threading.local):
+    def __init__(self):
+        self.claves = set()
+        self.tareas = set()
+        self.examenes = set()
+
+
+_pendientes = _Pendientes()
+
+
+def _aplicar_pendientes():
+    claves, tareas, examenes = _pendientes.claves, _pendientes.tareas, _pendientes.examenes
+    if not (claves or tareas or examenes):
+        return
+    _pendientes.claves, _pendientes.tareas, _pendientes.examenes = set(), set(), set()
+
+    for modelo, pares in ((Tarea, tareas), (Examen, examenes)):
+        if not pares:
+            continue
+        evaluaciones = {
+            evaluacion_id: (clase_id, profesor_materia_id)
+            for evaluacion_id, clase_id, profesor_materia_id in modelo.objects.filter(
+                id__in={evaluacion_id for _, evaluacion_id in pares}
+            ).values_list('id', 'clase_id', 'profesor_materia_id')
+        }
+        claves |= {
+            (alumno_id, *evaluaciones[evaluacion_id])
+            for alumno_id, evaluacion_id in pares
+            if evaluacion_id in evaluaciones
+        }
+    actualizar_promedios(claves)
+
+
+@receiver(post_save, sender=EntregaTarea)
+def entrega_guardada(sender, instance, **kwargs):
+    _pendientes.tareas.add((instance.alumno_id, instance.tarea_id))
+    transaction.on_commit(_aplicar_pendientes)
+
+
+@receiver(post_save, sender=ResultadoExamen)
+def resultado_guardado(sender, instance, **kwargs):
+    _pendientes.examenes.add((instance.alumno_id, instance.examen_id))
+    transaction.on_commit(_aplicar_pendientes)
+
+
+# Al borrar, la tarea o el examen puede desaparecer en la misma transacción
+# (borrado en cascada), así que la clave se resuelve en el momento.
+@receiver(post_delete, sender=EntregaTarea)
+def entrega_borrada(sender, instance, **kwargs):
+    tarea = Tarea.objects.filter(id=instance.tarea_id).values_list('clase_id', 'profesor_materia_id').first()
+    if tarea:
+        _pendientes.claves.add((instance.alumno_id, *tarea))
+        transaction.on_commit(_aplicar_pendientes)
+
+
+@receiver(post_delete, sender=ResultadoExamen)
+def resultado_borrado(sender, instance, **kwargs):
+    examen = Examen.objects.filter(id=instance.examen_id).values_list('clase_id', 'profesor_materia_id').first()
+    if examen:
+        _pendientes.claves.add((instance.alumno_id, *examen))
+        transaction.on_commit(_aplicar_pendientes)
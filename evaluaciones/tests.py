@@ -1,3 +1,81 @@
+from datetime import date
+from unittest import mock
+
+from django.db import transaction
 from django.test import TestCase
 
-# Create your tests here.
+from academico.models import AsignacionProfesorMateria, Clase, Curso, Gestion, Materia
+from usuarios.models import Alumno, Profesor, Usuario
+from . import promedios
+from .models import EntregaTarea, Examen, PromedioEvaluaciones, ResultadoExamen, Tarea
+
+
+class PromediosEvaluacionesTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        profesor = Profesor.objects.create(
+            usuario=Usuario.objects.create(username='prof', correo='prof@colegio.bo'), especialidad='Ciencias'
+        )
+        cls.clase = Clase.objects.create(
+            curso=Curso.objects.create(curso=1),
+            gestion=Gestion.objects.create(anio=2025, trimestre=1),
+        )
+        cls.asignacion = AsignacionProfesorMateria.objects.create(
+            profesor=profesor, materia=Materia.objects.create(nombre='Física')
+        )
+        cls.alumno = Alumno.objects.create(usuario=Usuario.objects.create(username='alumno', correo='a@colegio.bo'))
+        evaluacion = {'profesor_materia': cls.asignacion, 'clase': cls.clase}
+        cls.tarea = Tarea.objects.create(
+            titulo='Guía 1', fecha_entrega=date(2025, 3, 1), fecha_limite=date(2025, 3, 8), **evaluacion
+        )
+        cls.examenes = [Examen.objects.create(titulo=f'Parcial {i}', **evaluacion) for i in range(3)]
+
+    def promedio(self):
+        return PromedioEvaluaciones.objects.get(
+            alumno=self.alumno, clase=self.clase, profesor_materia=self.asignacion
+        )
+
+    def calificar(self):
+        """Dos exámenes (80 y 60), uno sin nota y una tarea con 90, en una misma transacción."""
+        with self.captureOnCommitCallbacks(execute=True), transaction.atomic():
+            for examen, nota in zip(self.examenes, (80, 60, None)):
+                ResultadoExamen.objects.create(examen=examen, alumno=self.alumno, nota=nota)
+            EntregaTarea.objects.create(tarea=self.tarea, alumno=self.alumno, nota=90)
+
+    def test_un_recalculo_por_transaccion(self):
+        actualizar = self.enterContext(
+            mock.patch('evaluaciones.signals.actualizar_promedios', wraps=promedios.actualizar_promedios)
+        )
+        self.calificar()
+        actualizar.assert_called_once()
+        promedio = self.promedio()
+        self.assertEqual((promedio.examenes_cantidad, promedio.tareas_cantidad), (2, 1))
+        self.assertEqual((promedio.promedio_examenes, promedio.promedio_tareas), (70, 90))
+
+    def test_borrar_notas(self):
+        self.calificar()
+        with self.captureOnCommitCallbacks(execute=True):
+            ResultadoExamen.objects.filter(nota=80).delete()
+        self.assertEqual(self.promedio().promedio_examenes, 60)
+
+        # Sin tareas ni exámenes la fila se elimina
+        with self.captureOnCommitCallbacks(execute=True), transaction.atomic():
+            ResultadoExamen.objects.all().delete()
+            EntregaTarea.objects.all().delete()
+        self.assertFalse(PromedioEvaluaciones.objects.exists())
+
+    def test_borrado_en_cascada_de_la_tarea(self):
+        self.calificar()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.tarea.delete()
+        promedio = self.promedio()
+        self.assertEqual((promedio.tareas_cantidad, promedio.promedio_examenes), (0, 70))
+
+    def test_reconstruir_igual_que_incremental(self):
+        self.calificar()
+        incremental = self.promedio()
+        PromedioEvaluaciones.objects.all().delete()
+        self.assertEqual(promedios.reconstruir_promedios(), 1)
+        reconstruido = self.promedio()
+        for campo in promedios.CAMPOS:
+            self.assertEqual(getattr(reconstruido, campo), getattr(incremental, campo))
@@ -0,0 +1,78 @@
+"""
+Mide el arranque en frío del backend: `manage.py check`, la carga de las URLs
+(lo que hace un worker de gunicorn/runserver antes de atender) y el import de
+usuarios.notif. Cada medición corre en un proceso nuevo y se informa la mediana.
+
+Uso, desde la raíz del proyecto:
+
+    python scripts/benchmark_arranque.py [--repeticiones 7]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CARGAR = """
+import json, os, sys, time
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'colegio_backend.settings')
+inicio = time.perf_counter()
+import django
+django.setup()
+{codigo}
+print(json.dumps({{
+    'segundos': time.perf_counter() - inicio,
+    'firebase_admin': 'firebase_admin' in sys.modules,
+    'modulos': len(sys.modules),
+}}))
+"""
+
+MEDICIONES = {
+    'URLs (arranque de worker)': 'import colegio_backend.urls',
+    'import usuarios.notif': 'import usuarios.notif',
+}
+
+
+def _medir_check(repeticiones):
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        subprocess.run(
+            [sys.executable, 'manage.py', 'check'], cwd=RAIZ, check=True, capture_output=True
+        )
+        tiempos.append(time.perf_counter() - inicio)
+    return statistics.median(tiempos)
+
+
+def _medir_import(codigo, repeticiones):
+    resultados = []
+    for _ in range(repeticiones):
+        salida = subprocess.run(
+            [sys.executable, '-c', CARGAR.format(codigo=codigo)],
+            cwd=RAIZ, check=True, capture_output=True, text=True,
+        )
+        resultados.append(json.loads(salida.stdout.strip().splitlines()[-1]))
+    return resultados
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeticiones', type=int, default=7)
+    args = parser.parse_args()
+
+    print(f"manage.py check: {_medir_check(args.repeticiones) * 1000:.0f} ms (proceso completo)")
+    for nombre, codigo in MEDICIONES.items():
+        resultados = _medir_import(codigo, args.repeticiones)
+        mediana = statistics.median(r['segundos'] for r in resultados)
+        print(
+            f"{nombre}: {mediana * 1000:.0f} ms, {resultados[0]['modulos']} módulos, "
+            f"firebase_admin cargado: {'sí' if resultados[0]['firebase_admin'] else 'no'}"
+        )
+
+
+if __name__ == '__main__':
+    main()
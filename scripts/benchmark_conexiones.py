@@ -0,0 +1,81 @@
+"""
+Latencia por petición contra PostgreSQL según cómo se manejan las conexiones:
+
+- nueva:       DB_CONN_MAX_AGE=0, una conexión (y handshake TLS) por petición
+- persistente: DB_CONN_MAX_AGE=60, cada hilo reutiliza la suya
+- pool:        DB_POOL=True, pool de psycopg 3
+
+Cada modo corre en un proceso nuevo que simula el ciclo de una petición
+(request_started, una consulta, request_finished, que es cuando Django cierra
+o devuelve la conexión) con varios hilos a la vez, como un worker con threads.
+
+Uso, con las variables DB_* apuntando a un Postgres (por ejemplo uno local):
+
+    DB_SSLMODE=disable python scripts/benchmark_conexiones.py [--peticiones 300] [--hilos 4]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODOS = {
+    'nueva': {'DB_POOL': 'False', 'DB_CONN_MAX_AGE': '0'},
+    'persistente': {'DB_POOL': 'False', 'DB_CONN_MAX_AGE': '60'},
+    'pool': {'DB_POOL': 'True'},
+}
+
+PETICIONES = """
+import json, os, statistics, sys, time
+from concurrent.futures import ThreadPoolExecutor
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'colegio_backend.settings')
+import django
+django.setup()
+from django.core.signals import request_finished, request_started
+from django.db import connection
+
+def peticion(_):
+    inicio = time.perf_counter()
+    request_started.send(sender=None)
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT 1')
+        cursor.fetchone()
+    request_finished.send(sender=None)
+    return time.perf_counter() - inicio
+
+with ThreadPoolExecutor({hilos}) as ejecutor:
+    list(ejecutor.map(peticion, range({hilos})))  # calentar
+    inicio = time.perf_counter()
+    tiempos = sorted(ejecutor.map(peticion, range({peticiones})))
+    total = time.perf_counter() - inicio
+print(json.dumps({{
+    'mediana_ms': 1000 * statistics.median(tiempos),
+    'p95_ms': 1000 * tiempos[int(len(tiempos) * 0.95) - 1],
+    'peticiones_por_segundo': len(tiempos) / total,
+}}))
+"""
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--peticiones', type=int, default=300)
+    parser.add_argument('--hilos', type=int, default=4)
+    args = parser.parse_args()
+
+    codigo = PETICIONES.format(peticiones=args.peticiones, hilos=args.hilos)
+    for nombre, entorno in MODOS.items():
+        salida = subprocess.run(
+            [sys.executable, '-c', codigo],
+            cwd=RAIZ, env={**os.environ, **entorno}, check=True, capture_output=True, text=True,
+        )
+        resultado = json.loads(salida.stdout.strip().splitlines()[-1])
+        print(
+            f"{nombre}: mediana {resultado['mediana_ms']:.2f} ms, p95 {resultado['p95_ms']:.2f} ms, "
+            f"{resultado['peticiones_por_segundo']:.0f} peticiones/s"
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,163 @@
+"""
+Compara bajo ASGI los dashboards sync (dashboard-profesor/, dashboard-alumno/)
+con sus versiones async (.../async/), que corren las secciones en paralelo.
+
+Las peticiones pasan por el handler ASGI de Django (AsyncClient) con un JWT
+real y sin cache de respuestas, así que cada una calcula el dashboard entero.
+Antes mide cada sección por separado: la versión async debería acercarse a la
+más lenta y la sync a la suma.
+
+Con una base local (SQLite, o Postgres en la misma máquina) casi todo el
+tiempo es CPU de Python y los hilos no se solapan por el GIL; lo que la versión
+async aprovecha es la espera de red de una base remota. --latencia-ms la simula
+sumando esa espera a cada consulta.
+
+Uso, desde la raíz del proyecto y con una base con datos:
+
+    python scripts/benchmark_dashboards.py [--peticiones 50] [--concurrencia 8] [--latencia-ms 2]
+        [--profesor USUARIO] [--alumno USUARIO]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from functools import partial
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'colegio_backend.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.db import connection  # noqa: E402
+from django.db.backends.signals import connection_created  # noqa: E402
+from django.test import AsyncClient, override_settings  # noqa: E402
+from django.urls import reverse  # noqa: E402
+from rest_framework_simplejwt.tokens import AccessToken  # noqa: E402
+
+from academico import dashboards  # noqa: E402
+from academico.gestiones import resolver_gestion  # noqa: E402
+from usuarios.models import Usuario  # noqa: E402
+
+
+def _simular_latencia(segundos):
+    def esperar(execute, sql, params, many, context):
+        time.sleep(segundos)  # como la espera de red, libera el GIL
+        return execute(sql, params, many, context)
+
+    def instalar(connection, **kwargs):
+        if esperar not in connection.execute_wrappers:
+            connection.execute_wrappers.append(esperar)
+
+    # Cada hilo tiene su propia conexión: la del hilo principal y las que se abran después
+    instalar(connection)
+    connection_created.connect(instalar, weak=False)
+
+
+def _usuario(rol, username):
+    usuarios = Usuario.objects.filter(**{f'{rol}__isnull': False})
+    if username:
+        usuarios = usuarios.filter(username=username)
+    usuario = usuarios.order_by('id').first()
+    if usuario is None:
+        sys.exit(f'No hay un usuario con rol {rol}' + (f' llamado {username}' if username else ''))
+    return usuario
+
+
+def _secciones(rol, usuario):
+    gestion = resolver_gestion()
+    if rol == 'profesor':
+        horarios = dashboards.horarios_profesor(usuario.profesor, gestion)
+        return {
+            'alumnos_bajo_rendimiento': partial(dashboards.alumnos_bajo_rendimiento, horarios),
+            'clases_proximas': partial(dashboards.clases_proximas, horarios),
+            'tareas_por_revisar': partial(dashboards.tareas_por_revisar, usuario.profesor),
+        }
+    return {
+        'materias_rendimiento': partial(dashboards.materias_rendimiento, usuario.alumno, gestion),
+        'ultimas_tareas': partial(dashboards.ultimas_tareas, usuario.alumno),
+        'ultimos_examenes': partial(dashboards.ultimos_examenes, usuario.alumno),
+        'clases_de_hoy': partial(dashboards.clases_de_hoy, usuario.alumno, gestion),
+    }
+
+
+def _ms_por_seccion(secciones, repeticiones):
+    tiempos = {}
+    for nombre, seccion in secciones.items():
+        seccion()  # calentar
+        muestras = []
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            seccion()
+            muestras.append(time.perf_counter() - inicio)
+        tiempos[nombre] = 1000 * statistics.median(muestras)
+    return tiempos
+
+
+async def _medir(cliente, url, cabeceras, peticiones, concurrencia):
+    """Devuelve (mediana ms, p95 ms, peticiones/s) con `concurrencia` peticiones en curso a la vez."""
+    semaforo = asyncio.Semaphore(concurrencia)
+
+    async def una():
+        async with semaforo:
+            inicio = time.perf_counter()
+            respuesta = await cliente.get(url, headers=cabeceras)
+            if respuesta.status_code != 200:
+                raise SystemExit(f'{url}: {respuesta.status_code} {respuesta.content[:200]!r}')
+            return time.perf_counter() - inicio
+
+    await una()  # calentar
+    inicio = time.perf_counter()
+    tiempos = sorted(await asyncio.gather(*(una() for _ in range(peticiones))))
+    total = time.perf_counter() - inicio
+    return 1000 * statistics.median(tiempos), 1000 * tiempos[int(len(tiempos) * 0.95) - 1], peticiones / total
+
+
+async def _comparar(args, usuarios):
+    cliente = AsyncClient()
+    for rol, nombre_url, usuario in usuarios:
+        cabeceras = {'Authorization': f'Bearer {AccessToken.for_user(usuario)}'}
+        print(f'\nDashboard {rol} ({usuario.username})')
+        for concurrencia in sorted({1, args.concurrencia}):
+            for modo, url in (('sync', reverse(nombre_url)), ('async', reverse(f'{nombre_url}-async'))):
+                mediana, p95, por_segundo = await _medir(cliente, url, cabeceras, args.peticiones, concurrencia)
+                print(
+                    f'  {modo:5} concurrencia {concurrencia}: mediana {mediana:.1f} ms, '
+                    f'p95 {p95:.1f} ms, {por_segundo:.1f} peticiones/s'
+                )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--peticiones', type=int, default=50)
+    parser.add_argument('--concurrencia', type=int, default=8)
+    parser.add_argument('--latencia-ms', type=float, default=0, help='Espera añadida a cada consulta')
+    parser.add_argument('--profesor', help='username del profesor (por defecto el primero)')
+    parser.add_argument('--alumno', help='username del alumno (por defecto el primero)')
+    args = parser.parse_args()
+    if args.latencia_ms:
+        _simular_latencia(args.latencia_ms / 1000)
+
+    usuarios = [
+        ('profesor', 'dashboard-profesor', _usuario('profesor', args.profesor)),
+        ('alumno', 'dashboard-alumno', _usuario('alumno', args.alumno)),
+    ]
+    for rol, _, usuario in usuarios:
+        tiempos = _ms_por_seccion(_secciones(rol, usuario), repeticiones=7)
+        detalle = ', '.join(f'{nombre} {ms:.1f}' for nombre, ms in tiempos.items())
+        print(
+            f'Secciones del dashboard {rol} (ms): {detalle}; '
+            f'suma {sum(tiempos.values()):.1f}, la más lenta {max(tiempos.values()):.1f}'
+        )
+
+    # Sin cache de respuestas: cada petición calcula el dashboard
+    with override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}):
+        asyncio.run(_comparar(args, usuarios))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+"""
+Compara el plan y el tiempo de las consultas más frecuentes con y sin los
+índices compuestos declarados en los modelos.
+
+Para cada consulta se mide con el índice, luego se borra el índice dentro de
+una transacción, se vuelve a medir y se hace rollback (el DDL de PostgreSQL y
+SQLite es transaccional). Borrar un índice bloquea la tabla: no correr contra
+producción.
+
+Uso, con la base poblada por scripts/poblar_datos.py:
+
+    python manage.py shell
+    >>> exec(open('scripts/benchmark_indices.py').read())
+"""
+import time
+
+from django.db import connection, transaction
+
+from asistencia.models import Asistencia
+from evaluaciones.models import EntregaTarea, Examen, ResultadoExamen, Tarea
+from usuarios.models import PrediccionRendimiento
+
+REPETICIONES = 20
+
+
+def _indice(modelo, nombre):
+    return next(indice for indice in modelo._meta.indexes if indice.name == nombre)
+
+
+def _medir(consulta):
+    qs = consulta()
+    if connection.vendor == 'postgresql':
+        plan = qs.explain(analyze=True, buffers=True)
+    else:
+        plan = qs.explain()
+    inicio = time.perf_counter()
+    for _ in range(REPETICIONES):
+        list(consulta())
+    return plan, (time.perf_counter() - inicio) * 1000 / REPETICIONES
+
+
+asistencia = Asistencia.objects.order_by('-id').values('alumno_id', 'horario_id').first()
+entrega = EntregaTarea.objects.order_by('-id').values('alumno_id', 'tarea__profesor_materia__profesor_id').first()
+resultado = ResultadoExamen.objects.order_by('-id').values('alumno_id').first()
+tarea = Tarea.objects.order_by('-id').values('clase_id', 'profesor_materia_id').first()
+examen = Examen.objects.order_by('-id').values('clase_id', 'profesor_materia_id').first()
+
+CONSULTAS = [
+    (
+        'Asistencias de un alumno por horario y estado',
+        Asistencia, 'asist_alumno_horario_idx',
+        lambda: Asistencia.objects.filter(alumno_id=asistencia['alumno_id'], estado='Presente')
+        .values('horario_id'),
+    ),
+    (
+        'Últimas tareas calificadas de un alumno',
+        EntregaTarea, 'entrega_alumno_estado_idx',
+        lambda: EntregaTarea.objects.filter(alumno_id=entrega['alumno_id'], estado='calificada')
+        .order_by('-fecha_entrega')[:5],
+    ),
+    (
+        'Tareas por revisar del profesor',
+        EntregaTarea, 'entrega_por_revisar_idx',
+        lambda: EntregaTarea.objects.filter(
+            tarea__profesor_materia__profesor_id=entrega['tarea__profesor_materia__profesor_id'],
+            estado__in=['entregada', 'pendiente'],
+        ).order_by('-fecha_entrega')[:10],
+    ),
+    (
+        'Últimos exámenes calificados de un alumno',
+        ResultadoExamen, 'resultado_alumno_estado_idx',
+        lambda: ResultadoExamen.objects.filter(alumno_id=resultado['alumno_id'], estado='calificado')
+        .order_by('-examen__fecha')[:5],
+    ),
+    (
+        'Tareas de una clase y profesor_materia',
+        Tarea, 'tarea_clase_pm_idx',
+        lambda: Tarea.objects.filter(clase_id=tarea['clase_id'], profesor_materia_id=tarea['profesor_materia_id'])
+        .order_by('-fecha_entrega'),
+    ),
+    (
+        'Exámenes de una clase y profesor_materia',
+        Examen, 'examen_clase_pm_idx',
+        lambda: Examen.objects.filter(clase_id=examen['clase_id'], profesor_materia_id=examen['profesor_materia_id'])
+        .order_by('-fecha'),
+    ),
+    (
+        'Cola de predicciones desactualizadas',
+        PrediccionRendimiento, 'prediccion_pendiente_idx',
+        lambda: PrediccionRendimiento.objects.filter(desactualizada=True).order_by('id')[:5000],
+    ),
+]
+
+for titulo, modelo, nombre_indice, consulta in CONSULTAS:
+    plan_con, ms_con = _medir(consulta)
+    # SQLite exige desactivar las FK antes de abrir la transacción del schema editor
+    connection.disable_constraint_checking()
+    try:
+        with transaction.atomic():
+            with connection.schema_editor(atomic=False) as editor:
+                editor.remove_index(modelo, _indice(modelo, nombre_indice))
+            plan_sin, ms_sin = _medir(consulta)
+            transaction.set_rollback(True)
+    finally:
+        connection.enable_constraint_checking()
+
+    print(f"\n=== {titulo} ({nombre_indice}) ===")
+    print(f"Con índice: {ms_con:.2f} ms\n{plan_con}")
+    print(f"Sin índice: {ms_sin:.2f} ms\n{plan_sin}")
+
+# exec(open('scripts/benchmark_indices.py').read())
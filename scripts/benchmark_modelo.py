@@ -0,0 +1,111 @@
+"""
+Compara el estimador de sklearn con su versión NumPy (utils/modelo_compilado.py):
+paridad de predicciones, microsegundos por fila según el tamaño del lote y el
+costo de cargar el modelo en un proceso nuevo (lo que paga cada worker).
+
+Uso, desde la raíz del proyecto:
+
+    python scripts/benchmark_modelo.py [--modelo modelos/<version>/modelo.joblib] [--repeticiones 7]
+
+Sin --modelo usa la versión activa del registro.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import joblib
+import numpy as np
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from utils.modelo_compilado import ModeloCompilado  # noqa: E402
+
+LOTES = (1, 50, 150, 1000)
+
+CARGAR = """
+import json, sys, time
+sys.path.insert(0, {raiz!r})
+inicio = time.perf_counter()
+{codigo}
+modelo.predict([[60.0, 70.0, 0.9]])
+print(json.dumps({{'segundos': time.perf_counter() - inicio, 'sklearn': 'sklearn' in sys.modules}}))
+"""
+
+CODIGO_SKLEARN = "import joblib; modelo = joblib.load({ruta!r})"
+CODIGO_NUMPY = "from utils.modelo_compilado import ModeloCompilado; modelo = ModeloCompilado.cargar({ruta!r}, mmap_mode='r')"
+
+
+def _ruta_activa():
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'colegio_backend.settings')
+    import django
+    django.setup()
+    from utils.ml_model import ruta_modelo
+    return ruta_modelo(compilado=False)
+
+
+def _us_por_fila(modelo, X, repeticiones):
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        modelo.predict(X)
+        tiempos.append(time.perf_counter() - inicio)
+    return 1e6 * statistics.median(tiempos) / len(X)
+
+
+def _arranque(codigo, repeticiones):
+    resultados = []
+    for _ in range(repeticiones):
+        salida = subprocess.run(
+            [sys.executable, '-c', CARGAR.format(raiz=RAIZ, codigo=codigo)],
+            check=True, capture_output=True, text=True,
+        )
+        resultados.append(json.loads(salida.stdout.strip().splitlines()[-1]))
+    return statistics.median(r['segundos'] for r in resultados), resultados[0]['sklearn']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--modelo', help='Artefacto joblib (por defecto la versión activa)')
+    parser.add_argument('--repeticiones', type=int, default=7)
+    args = parser.parse_args()
+
+    ruta = args.modelo or _ruta_activa()
+    modelo = joblib.load(ruta)
+    compilado = ModeloCompilado.desde_modelo(modelo)
+
+    rng = np.random.default_rng(0)
+    X = np.c_[rng.uniform(0, 100, max(LOTES)), rng.uniform(0, 100, max(LOTES)), rng.uniform(0, 1, max(LOTES))]
+    esperado, obtenido = modelo.predict(X), compilado.predict(X)
+    iguales = np.allclose(esperado, obtenido) if esperado.dtype.kind == 'f' else np.array_equal(esperado, obtenido)
+    print(f"Modelo: {ruta} ({type(modelo).__name__}); paridad en {len(X)} filas: {'sí' if iguales else 'NO'}")
+
+    for lote in LOTES:
+        sklearn_us = _us_por_fila(modelo, X[:lote], args.repeticiones)
+        numpy_us = _us_por_fila(compilado, X[:lote], args.repeticiones)
+        print(
+            f"Lote de {lote}: sklearn {sklearn_us:.1f} µs/fila, NumPy {numpy_us:.1f} µs/fila "
+            f"({sklearn_us / numpy_us:.1f}x)"
+        )
+
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta_compilado = os.path.join(directorio, 'compilado')
+        compilado.guardar(ruta_compilado)
+        for nombre, codigo in (
+            ('sklearn', CODIGO_SKLEARN.format(ruta=os.path.abspath(ruta))),
+            ('NumPy', CODIGO_NUMPY.format(ruta=ruta_compilado)),
+        ):
+            segundos, carga_sklearn = _arranque(codigo, args.repeticiones)
+            print(
+                f"Cargar y predecir en un proceso nuevo ({nombre}): {segundos * 1000:.0f} ms, "
+                f"sklearn importado: {'sí' if carga_sklearn else 'no'}"
+            )
+
+
+if __name__ == '__main__':
+    main()
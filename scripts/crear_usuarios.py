@@ -3,6 +3,7 @@ from django.utils.crypto import get_random_string
 from usuarios.models import Usuario, Profesor, Alumno, Tutor, Tutoria
 from faker import Faker
 from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
 from academico.models import Materia
 fake = Faker('es_ES')
 
@@ -109,6 +110,9 @@ for materia in MATERIAS:
     materias_objs.append(materia_obj)
     print(f"✅ Materia '{materia}' creada (simulada)")
 
+# bulk_create no dispara las señales que mantienen Usuario.rol
+call_command('sincronizar_roles')
+
 print("🎉 Todo listo. Usuarios, tutores, profesores, alumnos y tutorías creados correctamente.")
 
 # exec(open('scripts/crear_usuarios.py').read())
\ No newline at end of file
@@ -8,6 +8,8 @@ from academico.models import (
 from asistencia.models import Horario, HorarioDia, Dia
 from evaluaciones.models import Tarea, Examen, EntregaTarea, ResultadoExamen
 from asistencia.models import Asistencia
+from asistencia.resumen import reconstruir_resumen
+from evaluaciones.promedios import reconstruir_promedios
 
 User = get_user_model()
 
@@ -270,6 +272,11 @@ for anio in ANIOS:
             if random.random() < 0.05:
                 retirados.add(alumno.id)
 
+# ---------- RESÚMENES ----------
+# Asistencias y notas se cargaron con bulk_create, así que los resúmenes se reconstruyen al final
+reconstruir_resumen()
+reconstruir_promedios()
+
 print("Datos poblados exitosamente.")
 
 # exec(open('scripts/poblar_datos.py').read())
\ No newline at end of file
@@ -0,0 +1,41 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from usuarios.notificaciones import procesar_pendientes
+
+
+class Command(BaseCommand):
+    help = (
+        "Envía las notificaciones push pendientes del outbox (Notificacion) con el backend de "
+        "NOTIFICACIONES_BACKEND, reintentando con backoff los errores transitorios."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--intervalo",
+            type=float,
+            help="Repetir cada N segundos (worker). Sin esta opción procesa una vez y termina.",
+        )
+        parser.add_argument("--lote", type=int, default=100, help="Notificaciones por transacción")
+
+    def handle(self, *args, **options):
+        intervalo = options["intervalo"]
+        while True:
+            inicio = time.perf_counter()
+            total = 0
+            # Vaciar todo lo vencido antes de dormir
+            while True:
+                procesadas = procesar_pendientes(limite=options["lote"])
+                total += procesadas
+                if procesadas < options["lote"]:
+                    break
+            if total or not intervalo:
+                self.stdout.write(
+                    self.style.SUCCESS(
+                        f"{total} notificaciones procesadas en {time.perf_counter() - inicio:.2f}s"
+                    )
+                )
+            if not intervalo:
+                return
+            time.sleep(intervalo)
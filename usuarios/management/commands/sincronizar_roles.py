@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from usuarios.roles import sincronizar_roles
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula Usuario.rol a partir de los perfiles Profesor, Alumno y Tutor. Necesario tras "
+        "cargas con bulk_create (que no disparan señales) y al desplegar la columna rol."
+    )
+
+    def handle(self, *args, **options):
+        cambiados = sincronizar_roles()
+        self.stdout.write(self.style.SUCCESS(f"{cambiados} usuarios con rol actualizado"))
@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 from django.contrib.auth.models import AbstractBaseUser, PermissionsMixin, BaseUserManager
 
 class UsuarioManager(BaseUserManager):
@@ -22,6 +23,13 @@ class DatosPersonales(models.Model):
     apellido = models.CharField(max_length=100)
 
 
+ROLES = (
+    ('profesor', 'Profesor'),
+    ('alumno', 'Alumno'),
+    ('tutor', 'Tutor'),
+)
+
+
 class Usuario(AbstractBaseUser, PermissionsMixin):
     username = models.CharField(max_length=150, unique=True)
     password = models.CharField(max_length=128)
@@ -30,6 +38,8 @@ class Usuario(AbstractBaseUser, PermissionsMixin):
     is_staff = models.BooleanField(default=False)
     is_active = models.BooleanField(default=True)
     fb_token = models.CharField(max_length=255, blank=True, null=True)
+    # Copia del perfil (Profesor/Alumno/Tutor) que mantienen usuarios/signals.py
+    rol = models.CharField(max_length=10, choices=ROLES, blank=True, default='')
     datos_personales = models.ForeignKey('DatosPersonales', on_delete=models.SET_NULL, null=True)
 
     USERNAME_FIELD = 'username'
@@ -79,12 +89,53 @@ class PrediccionRendimiento(models.Model):
         ]
     )
     fecha_prediccion = models.DateTimeField(auto_now=True)  # Última vez que se calculó
+    desactualizada = models.BooleanField(default=False)  # Cambió una nota/asistencia desde el último cálculo
+    marcas = models.PositiveIntegerField(default=0)  # Sube con cada marca; delata las que llegan durante un recálculo
 
     # Si quieres guardar las features que usaste (útil para auditoría/modelo explain)
     detalles = models.JSONField(null=True, blank=True)
 
     class Meta:
         unique_together = ('alumno', 'materia', 'gestion')  # Una predicción por materia, por alumno, por gestión
+        indexes = [
+            # Cola del worker `recalcular_predicciones --pendientes`: solo indexa las filas sucias
+            models.Index(fields=['id'], name='prediccion_pendiente_idx', condition=models.Q(desactualizada=True)),
+        ]
+
+    def __str__(self):
+        return f'Predicción: {self.alumno} - {self.materia} - {self.gestion} = {self.categoria} ({self.score})'
+
+class Notificacion(models.Model):
+    """Push pendiente de envío (outbox). La envía el comando `enviar_notificaciones`."""
+
+    titulo = models.CharField(max_length=255)
+    cuerpo = models.TextField()
+    tokens = models.JSONField(default=list)  # fb_token aún sin entregar
+    estado = models.CharField(
+        max_length=16,
+        choices=[
+            ('pendiente', 'Pendiente'),
+            ('enviada', 'Enviada'),
+            ('fallida', 'Fallida')
+        ],
+        default='pendiente'
+    )
+    intentos = models.PositiveSmallIntegerField(default=0)
+    proximo_intento = models.DateTimeField(default=timezone.now)
+    exitos = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+    creada = models.DateTimeField(auto_now_add=True)
+    enviada = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Cola del worker: solo las pendientes, en orden de próximo intento
+            models.Index(
+                fields=['proximo_intento'],
+                name='notificacion_pendiente_idx',
+                condition=models.Q(estado='pendiente'),
+            ),
+        ]
 
     def __str__(self):
-        return f'Predicción: {self.alumno} - {self.materia} - {self.gestion} = {self.categoria} ({self.score})'
\ No newline at end of file
+        return f'Notificación {self.id}: {self.titulo} ({self.estado}, {len(self.tokens)} tokens)'
@@ -0,0 +1,124 @@
+"""
+Notificaciones push con outbox.
+
+Las vistas llaman a encolar_notificacion(), que solo inserta una fila en
+Notificacion dentro de la transacción de la petición. El comando
+`enviar_notificaciones` llama a procesar_pendientes(), que entrega cada fila
+con el backend de NOTIFICACIONES_BACKEND, reintenta con backoff exponencial
+los tokens con errores transitorios y borra de Usuario los tokens inválidos.
+
+El envío no ocurre dentro de una transacción: primero se reservan las filas
+corriendo su proximo_intento NOTIFICACIONES_RESERVA segundos (así ningún otro
+worker las toma), luego se envían y cada resultado se guarda por separado. Si
+el worker muere a mitad de camino, las filas vuelven a la cola al vencer la
+reserva.
+
+Un backend es cualquier clase con enviar(tokens, titulo, cuerpo) que
+devuelva un ResultadoEnvio.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Notificacion, Usuario
+
+REINTENTO_MAXIMO = 60 * 60  # segundos
+
+
+class ResultadoEnvio:
+    def __init__(self, exitos=0, invalidos=None, reintentar=None, errores=None):
+        self.exitos = exitos
+        self.invalidos = invalidos or []  # tokens que FCM ya no reconoce
+        self.reintentar = reintentar or []  # tokens con error transitorio
+        self.errores = errores or []
+
+
+class BackendLocal:
+    """
+    Backend sin red para desarrollo y pruebas. Guarda lo enviado en BackendLocal.enviados.
+
+    Los tokens de `tokens_invalidos` se informan como inválidos y los de
+    `tokens_caidos` como error transitorio.
+    """
+
+    enviados = []
+    tokens_invalidos = set()
+    tokens_caidos = set()
+
+    def enviar(self, tokens, titulo, cuerpo):
+        resultado = ResultadoEnvio()
+        for token in tokens:
+            if token in self.tokens_invalidos:
+                resultado.invalidos.append(token)
+            elif token in self.tokens_caidos:
+                resultado.reintentar.append(token)
+                resultado.errores.append(f'{token}: no disponible')
+            else:
+                self.enviados.append({'token': token, 'titulo': titulo, 'cuerpo': cuerpo})
+                resultado.exitos += 1
+        return resultado
+
+
+def get_backend():
+    return import_string(settings.NOTIFICACIONES_BACKEND)()
+
+
+def encolar_notificacion(tokens, titulo, cuerpo):
+    """Crea la fila de outbox para `tokens` (sin repetidos ni vacíos). Devuelve None si no queda ninguno."""
+    tokens = list(dict.fromkeys(token for token in tokens if token))
+    if not tokens:
+        return None
+    return Notificacion.objects.create(titulo=titulo, cuerpo=cuerpo, tokens=tokens)
+
+
+def procesar_pendientes(limite=100):
+    """Envía hasta `limite` notificaciones cuyo próximo intento ya venció. Devuelve cuántas procesó."""
+    backend = get_backend()
+    notificaciones = _reservar(limite)
+    for notificacion in notificaciones:
+        _enviar(backend, notificacion)
+    return len(notificaciones)
+
+
+def _reservar(limite):
+    """Toma hasta `limite` filas vencidas y corre su próximo intento para que otro worker no las envíe."""
+    ahora = timezone.now()
+    with transaction.atomic():
+        # skip_locked permite varios workers reservando a la vez sin esperarse
+        notificaciones = list(
+            Notificacion.objects.select_for_update(skip_locked=True)
+            .filter(estado='pendiente', proximo_intento__lte=ahora)
+            .order_by('proximo_intento')[:limite]
+        )
+        reserva = ahora + timedelta(seconds=settings.NOTIFICACIONES_RESERVA)
+        Notificacion.objects.filter(pk__in=[n.pk for n in notificaciones]).update(proximo_intento=reserva)
+    return notificaciones
+
+
+def _enviar(backend, notificacion):
+    try:
+        resultado = backend.enviar(notificacion.tokens, notificacion.titulo, notificacion.cuerpo)
+    except Exception as e:  # credenciales, red caída...: se reintenta todo
+        resultado = ResultadoEnvio(reintentar=list(notificacion.tokens), errores=[str(e)])
+
+    ahora = timezone.now()
+    notificacion.intentos += 1
+    notificacion.exitos += resultado.exitos
+    notificacion.tokens = resultado.reintentar
+    notificacion.error = '\n'.join(resultado.errores)
+    if not notificacion.tokens:
+        notificacion.estado = 'enviada'
+        notificacion.enviada = ahora
+    elif notificacion.intentos >= settings.NOTIFICACIONES_MAX_INTENTOS:
+        notificacion.estado = 'fallida'
+    else:
+        espera = settings.NOTIFICACIONES_REINTENTO_BASE * 2 ** (notificacion.intentos - 1)
+        notificacion.proximo_intento = ahora + timedelta(seconds=min(espera, REINTENTO_MAXIMO))
+
+    with transaction.atomic():
+        if resultado.invalidos:
+            Usuario.objects.filter(fb_token__in=resultado.invalidos).update(fb_token=None)
+        notificacion.save()
@@ -1,24 +1,40 @@
 from functools import wraps
+from asgiref.sync import iscoroutinefunction, sync_to_async
 from rest_framework.response import Response
 from rest_framework import status
 
+def _rechazo(user, role_name):
+    """None si el usuario tiene el rol; si no, la respuesta 401/403."""
+    if not user.is_authenticated:
+        return Response({'error': 'No autenticado'}, status=status.HTTP_401_UNAUTHORIZED)
+
+    # user.rol evita la consulta en el caso común. Con más de un perfil (p. ej. alumno y tutor)
+    # guarda solo el primero, y está vacío en usuarios aún sin sincronizar: el hasattr cubre ambos
+    if user.rol == role_name:
+        return None
+    if role_name in ("alumno", "profesor", "tutor") and hasattr(user, role_name):
+        return None
+
+    return Response({'error': 'No tiene permisos para acceder a esta vista'}, status=status.HTTP_403_FORBIDDEN)
+
 def has_role(role_name):
     def decorator(view_func):
-        @wraps(view_func)
-        def _wrapped_view(request, *args, **kwargs):
-            user = request.user
-
-            if not user.is_authenticated:
-                return Response({'error': 'No autenticado'}, status=status.HTTP_401_UNAUTHORIZED)
+        if iscoroutinefunction(view_func):
+            @wraps(view_func)
+            async def _wrapped_async_view(request, *args, **kwargs):
+                rechazo = await sync_to_async(_rechazo)(request.user, role_name)
+                if rechazo is not None:
+                    return rechazo
+                return await view_func(request, *args, **kwargs)
 
-            if role_name == "alumno" and hasattr(user, "alumno"):
-                return view_func(request, *args, **kwargs)
-            elif role_name == "profesor" and hasattr(user, "profesor"):
-                return view_func(request, *args, **kwargs)
-            elif role_name == "tutor" and hasattr(user, "tutor"):
-                return view_func(request, *args, **kwargs)
+            return _wrapped_async_view
 
-            return Response({'error': 'No tiene permisos para acceder a esta vista'}, status=status.HTTP_403_FORBIDDEN)
+        @wraps(view_func)
+        def _wrapped_view(request, *args, **kwargs):
+            rechazo = _rechazo(request.user, role_name)
+            if rechazo is not None:
+                return rechazo
+            return view_func(request, *args, **kwargs)
 
         return _wrapped_view
     return decorator
@@ -0,0 +1,50 @@
+"""
+Mantenimiento de Usuario.rol, la copia del perfil que tiene cada usuario.
+
+Con el rol en la fila del usuario, has_role y UsuarioSerializer.get_rol no
+necesitan consultar Profesor, Alumno y Tutor por separado. Si un usuario tiene
+más de un perfil, rol es el primero en el orden de siempre (profesor, alumno,
+tutor); has_role consulta el perfil cuando se pide uno de los otros.
+"""
+from django.db import transaction
+from django.db.models import Q
+
+from .models import Alumno, Profesor, Tutor, Usuario
+
+PERFILES = (
+    ('profesor', Profesor),
+    ('alumno', Alumno),
+    ('tutor', Tutor),
+)
+
+
+def rol_de(usuario_id):
+    """Rol según los perfiles existentes, o '' si no tiene ninguno."""
+    for rol, modelo in PERFILES:
+        if modelo.objects.filter(usuario_id=usuario_id).exists():
+            return rol
+    return ''
+
+
+def actualizar_rol(usuario_id):
+    rol = rol_de(usuario_id)
+    Usuario.objects.filter(pk=usuario_id).update(rol=rol)
+    return rol
+
+
+@transaction.atomic
+def sincronizar_roles():
+    """Recalcula el rol de todos los usuarios con un UPDATE por perfil. Devuelve cuántos cambiaron."""
+    cambiados = 0
+    con_rol_previo = Q()
+    for rol, modelo in PERFILES:
+        con_perfil = Q(pk__in=modelo.objects.values('usuario_id'))
+        cambiados += (
+            Usuario.objects.filter(con_perfil)
+            .exclude(con_rol_previo)
+            .exclude(rol=rol)
+            .update(rol=rol)
+        )
+        con_rol_previo |= con_perfil
+    cambiados += Usuario.objects.exclude(con_rol_previo).exclude(rol='').update(rol='')
+    return cambiados
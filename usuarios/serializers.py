@@ -18,6 +18,9 @@ class UsuarioSerializer(serializers.ModelSerializer):
         fields = ['id', 'username', 'correo', 'rol', 'datos_personales']
 
     def get_rol(self, obj):
+        if obj.rol:
+            return obj.rol
+        # Usuarios aún sin sincronizar (ver comando sincronizar_roles)
         if hasattr(obj, 'profesor'):
             return 'profesor'
         elif hasattr(obj, 'alumno'):
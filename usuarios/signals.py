@@ -0,0 +1,37 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .models import Alumno, Profesor, Tutor
+from .roles import actualizar_rol
+
+
+@receiver(pre_save, sender=Profesor)
+@receiver(pre_save, sender=Alumno)
+@receiver(pre_save, sender=Tutor)
+def recordar_usuario(sender, instance, **kwargs):
+    # Usuario al que pertenecía el perfil antes de guardarlo: si cambia, los dos cambian de rol
+    if instance._state.adding:
+        instance._usuario_anterior = None
+    else:
+        instance._usuario_anterior = (
+            sender.objects.filter(pk=instance.pk).values_list('usuario_id', flat=True).first()
+        )
+
+
+@receiver(post_save, sender=Profesor)
+@receiver(post_save, sender=Alumno)
+@receiver(post_save, sender=Tutor)
+@receiver(post_delete, sender=Profesor)
+@receiver(post_delete, sender=Alumno)
+@receiver(post_delete, sender=Tutor)
+def sincronizar_rol(sender, instance, **kwargs):
+    anterior = getattr(instance, '_usuario_anterior', None)
+    if kwargs.get('created') is False:
+        # Una actualización solo cambia roles si el perfil pasó a otro usuario
+        if anterior is None or anterior == instance.usuario_id:
+            return
+        actualizar_rol(anterior)
+    rol = actualizar_rol(instance.usuario_id)
+    # Mantener coherente el usuario que ya está en memoria (p. ej. request.user al registrarse)
+    if sender.usuario.is_cached(instance):
+        instance.usuario.rol = rol
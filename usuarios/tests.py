@@ -1,3 +1,159 @@
-from django.test import TestCase
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.db import connection
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from firebase_admin import messaging
+from rest_framework.response import Response
+
+from .models import Alumno, Notificacion, Profesor, Tutor, Usuario
+from .notif import FirebaseBackend
+from .notificaciones import BackendLocal, encolar_notificacion, procesar_pendientes
+from .permissions import has_role
+from .roles import sincronizar_roles
+from .serializers import UsuarioSerializer
+
+
+@override_settings(
+    NOTIFICACIONES_BACKEND='usuarios.notificaciones.BackendLocal',
+    NOTIFICACIONES_MAX_INTENTOS=2,
+    NOTIFICACIONES_REINTENTO_BASE=30,
+)
+class OutboxNotificacionesTests(TestCase):
+    def setUp(self):
+        BackendLocal.enviados = []
+        BackendLocal.tokens_invalidos = set()
+        BackendLocal.tokens_caidos = set()
+
+    def test_encolar_no_envia(self):
+        notificacion = encolar_notificacion(['a', 'b', 'a', None, ''], 'Notas', 'Nuevas notas')
+        self.assertEqual(notificacion.tokens, ['a', 'b'])
+        self.assertEqual(BackendLocal.enviados, [])
+        self.assertIsNone(encolar_notificacion([None], 'Notas', 'Nuevas notas'))
+
+    def test_envio_y_tokens_invalidos(self):
+        Usuario.objects.create(username='viejo', correo='viejo@colegio.bo', fb_token='viejo')
+        BackendLocal.tokens_invalidos = {'viejo'}
+        notificacion = encolar_notificacion(['a', 'viejo'], 'Notas', 'Nuevas notas')
+
+        self.assertEqual(procesar_pendientes(), 1)
+
+        notificacion.refresh_from_db()
+        self.assertEqual((notificacion.estado, notificacion.exitos, notificacion.tokens), ('enviada', 1, []))
+        self.assertEqual([e['token'] for e in BackendLocal.enviados], ['a'])
+        self.assertIsNone(Usuario.objects.get(username='viejo').fb_token)
+
+    def test_reintento_con_backoff_hasta_fallar(self):
+        BackendLocal.tokens_caidos = {'caido'}
+        notificacion = encolar_notificacion(['a', 'caido'], 'Notas', 'Nuevas notas')
+
+        procesar_pendientes()
+        notificacion.refresh_from_db()
+        self.assertEqual((notificacion.estado, notificacion.tokens), ('pendiente', ['caido']))
+        self.assertGreater(notificacion.proximo_intento, timezone.now() + timedelta(seconds=20))
+        # Todavía no toca reintentar
+        self.assertEqual(procesar_pendientes(), 0)
+
+        Notificacion.objects.update(proximo_intento=timezone.now())
+        procesar_pendientes()
+        notificacion.refresh_from_db()
+        self.assertEqual((notificacion.estado, notificacion.intentos, notificacion.exitos), ('fallida', 2, 1))
+
+
+@override_settings(
+    NOTIFICACIONES_BACKEND='usuarios.notificaciones.BackendLocal',
+    NOTIFICACIONES_RESERVA=300,
+)
+class ReservaNotificacionesTests(TransactionTestCase):
+    # TransactionTestCase: en TestCase todo corre dentro de un atomic y no se podría
+    # comprobar que el envío ocurre fuera de la transacción
+    def test_envia_fuera_de_la_transaccion_con_la_fila_reservada(self):
+        notificacion = encolar_notificacion(['a'], 'Notas', 'Nuevas notas')
+        durante_el_envio = []
+
+        def enviar(backend, tokens, titulo, cuerpo):
+            durante_el_envio.append((
+                connection.in_atomic_block,
+                Notificacion.objects.get(pk=notificacion.pk).proximo_intento > timezone.now() + timedelta(seconds=200),
+                procesar_pendientes(),  # otro worker no la toma
+            ))
+            raise ConnectionError('worker caído')
+
+        with mock.patch.object(BackendLocal, 'enviar', enviar):
+            self.assertEqual(procesar_pendientes(), 1)
+        self.assertEqual(durante_el_envio, [(False, True, 0)])
+
+
+class FirebaseBackendTests(TestCase):
+    def test_lotes_de_500_y_clasificacion_de_errores(self):
+        tokens = [f't{i}' for i in range(1200)]
+        invalido = messaging.UnregisteredError('token no registrado')
+
+        def respuesta(message, app=None):
+            envios = []
+            for token in message.tokens:
+                envio = mock.Mock(success=token not in ('t0', 't700'))
+                envio.exception = invalido if token == 't0' else Exception('no disponible')
+                envios.append(envio)
+            return mock.Mock(responses=envios)
+
+        with mock.patch('usuarios.notif.firebase_app'), \
+                mock.patch.object(messaging, 'send_each_for_multicast', side_effect=respuesta) as envio:
+            resultado = FirebaseBackend().enviar(tokens, 'Notas', 'Nuevas notas')
+
+        self.assertEqual([len(c.args[0].tokens) for c in envio.call_args_list], [500, 500, 200])
+        self.assertEqual(resultado.exitos, 1198)
+        self.assertEqual(resultado.invalidos, ['t0'])
+        self.assertEqual(resultado.reintentar, ['t700'])
+
+
+class RolesTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = Usuario.objects.create(username='ana', correo='ana@colegio.bo')
+        Alumno.objects.create(usuario=cls.usuario)
+        Tutor.objects.create(usuario=cls.usuario)
+        cls.usuario.refresh_from_db()
+
+    def estado(self, usuario, rol):
+        request = RequestFactory().get('/')
+        request.user = usuario
+        return has_role(rol)(lambda request: Response({}))(request).status_code
+
+    def test_con_dos_perfiles_accede_a_los_dos(self):
+        self.assertEqual(self.usuario.rol, 'alumno')
+        with self.assertNumQueries(0):
+            self.assertEqual(self.estado(self.usuario, 'alumno'), 200)
+        self.assertEqual(self.estado(self.usuario, 'tutor'), 200)
+        self.assertEqual(self.estado(self.usuario, 'profesor'), 403)
+
+    def test_sin_sincronizar_consulta_el_perfil(self):
+        Usuario.objects.filter(pk=self.usuario.pk).update(rol='')
+        usuario = Usuario.objects.get(pk=self.usuario.pk)
+        self.assertEqual(self.estado(usuario, 'tutor'), 200)
+        self.assertEqual(sincronizar_roles(), 1)
+        self.assertEqual(Usuario.objects.get(pk=self.usuario.pk).rol, 'alumno')
+
+    def test_reasignar_perfil_actualiza_a_los_dos_usuarios(self):
+        otro = Usuario.objects.create(username='beto', correo='beto@colegio.bo')
+        alumno = Alumno.objects.get(usuario=self.usuario)
+        alumno.usuario = otro
+        alumno.save()
+        self.assertEqual(Usuario.objects.get(pk=self.usuario.pk).rol, 'tutor')
+        self.assertEqual(Usuario.objects.get(pk=otro.pk).rol, 'alumno')
+
+        # Guardar sin cambiar de usuario no recalcula nada
+        with self.assertNumQueries(2):
+            alumno.save()
+
+    def test_serializar_usuarios_no_consulta_perfiles(self):
+        for i in range(5):
+            Profesor.objects.create(
+                usuario=Usuario.objects.create(username=f'prof{i}', correo=f'prof{i}@colegio.bo'),
+                especialidad='Física',
+            )
+        usuarios = list(Usuario.objects.select_related('datos_personales'))
+        with self.assertNumQueries(0):
+            datos = UsuarioSerializer(usuarios, many=True).data
+        self.assertEqual(sorted(d['rol'] for d in datos), ['alumno'] + ['profesor'] * 5)
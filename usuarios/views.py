@@ -11,6 +11,7 @@ from drf_yasg.utils import swagger_auto_schema
 from academico.models import Materia, Gestion
 import joblib
 from asistencia.models import Horario
+from colegio_backend.pagination import paginar
 
 class UsuarioViewSet(viewsets.ModelViewSet):
     """API CRUD para usuarios generales."""
@@ -144,9 +145,8 @@ def get_alumnos(request):
     Endpoint para obtener todos los alumnos registrados en el sistema.
     Solo accesible por administradores.
     """
-    alumnos = Alumno.objects.all().select_related('usuario')
-    serializer = AlumnoSerializer(alumnos, many=True)
-    return Response(serializer.data, status=status.HTTP_200_OK)
+    alumnos = Alumno.objects.all().select_related('usuario__datos_personales')
+    return paginar(request, alumnos, AlumnoSerializer)
 
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
@@ -1,12 +1,246 @@
 # utils/ml_model.py
 import joblib
+import json
+import logging
 import os
+import threading
+import time
 
+import numpy as np
+from django.conf import settings
+
+from utils.modelo_compilado import ModeloCompilado
+
+# Modelo suelto de antes del registro; se usa solo si no hay una versión activa
 MODEL_PATH = os.path.join(os.path.dirname(__file__), './modelo_rendimiento.pkl')
-model = None
+ARCHIVO_MODELO = 'modelo.joblib'
+ARCHIVO_COMPILADO = 'compilado'
+ARCHIVO_METADATA = 'metadata.json'
+ARCHIVO_ACTIVO = 'activo.json'
+logger = logging.getLogger(__name__)
+
+# Recarga en caliente. Por tipo de modelo (compilado o no): ((ruta, mtime), modelo) en memoria
+# y cuándo volver a mirar el disco. Las peticiones leen _en_uso sin lock; solo la carga se serializa.
+_modelo_lock = threading.Lock()
+_en_uso = {}
+_proxima_revision = {}
+
+CATEGORIAS = ('bajo', 'regular', 'bueno')
+# Cortes de nota (0-100) cuando el modelo predice un score en lugar de una clase
+UMBRAL_REGULAR = 51
+UMBRAL_BUENO = 70
+
+_stats_lock = threading.Lock()
+_stats = {'llamadas': 0, 'filas': 0, 'segundos': 0.0}
+
+
+def version_activa():
+    """Versión apuntada por activo.json en MODELOS_DIR, o None si el registro está vacío."""
+    try:
+        with open(os.path.join(settings.MODELOS_DIR, ARCHIVO_ACTIVO)) as f:
+            return json.load(f)['version']
+    except FileNotFoundError:
+        return None
+
+
+def ruta_modelo(compilado=False):
+    """
+    Artefacto de la versión activa. Con compilado=True se prefiere la versión
+    NumPy (el directorio compilado/) si la versión la tiene.
+    """
+    version = version_activa()
+    if version is None:
+        return MODEL_PATH
+    directorio = os.path.join(settings.MODELOS_DIR, version)
+    if compilado:
+        if os.path.exists(os.path.join(directorio, ARCHIVO_COMPILADO)):
+            return os.path.join(directorio, ARCHIVO_COMPILADO)
+    return os.path.join(directorio, ARCHIVO_MODELO)
+
+
+def guardar_version(modelo, metadata):
+    """Guarda el modelo y su metadata como una versión nueva (sin activarla). Devuelve la versión."""
+    version = metadata['version']
+    directorio = os.path.join(settings.MODELOS_DIR, version)
+    os.makedirs(directorio)
+    joblib.dump(modelo, os.path.join(directorio, ARCHIVO_MODELO))
+    try:
+        ModeloCompilado.desde_modelo(modelo).guardar(os.path.join(directorio, ARCHIVO_COMPILADO))
+    except ValueError:
+        pass  # estimador sin versión NumPy: se usa siempre modelo.joblib
+    with open(os.path.join(directorio, ARCHIVO_METADATA), 'w') as f:
+        json.dump(metadata, f, indent=2, ensure_ascii=False)
+    return version
+
+
+def leer_metadata(version):
+    with open(os.path.join(settings.MODELOS_DIR, version, ARCHIVO_METADATA)) as f:
+        return json.load(f)
+
+
+def activar_version(version):
+    """Apunta activo.json a `version`. El reemplazo es atómico: nunca se lee un puntero a medias."""
+    if not os.path.exists(os.path.join(settings.MODELOS_DIR, version, ARCHIVO_MODELO)):
+        raise FileNotFoundError(f'No existe la versión {version} en {settings.MODELOS_DIR}')
+    destino = os.path.join(settings.MODELOS_DIR, ARCHIVO_ACTIVO)
+    temporal = destino + '.tmp'
+    with open(temporal, 'w') as f:
+        json.dump({'version': version}, f)
+    os.replace(temporal, destino)
+    olvidar_modelos()
+
+
+def olvidar_modelos():
+    """Descarta los modelos en memoria: el próximo get_ml_model carga la versión activa."""
+    with _modelo_lock:
+        _en_uso.clear()
+        _proxima_revision.clear()
+
+
+def _firma(compilado):
+    ruta = ruta_modelo(compilado)
+    return ruta, os.stat(ruta).st_mtime_ns
+
+
+def cargar_artefacto(ruta):
+    if os.path.isdir(ruta):
+        return ModeloCompilado.cargar(ruta, mmap_mode=settings.ML_MMAP or None)
+    # Sin mmap_mode: al deserializar cada árbol sklearn copia sus nodos a memoria propia,
+    # así que un bosque mapeado se copiaría igual en cada worker
+    return joblib.load(ruta)
+
+
+def cargar_modelo(compilado=False):
+    """
+    Carga el modelo activo (su versión NumPy con compilado=True) si el de
+    memoria no es el del disco.
+
+    Con ML_MMAP los arrays de la versión NumPy quedan mapeados del archivo en
+    lugar de copiados: los workers comparten esas páginas aunque cada uno haga
+    su carga. Por eso los artefactos nunca se sobrescriben en el lugar (ver
+    activar_version). El modelo de joblib se copia en cada worker; para
+    compartirlo, ML_PRECARGAR con gunicorn --preload.
+    """
+    with _modelo_lock:
+        firma = _firma(compilado)
+        actual = _en_uso.get(compilado)
+        if actual is None or actual[0] != firma:
+            otro = _en_uso.get(not compilado)
+            # Una versión sin compilado/ sirve el mismo modelo.joblib para los dos tipos
+            modelo = otro[1] if otro is not None and otro[0] == firma else cargar_artefacto(firma[0])
+            actual = _en_uso[compilado] = (firma, modelo)
+        return actual[1]
+
+
+def precargar():
+    """Carga el modelo al arrancar (AcademicoConfig.ready); sin artefacto solo avisa."""
+    try:
+        cargar_modelo()
+        if settings.ML_COMPILADO_MAX_FILAS > 0:
+            cargar_modelo(compilado=True)
+    except FileNotFoundError as e:
+        logger.warning('No se precargó el modelo de rendimiento: %s', e)
+
+
+def get_ml_model(compilado=False):
+    """
+    Modelo listo para predecir (su versión NumPy con compilado=True). Cada
+    ML_RECARGA_INTERVALO segundos revisa si cambió la versión activa o el
+    archivo y, si cambió, lo recarga; mientras tanto las peticiones en curso
+    siguen usando el modelo anterior.
+    """
+    actual = _en_uso.get(compilado)
+    if actual is None:
+        return cargar_modelo(compilado)
+    if time.monotonic() < _proxima_revision.get(compilado, 0.0):
+        return actual[1]
+    _proxima_revision[compilado] = time.monotonic() + settings.ML_RECARGA_INTERVALO
+    try:
+        if _firma(compilado) != actual[0]:
+            return cargar_modelo(compilado)
+    except Exception:
+        # Artefacto borrado o a medio escribir: seguir con el que ya está cargado
+        logger.exception('No se pudo recargar el modelo de rendimiento')
+    return actual[1]
+
+
+def usa_compilado(filas):
+    """Si predict_batch evalúa un lote de `filas` filas con la versión NumPy del modelo."""
+    return 0 < filas <= settings.ML_COMPILADO_MAX_FILAS
+
+
+def medir_latencia(modelo, X, repeticiones=5):
+    """Mediana de microsegundos por fila de modelo.predict(X)."""
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        modelo.predict(X)
+        tiempos.append(time.perf_counter() - inicio)
+    return 1e6 * float(np.median(tiempos)) / len(X)
+
+
+def predict_batch(features):
+    """
+    Evalúa el modelo sobre una matriz (n, 3) de features en una sola llamada.
+
+    Hasta ML_COMPILADO_MAX_FILAS filas usa la versión NumPy, más rápida en
+    lotes chicos; con más, el predict de sklearn. Devuelve un ndarray de n
+    predicciones; para n == 0 no toca el modelo.
+    """
+    return _predecir(features)[0]
+
+
+def predecir_categorias(features):
+    """Como predict_batch, pero devuelve (predicciones, categorías) traducidas con el mismo modelo que predijo."""
+    preds, modelo = _predecir(features)
+    return preds, categorizar(preds, modelo)
+
+
+def _predecir(features):
+    # Devuelve también el modelo usado: una recarga entre predecir y categorizar no debe cambiarlo
+    X = np.asarray(features, dtype=float)
+    if len(X) == 0:
+        return np.empty(0), None
+
+    inicio = time.perf_counter()
+    modelo = get_ml_model(usa_compilado(len(X)))
+    preds = modelo.predict(X)
+    duracion = time.perf_counter() - inicio
+
+    with _stats_lock:
+        _stats['llamadas'] += 1
+        _stats['filas'] += len(X)
+        _stats['segundos'] += duracion
+    return preds, modelo
+
+
+def categorizar(preds, modelo):
+    """
+    Traduce las predicciones de `modelo` a 'bajo' / 'regular' / 'bueno'.
+
+    Un clasificador con clases 0/1/2 se mapea por índice; un regresor de nota
+    se corta con UMBRAL_REGULAR y UMBRAL_BUENO.
+    """
+    preds = np.asarray(preds)
+    if hasattr(modelo, 'classes_'):
+        if preds.dtype.kind in 'iuf':
+            return [CATEGORIAS[int(p)] for p in preds]
+        return [str(p) for p in preds]
+    return [
+        'bajo' if p < UMBRAL_REGULAR else 'regular' if p < UMBRAL_BUENO else 'bueno'
+        for p in preds
+    ]
+
+
+def get_stats():
+    """Contadores de inferencia del proceso: llamadas, filas y tiempo acumulado."""
+    with _stats_lock:
+        stats = dict(_stats)
+    stats['ms_por_llamada'] = 1000 * stats['segundos'] / stats['llamadas'] if stats['llamadas'] else 0.0
+    stats['us_por_fila'] = 1e6 * stats['segundos'] / stats['filas'] if stats['filas'] else 0.0
+    return stats
+
 
-def get_ml_model():
-    global model
-    if model is None:
-        model = joblib.load(MODEL_PATH)
-    return model
+def reset_stats():
+    with _stats_lock:
+        _stats.update(llamadas=0, filas=0, segundos=0.0)
@@ -0,0 +1,173 @@
+"""
+Versión del modelo de rendimiento que se evalúa solo con NumPy.
+
+compilar() toma el estimador de sklearn ya entrenado y lo reduce a unos pocos
+arrays: coeficientes para los modelos lineales, o los nodos de todos los
+árboles concatenados (feature, umbral, hijo izquierdo, hijo derecho, valor)
+para árboles, bosques y gradient boosting. ModeloCompilado recorre todos los
+árboles a la vez, un nivel por iteración, sobre todas las filas.
+
+Rinde mejor en los lotes chicos de las peticiones (una fila a unas decenas);
+desde unas 150 filas el predict de sklearn, en C, es más rápido, y
+utils.ml_model.predict_batch elige uno u otro según ML_COMPILADO_MAX_FILAS.
+
+Se guarda como un .npy por array en un directorio (compilado/ en cada versión
+del registro). cargar(..., mmap_mode='r') mapea los arrays del archivo en lugar
+de copiarlos: los workers que cargan la misma versión comparten esas páginas.
+
+Cargarlo no importa sklearn ni valida la entrada en cada llamada, y el
+resultado es el mismo que el de modelo.predict (ver la prueba de paridad en
+utils/tests.py).
+"""
+import os
+
+import numpy as np
+
+
+def _umbrales_float32(umbrales):
+    """
+    Umbrales en float32 sin cambiar ninguna comparación.
+
+    sklearn compara X en float32 contra umbrales en float64. Para un x float32,
+    x <= t equivale a x <= (el mayor float32 que no supera t), así que se redondea hacia abajo.
+    """
+    umbrales32 = umbrales.astype(np.float32)
+    arriba = umbrales32.astype(np.float64) > umbrales
+    umbrales32[arriba] = np.nextafter(umbrales32[arriba], np.float32(-np.inf))
+    return umbrales32
+
+
+def _compilar_arboles(arboles, escala, base, clases=None):
+    features, umbrales, izquierdas, derechas, valores, raices = [], [], [], [], [], []
+    desplazamiento = 0
+    for arbol in arboles:
+        tree = arbol.tree_
+        n = tree.node_count
+        hoja = tree.children_left == -1
+        propios = np.arange(n)
+        # Una hoja apunta a sí misma: seguir bajando desde ella no la cambia
+        izquierdas.append(np.where(hoja, propios, tree.children_left) + desplazamiento)
+        derechas.append(np.where(hoja, propios, tree.children_right) + desplazamiento)
+        features.append(np.where(hoja, 0, tree.feature))
+        umbrales.append(np.where(hoja, np.inf, tree.threshold))
+        valor = tree.value[:, 0, :]
+        if clases is not None:
+            valor = valor / valor.sum(axis=1, keepdims=True)
+        valores.append(valor)
+        raices.append(desplazamiento)
+        desplazamiento += n
+
+    izquierda = np.concatenate(izquierdas).astype(np.int32)
+    arrays = {
+        'tipo': np.array('arboles'),
+        'feature': np.concatenate(features).astype(np.int32),
+        'umbral': _umbrales_float32(np.concatenate(umbrales)),
+        'izquierda': izquierda,
+        'hoja': izquierda == np.arange(len(izquierda)),
+        'derecha': np.concatenate(derechas).astype(np.int32),
+        'valor': np.concatenate(valores).astype(np.float64),
+        'raices': np.array(raices, dtype=np.int32),
+        'escala': np.array(escala, dtype=np.float64),
+        'base': np.asarray(base, dtype=np.float64),
+    }
+    if clases is not None:
+        arrays['clases'] = np.asarray(np.asarray(clases).tolist())
+    return arrays
+
+
+def compilar(modelo):
+    """
+    Arrays que representan `modelo`. Soporta modelos lineales (regresión o
+    clasificación), árboles y bosques de regresión o clasificación y
+    GradientBoostingRegressor. Lanza ValueError con cualquier otro.
+    """
+    clases = getattr(modelo, 'classes_', None)
+    if getattr(modelo, 'n_outputs_', 1) != 1:
+        raise ValueError('Solo se compilan modelos de una salida.')
+
+    if hasattr(modelo, 'tree_'):
+        return _compilar_arboles([modelo], 1.0, 0.0, clases)
+
+    estimadores = getattr(modelo, 'estimators_', None)
+    if isinstance(estimadores, np.ndarray):  # gradient boosting: una columna de árboles por clase
+        if clases is not None or estimadores.shape[1] != 1:
+            raise ValueError('Solo se compila GradientBoostingRegressor.')
+        if modelo.init_ == 'zero':
+            base = 0.0
+        elif hasattr(modelo.init_, 'constant_'):
+            base = float(np.ravel(modelo.init_.constant_)[0])
+        else:
+            raise ValueError('GradientBoosting con un init no constante.')
+        return _compilar_arboles(estimadores[:, 0], modelo.learning_rate, [base], None)
+    if estimadores and all(hasattr(arbol, 'tree_') for arbol in estimadores):  # bosques
+        return _compilar_arboles(estimadores, 1.0 / len(estimadores), 0.0, clases)
+
+    if hasattr(modelo, 'coef_'):
+        arrays = {
+            'tipo': np.array('lineal'),
+            'coef': np.atleast_2d(modelo.coef_).astype(np.float64),
+            'intercepto': np.atleast_1d(modelo.intercept_).astype(np.float64),
+        }
+        if clases is not None:
+            arrays['clases'] = np.asarray(np.asarray(clases).tolist())
+        return arrays
+
+    raise ValueError(f'Modelo no soportado: {type(modelo).__name__}')
+
+
+class ModeloCompilado:
+    """Misma interfaz que usa utils.ml_model del estimador: predict() y classes_ si clasifica."""
+
+    def __init__(self, arrays):
+        # asanyarray: los arrays cargados con mmap_mode siguen mapeados del archivo
+        self.arrays = {nombre: np.asanyarray(valor) for nombre, valor in arrays.items()}
+        self.tipo = str(self.arrays['tipo'])
+        if 'clases' in self.arrays:
+            self.classes_ = self.arrays['clases']
+
+    @classmethod
+    def desde_modelo(cls, modelo):
+        return cls(compilar(modelo))
+
+    @classmethod
+    def cargar(cls, directorio, mmap_mode=None):
+        """Lee el directorio que escribió guardar(); con mmap_mode ('r') mapea los arrays sin copiarlos."""
+        return cls({
+            nombre[:-len('.npy')]: np.load(os.path.join(directorio, nombre), mmap_mode=mmap_mode, allow_pickle=False)
+            for nombre in os.listdir(directorio)
+            if nombre.endswith('.npy')
+        })
+
+    def guardar(self, directorio):
+        os.makedirs(directorio)
+        for nombre, valor in self.arrays.items():
+            np.save(os.path.join(directorio, f'{nombre}.npy'), valor, allow_pickle=False)
+
+    def _puntajes(self, X):
+        a = self.arrays
+        if self.tipo == 'lineal':
+            return X.astype(np.float64) @ a['coef'].T + a['intercepto']
+
+        X = X.astype(np.float32)
+        n_arboles = len(a['raices'])
+        # Un par (fila, árbol) por posición; en cada nivel solo se avanzan los que no llegaron a una hoja
+        filas = np.repeat(np.arange(len(X)), n_arboles)
+        nodos = np.tile(a['raices'], len(X))
+        activos = np.flatnonzero(~a['hoja'][nodos])
+        while activos.size:
+            actuales = nodos[activos]
+            izquierda = X[filas[activos], a['feature'][actuales]] <= a['umbral'][actuales]
+            siguientes = np.where(izquierda, a['izquierda'][actuales], a['derecha'][actuales])
+            nodos[activos] = siguientes
+            activos = activos[~a['hoja'][siguientes]]
+        # (filas, árboles, salidas) -> (filas, salidas)
+        valores = a['valor'][nodos].reshape(len(X), n_arboles, -1)
+        return a['base'] + a['escala'] * valores.sum(axis=1)
+
+    def predict(self, X):
+        puntajes = self._puntajes(np.asarray(X))
+        if 'clases' not in self.arrays:
+            return puntajes[:, 0]
+        if puntajes.shape[1] == 1:  # clasificador lineal binario
+            return self.classes_[(puntajes[:, 0] > 0).astype(int)]
+        return self.classes_[np.argmax(puntajes, axis=1)]
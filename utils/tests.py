@@ -0,0 +1,180 @@
+import os
+import tempfile
+from unittest import mock
+
+import numpy as np
+from django.conf import settings
+from django.test import TestCase, override_settings
+from sklearn.dummy import DummyRegressor
+from sklearn.ensemble import GradientBoostingRegressor, RandomForestClassifier, RandomForestRegressor
+from sklearn.linear_model import LinearRegression, LogisticRegression
+from sklearn.tree import DecisionTreeRegressor
+
+from . import ml_model
+from .modelo_compilado import ModeloCompilado
+
+
+@override_settings(ML_RECARGA_INTERVALO=0)
+class ModeloActivoTests(TestCase):
+    def setUp(self):
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        self.enterContext(override_settings(MODELOS_DIR=directorio.name))
+        self.addCleanup(ml_model.olvidar_modelos)
+        ml_model.olvidar_modelos()
+
+    def version(self, nombre, constante):
+        modelo = DecisionTreeRegressor().fit(np.zeros((1, 3)), [constante])
+        return ml_model.guardar_version(modelo, {'version': nombre})
+
+    def test_recarga_al_cambiar_la_version_activa(self):
+        ml_model.activar_version(self.version('v1', 40))
+        self.assertEqual(ml_model.predict_batch([[0, 0, 0]])[0], 40)
+
+        nueva = self.version('v2', 80)
+        # Otro proceso activa la versión nueva: este no se entera por activar_version
+        en_uso = dict(ml_model._en_uso)
+        ml_model.activar_version(nueva)
+        ml_model._en_uso.update(en_uso)
+        self.assertEqual(ml_model.predict_batch([[0, 0, 0]])[0], 80)
+
+    def test_lote_chico_con_el_compilado_y_grande_con_sklearn(self):
+        ml_model.activar_version(self.version('v1', 40))
+        with override_settings(ML_COMPILADO_MAX_FILAS=2):
+            ml_model.predict_batch([[0, 0, 0]] * 2)
+            self.assertIsInstance(ml_model._en_uso[True][1], ModeloCompilado)
+            self.assertNotIn(False, ml_model._en_uso)
+            self.assertEqual(list(ml_model.predict_batch([[0, 0, 0]] * 3)), [40] * 3)
+            self.assertIsInstance(ml_model._en_uso[False][1], DecisionTreeRegressor)
+        with override_settings(ML_COMPILADO_MAX_FILAS=0):
+            self.assertFalse(ml_model.usa_compilado(1))
+
+    def test_version_sin_compilado_comparte_el_modelo(self):
+        modelo = DummyRegressor(strategy='constant', constant=40).fit(np.zeros((1, 3)), [0])
+        ml_model.activar_version(ml_model.guardar_version(modelo, {'version': 'v1'}))
+        self.assertIs(ml_model.get_ml_model(compilado=True), ml_model.get_ml_model())
+
+    def test_compilado_mapeado_del_archivo(self):
+        ml_model.activar_version(self.version('v1', 40))
+        with override_settings(ML_MMAP='r'):
+            compilado = ml_model.get_ml_model(compilado=True)
+        self.assertIsInstance(compilado.arrays['valor'], np.memmap)
+
+    def test_precargar_sin_artefacto_no_falla(self):
+        with override_settings(MODELOS_DIR=os.path.join(settings.MODELOS_DIR, 'no-existe')):
+            with mock.patch.object(ml_model, 'MODEL_PATH', '/no/existe.pkl'):
+                with self.assertLogs('utils.ml_model', 'WARNING'):
+                    ml_model.precargar()
+        self.assertEqual(ml_model._en_uso, {})
+
+
+class PredictBatchTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        rng = np.random.default_rng(0)
+        cls.X = np.c_[rng.uniform(0, 100, 300), rng.uniform(0, 100, 300), rng.uniform(0, 1, 300)]
+        y = 0.5 * cls.X[:, 0] + 0.4 * cls.X[:, 1] + 10 * cls.X[:, 2]
+        cls.modelo = RandomForestRegressor(n_estimators=10, random_state=0).fit(cls.X, y)
+
+    def setUp(self):
+        modelos = {False: self.modelo, True: ModeloCompilado.desde_modelo(self.modelo)}
+        self.enterContext(mock.patch.object(ml_model, 'get_ml_model', lambda compilado=False: modelos[compilado]))
+
+    def test_lote_igual_que_fila_por_fila(self):
+        # El lote pasa por sklearn y cada fila por la versión NumPy
+        with override_settings(ML_COMPILADO_MAX_FILAS=1):
+            por_lote = ml_model.predict_batch(self.X)
+            por_fila = [ml_model.predict_batch([fila])[0] for fila in self.X]
+        np.testing.assert_allclose(por_lote, por_fila, rtol=1e-12)
+        np.testing.assert_allclose(por_lote, self.modelo.predict(self.X), rtol=1e-12)
+
+    def test_lote_vacio_no_toca_el_modelo(self):
+        with mock.patch.object(ml_model, 'get_ml_model') as get_ml_model:
+            self.assertEqual(ml_model.predict_batch([]).shape, (0,))
+        get_ml_model.assert_not_called()
+
+    def test_cortes_de_categoria(self):
+        self.assertEqual(
+            ml_model.categorizar([0, 50.99, 51, 69.99, 70, 100], self.modelo),
+            ['bajo', 'bajo', 'regular', 'regular', 'bueno', 'bueno'],
+        )
+
+    def test_clasificador_por_indice(self):
+        clasificador = mock.Mock(classes_=np.array([0, 1, 2]))
+        self.assertEqual(ml_model.categorizar(np.array([2, 0, 1]), clasificador), ['bueno', 'bajo', 'regular'])
+
+    def test_categorias_con_el_modelo_que_predijo(self):
+        # Una recarga entre predecir y categorizar no cambia el modelo con que se traduce
+        clasificador = mock.Mock(classes_=np.array(['bajo', 'bueno']))
+        clasificador.predict.return_value = np.array(['bueno'])
+        modelos = iter([clasificador, self.modelo])
+        with mock.patch.object(ml_model, 'get_ml_model', lambda compilado=False: next(modelos)):
+            preds, categorias = ml_model.predecir_categorias([[0, 0, 0]])
+        self.assertEqual(categorias, ['bueno'])
+
+
+class ModeloCompiladoTests(TestCase):
+    """La versión NumPy tiene que predecir exactamente lo mismo que el estimador original."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        rng = np.random.default_rng(0)
+        cls.X = np.c_[rng.uniform(0, 100, 600), rng.uniform(0, 100, 600), rng.uniform(0, 1, 600)]
+        cls.y = 0.5 * cls.X[:, 0] + 0.4 * cls.X[:, 1] + 10 * cls.X[:, 2] + rng.normal(0, 5, 600)
+        cls.categorias = np.array(ml_model.CATEGORIAS)[np.digitize(cls.y, [51, 70])]
+
+    def filas_de_prueba(self, modelo):
+        # Además de filas al azar, valores justo a cada lado de cada umbral (en float32, como compara sklearn)
+        arboles = [modelo] if hasattr(modelo, 'tree_') else np.ravel(getattr(modelo, 'estimators_', []))
+        filas = [np.random.default_rng(1).uniform(0, 100, (300, 3))]
+        for arbol in arboles[:3]:
+            internos = arbol.tree_.children_left != -1
+            for feature, umbral in zip(arbol.tree_.feature[internos], arbol.tree_.threshold[internos]):
+                umbral32 = np.float32(umbral)
+                for valor in (np.nextafter(umbral32, np.float32(-np.inf)), umbral32, np.nextafter(umbral32, np.float32(np.inf))):
+                    fila = self.X[0].copy()
+                    fila[feature] = valor
+                    filas.append(fila[None])
+        return np.vstack(filas)
+
+    def assertParidad(self, modelo, y):
+        modelo.fit(self.X, y)
+        compilado = ModeloCompilado.desde_modelo(modelo)
+        with tempfile.TemporaryDirectory() as directorio:
+            ruta = os.path.join(directorio, 'compilado')
+            compilado.guardar(ruta)
+            compilado = ModeloCompilado.cargar(ruta, mmap_mode='r')
+            X = self.filas_de_prueba(modelo)
+            esperado, obtenido = modelo.predict(X), compilado.predict(X)
+        if esperado.dtype.kind == 'f':
+            np.testing.assert_allclose(obtenido, esperado, rtol=1e-12, atol=1e-9)
+        else:
+            np.testing.assert_array_equal(obtenido, esperado)
+            np.testing.assert_array_equal(compilado.classes_, modelo.classes_)
+
+    def test_regresores(self):
+        for modelo in (
+            RandomForestRegressor(n_estimators=20, random_state=0),
+            GradientBoostingRegressor(n_estimators=30, random_state=0),
+            DecisionTreeRegressor(random_state=0),
+            LinearRegression(),
+        ):
+            with self.subTest(type(modelo).__name__):
+                self.assertParidad(modelo, self.y)
+
+    def test_clasificadores(self):
+        for modelo in (RandomForestClassifier(n_estimators=20, random_state=0), LogisticRegression(max_iter=1000)):
+            with self.subTest(type(modelo).__name__):
+                self.assertParidad(modelo, self.categorias)
+
+    def test_categorizar_igual_que_el_original(self):
+        modelo = RandomForestRegressor(n_estimators=10, random_state=0).fit(self.X, self.y)
+        modelos = {False: modelo, True: ModeloCompilado.desde_modelo(modelo)}
+        # Modelos puestos a mano, sin artefacto en disco
+        self.enterContext(mock.patch.object(ml_model, 'get_ml_model', lambda compilado=False: modelos[compilado]))
+        with override_settings(ML_COMPILADO_MAX_FILAS=0):
+            esperado = ml_model.predecir_categorias(self.X)[1]
+        with override_settings(ML_COMPILADO_MAX_FILAS=len(self.X)):
+            self.assertEqual(ml_model.predecir_categorias(self.X)[1], esperado)